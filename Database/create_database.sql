@@ -1,22 +1,46 @@
 CREATE DATABASE IF NOT EXISTS inmyfridge_db;
 USE inmyfridge_db;
 
+-- One row per kitchen. Inventory and menu plans belong to a household; recipes either belong to
+-- one or are shared by all (household_id NULL). Household 1 is the default kitchen.
+CREATE TABLE IF NOT EXISTS `households` (
+  `household_id` INT NOT NULL AUTO_INCREMENT,
+  `household_name` VARCHAR(100) NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`household_id`),
+  UNIQUE INDEX `household_name_UNIQUE` (`household_name` ASC) VISIBLE
+) ENGINE = InnoDB;
+
+INSERT IGNORE INTO `households` (`household_id`, `household_name`) VALUES (1, 'My Kitchen');
+
 CREATE TABLE IF NOT EXISTS `stock_items` (
   `item_id` INT NOT NULL AUTO_INCREMENT,
   `item_name` VARCHAR(100) NOT NULL,
   `base_unit` ENUM('kg', 'g', 'L', 'ml', 'pcs') NOT NULL,
+  `density_g_per_ml` DECIMAL(10,4) NULL COMMENT 'Converts between mass and volume units',
+  `piece_weight_g` DECIMAL(10,2) NULL COMMENT 'Converts between pcs and mass/volume units',
   PRIMARY KEY (`item_id`),
   UNIQUE INDEX `item_name_UNIQUE` (`item_name` ASC) VISIBLE
 ) ENGINE = InnoDB;
 
 CREATE TABLE IF NOT EXISTS `inventory` (
   `inventory_id` INT NOT NULL AUTO_INCREMENT,
+  `household_id` INT NOT NULL DEFAULT 1,
   `item_id` INT NOT NULL,
-  `quantity` DECIMAL(10,2) NOT NULL,
+  `quantity` DECIMAL(14,4) NOT NULL COMMENT 'Snapshot up to ledger_seq, same precision as the ledger events folded into it',
   `unit` VARCHAR(10) NOT NULL,
+  `reorder_point` DECIMAL(14,4) NULL COMMENT 'Base units (g / ml / pcs); NULL = default for the unit',
+  `is_low` TINYINT NOT NULL DEFAULT 0 COMMENT 'Maintained by the app: base quantity below the reorder point',
+  `ledger_seq` BIGINT NOT NULL DEFAULT 0 COMMENT 'Last inventory_ledger.ledger_id folded into quantity',
+  `row_version` INT NOT NULL DEFAULT 0 COMMENT 'Bumped by every stock change; queued edits check it (optimistic concurrency)',
   `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`inventory_id`),
-  UNIQUE INDEX `item_id_UNIQUE` (`item_id` ASC) VISIBLE,
+  UNIQUE INDEX `household_item_UNIQUE` (`household_id` ASC, `item_id` ASC) VISIBLE,
+  INDEX `household_low_stock_idx` (`household_id` ASC, `is_low` ASC) VISIBLE,
+  INDEX `fk_inventory_stock_items_idx` (`item_id` ASC) VISIBLE,
+  CONSTRAINT `fk_inventory_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
   CONSTRAINT `fk_inventory_stock_items`
     FOREIGN KEY (`item_id`) REFERENCES `stock_items` (`item_id`)
     ON DELETE RESTRICT ON UPDATE CASCADE
@@ -24,10 +48,16 @@ CREATE TABLE IF NOT EXISTS `inventory` (
 
 CREATE TABLE IF NOT EXISTS `recipes` (
   `recipe_id` INT NOT NULL AUTO_INCREMENT,
+  `household_id` INT NULL DEFAULT NULL COMMENT 'NULL = shared by every household',
   `recipe_name` VARCHAR(150) NOT NULL,
   `description` TEXT NULL,
+  `household_key` INT AS (COALESCE(`household_id`, 0)) VIRTUAL NOT NULL COMMENT 'household_id with shared recipes as 0: NULLs never clash in a unique key',
   PRIMARY KEY (`recipe_id`),
-  UNIQUE INDEX `recipe_name_UNIQUE` (`recipe_name` ASC) VISIBLE
+  UNIQUE INDEX `household_recipe_name_UNIQUE` (`household_key` ASC, `recipe_name` ASC) VISIBLE,
+  INDEX `fk_recipes_households_idx` (`household_id` ASC) VISIBLE,
+  CONSTRAINT `fk_recipes_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE = InnoDB;
 
 CREATE TABLE IF NOT EXISTS `recipe_ingredients` (
@@ -46,15 +76,93 @@ CREATE TABLE IF NOT EXISTS `recipe_ingredients` (
     ON DELETE RESTRICT ON UPDATE CASCADE
 ) ENGINE = InnoDB;
 
+-- The meal calendar: one row per household, date and meal. Past rows stay as the household's history;
+-- pages read a date range of the (household_id, meal_date, meal_time) index.
 CREATE TABLE IF NOT EXISTS `menu_plan` (
   `plan_id` INT NOT NULL AUTO_INCREMENT,
+  `household_id` INT NOT NULL DEFAULT 1,
   `recipe_id` INT NOT NULL,
-  `meal_day` ENUM('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday') NOT NULL,
+  `meal_date` DATE NOT NULL,
   `meal_time` ENUM('Breakfast', 'Lunch', 'Dinner') NOT NULL,
   `num_persons` INT NOT NULL DEFAULT 1,
   PRIMARY KEY (`plan_id`),
-  UNIQUE INDEX `meal_slot_UNIQUE` (`meal_day` ASC, `meal_time` ASC) VISIBLE,
+  UNIQUE INDEX `household_meal_slot_UNIQUE` (`household_id` ASC, `meal_date` ASC, `meal_time` ASC) VISIBLE,
+  INDEX `meal_date_idx` (`meal_date` ASC) VISIBLE,
+  INDEX `fk_menu_plan_recipes_idx` (`recipe_id` ASC) VISIBLE,
+  CONSTRAINT `fk_menu_plan_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
   CONSTRAINT `fk_menu_plan_recipes`
     FOREIGN KEY (`recipe_id`) REFERENCES `recipes` (`recipe_id`)
     ON DELETE CASCADE ON UPDATE CASCADE
-) ENGINE = InnoDB;
\ No newline at end of file
+) ENGINE = InnoDB;
+
+-- Materialized ingredient requirements per planned slot, in each item's base unit (g / ml / pcs).
+-- Maintained by the app whenever a slot or one of its recipes changes.
+CREATE TABLE IF NOT EXISTS `menu_requirements` (
+  `plan_id` INT NOT NULL,
+  `item_id` INT NOT NULL,
+  `required_qty` DECIMAL(14,4) NOT NULL,
+  PRIMARY KEY (`plan_id`, `item_id`),
+  INDEX `fk_menu_requirements_stock_items_idx` (`item_id` ASC) VISIBLE,
+  CONSTRAINT `fk_menu_requirements_menu_plan`
+    FOREIGN KEY (`plan_id`) REFERENCES `menu_plan` (`plan_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+  CONSTRAINT `fk_menu_requirements_stock_items`
+    FOREIGN KEY (`item_id`) REFERENCES `stock_items` (`item_id`)
+    ON DELETE RESTRICT ON UPDATE CASCADE
+) ENGINE = InnoDB;
+
+-- Append-only stock events (purchases, meals cooked, manual adjustments, waste). inventory.quantity is a
+-- snapshot up to inventory.ledger_seq; current stock is the snapshot plus the later events, which the app
+-- folds back into the snapshot (compaction) once enough of them pile up.
+CREATE TABLE IF NOT EXISTS `inventory_ledger` (
+  `ledger_id` BIGINT NOT NULL AUTO_INCREMENT,
+  `household_id` INT NOT NULL,
+  `item_id` INT NOT NULL,
+  `event` ENUM('purchase', 'cooked', 'adjustment', 'waste') NOT NULL,
+  `quantity` DECIMAL(14,4) NOT NULL COMMENT 'Signed change, in the unit of the inventory row',
+  `unit` VARCHAR(10) NOT NULL,
+  `plan_id` INT NULL COMMENT 'Menu slot a cooked event deducts for',
+  `note` VARCHAR(255) NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`ledger_id`),
+  INDEX `household_item_seq_idx` (`household_id` ASC, `item_id` ASC, `ledger_id` ASC) VISIBLE,
+  INDEX `fk_inventory_ledger_stock_items_idx` (`item_id` ASC) VISIBLE,
+  INDEX `fk_inventory_ledger_menu_plan_idx` (`plan_id` ASC) VISIBLE,
+  CONSTRAINT `fk_inventory_ledger_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+  CONSTRAINT `fk_inventory_ledger_stock_items`
+    FOREIGN KEY (`item_id`) REFERENCES `stock_items` (`item_id`)
+    ON DELETE RESTRICT ON UPDATE CASCADE,
+  CONSTRAINT `fk_inventory_ledger_menu_plan`
+    FOREIGN KEY (`plan_id`) REFERENCES `menu_plan` (`plan_id`)
+    ON DELETE SET NULL ON UPDATE CASCADE
+) ENGINE = InnoDB;
+
+-- Stock as dated lots, so older and newer batches of an item are told apart. The lots of an inventory row
+-- add up to its current stock in the item's base unit (g / ml / pcs): purchases add lots, every other stock
+-- change draws the oldest lots first (FIFO). Indexed by expiry so "expiring in the next N days" is a range scan.
+CREATE TABLE IF NOT EXISTS `inventory_lots` (
+  `lot_id` BIGINT NOT NULL AUTO_INCREMENT,
+  `household_id` INT NOT NULL,
+  `inventory_id` INT NOT NULL,
+  `item_id` INT NOT NULL,
+  `quantity` DECIMAL(14,4) NOT NULL COMMENT 'Left in the lot, in the base unit of the item',
+  `expires_on` DATE NULL COMMENT 'NULL = no known expiry',
+  `received_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`lot_id`),
+  INDEX `household_expiry_idx` (`household_id` ASC, `expires_on` ASC) VISIBLE,
+  INDEX `fk_inventory_lots_inventory_idx` (`inventory_id` ASC) VISIBLE,
+  INDEX `fk_inventory_lots_stock_items_idx` (`item_id` ASC) VISIBLE,
+  CONSTRAINT `fk_inventory_lots_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+  CONSTRAINT `fk_inventory_lots_inventory`
+    FOREIGN KEY (`inventory_id`) REFERENCES `inventory` (`inventory_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE,
+  CONSTRAINT `fk_inventory_lots_stock_items`
+    FOREIGN KEY (`item_id`) REFERENCES `stock_items` (`item_id`)
+    ON DELETE RESTRICT ON UPDATE CASCADE
+) ENGINE = InnoDB;
@@ -0,0 +1,115 @@
+-- SQLite version of create_database.sql, used by the in-process backend (local mode, benchmarks).
+-- Keep the two scripts in step: same tables, columns, keys and indexes.
+
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS `households` (
+  `household_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_name` VARCHAR(100) NOT NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `household_name_UNIQUE` ON `households` (`household_name`);
+
+INSERT OR IGNORE INTO `households` (`household_id`, `household_name`) VALUES (1, 'My Kitchen');
+
+CREATE TABLE IF NOT EXISTS `stock_items` (
+  `item_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `item_name` VARCHAR(100) NOT NULL COLLATE NOCASE,
+  `base_unit` TEXT NOT NULL CHECK (`base_unit` IN ('kg', 'g', 'L', 'ml', 'pcs')),
+  `density_g_per_ml` DECIMAL(10,4) NULL,
+  `piece_weight_g` DECIMAL(10,2) NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `item_name_UNIQUE` ON `stock_items` (`item_name`);
+
+CREATE TABLE IF NOT EXISTS `inventory` (
+  `inventory_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_id` INTEGER NOT NULL DEFAULT 1 REFERENCES `households` (`household_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `item_id` INTEGER NOT NULL REFERENCES `stock_items` (`item_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
+  `quantity` DECIMAL(14,4) NOT NULL,
+  `unit` VARCHAR(10) NOT NULL,
+  `reorder_point` DECIMAL(14,4) NULL,
+  `is_low` INTEGER NOT NULL DEFAULT 0,
+  `ledger_seq` INTEGER NOT NULL DEFAULT 0,
+  `row_version` INTEGER NOT NULL DEFAULT 0,
+  `last_updated` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `household_item_UNIQUE` ON `inventory` (`household_id`, `item_id`);
+CREATE INDEX IF NOT EXISTS `household_low_stock_idx` ON `inventory` (`household_id`, `is_low`);
+CREATE INDEX IF NOT EXISTS `fk_inventory_stock_items_idx` ON `inventory` (`item_id`);
+
+-- SQLite has no ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER IF NOT EXISTS `inventory_last_updated`
+AFTER UPDATE OF `quantity`, `unit` ON `inventory`
+-- Compaction moves ledger_seq while folding events into quantity; current stock is unchanged
+WHEN NEW.`ledger_seq` = OLD.`ledger_seq`
+BEGIN
+  UPDATE `inventory` SET `last_updated` = CURRENT_TIMESTAMP WHERE `inventory_id` = NEW.`inventory_id`;
+END;
+
+CREATE TABLE IF NOT EXISTS `recipes` (
+  `recipe_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_id` INTEGER NULL DEFAULT NULL REFERENCES `households` (`household_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `recipe_name` VARCHAR(150) NOT NULL,
+  `description` TEXT NULL,
+  -- household_id with shared recipes as 0: NULLs never clash in a unique index
+  `household_key` INTEGER AS (COALESCE(`household_id`, 0)) VIRTUAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `household_recipe_name_UNIQUE` ON `recipes` (`household_key`, `recipe_name`);
+CREATE INDEX IF NOT EXISTS `fk_recipes_households_idx` ON `recipes` (`household_id`);
+
+CREATE TABLE IF NOT EXISTS `recipe_ingredients` (
+  `ingredient_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `recipe_id` INTEGER NOT NULL REFERENCES `recipes` (`recipe_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `item_id` INTEGER NOT NULL REFERENCES `stock_items` (`item_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
+  `quantity_per_person` DECIMAL(10,2) NOT NULL,
+  `unit` VARCHAR(10) NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `recipe_item_UNIQUE` ON `recipe_ingredients` (`recipe_id`, `item_id`);
+
+CREATE TABLE IF NOT EXISTS `menu_plan` (
+  `plan_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_id` INTEGER NOT NULL DEFAULT 1 REFERENCES `households` (`household_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `recipe_id` INTEGER NOT NULL REFERENCES `recipes` (`recipe_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `meal_date` DATE NOT NULL,
+  `meal_time` TEXT NOT NULL CHECK (`meal_time` IN ('Breakfast', 'Lunch', 'Dinner')),
+  `num_persons` INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS `household_meal_slot_UNIQUE` ON `menu_plan` (`household_id`, `meal_date`, `meal_time`);
+CREATE INDEX IF NOT EXISTS `meal_date_idx` ON `menu_plan` (`meal_date`);
+CREATE INDEX IF NOT EXISTS `fk_menu_plan_recipes_idx` ON `menu_plan` (`recipe_id`);
+
+CREATE TABLE IF NOT EXISTS `menu_requirements` (
+  `plan_id` INTEGER NOT NULL REFERENCES `menu_plan` (`plan_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `item_id` INTEGER NOT NULL REFERENCES `stock_items` (`item_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
+  `required_qty` DECIMAL(14,4) NOT NULL,
+  PRIMARY KEY (`plan_id`, `item_id`)
+);
+CREATE INDEX IF NOT EXISTS `fk_menu_requirements_stock_items_idx` ON `menu_requirements` (`item_id`);
+
+CREATE TABLE IF NOT EXISTS `inventory_ledger` (
+  `ledger_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_id` INTEGER NOT NULL REFERENCES `households` (`household_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `item_id` INTEGER NOT NULL REFERENCES `stock_items` (`item_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
+  `event` TEXT NOT NULL CHECK (`event` IN ('purchase', 'cooked', 'adjustment', 'waste')),
+  `quantity` DECIMAL(14,4) NOT NULL,
+  `unit` VARCHAR(10) NOT NULL,
+  `plan_id` INTEGER NULL REFERENCES `menu_plan` (`plan_id`) ON DELETE SET NULL ON UPDATE CASCADE,
+  `note` VARCHAR(255) NULL,
+  `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS `household_item_seq_idx` ON `inventory_ledger` (`household_id`, `item_id`, `ledger_id`);
+CREATE INDEX IF NOT EXISTS `fk_inventory_ledger_stock_items_idx` ON `inventory_ledger` (`item_id`);
+CREATE INDEX IF NOT EXISTS `fk_inventory_ledger_menu_plan_idx` ON `inventory_ledger` (`plan_id`);
+
+CREATE TABLE IF NOT EXISTS `inventory_lots` (
+  `lot_id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `household_id` INTEGER NOT NULL REFERENCES `households` (`household_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `inventory_id` INTEGER NOT NULL REFERENCES `inventory` (`inventory_id`) ON DELETE CASCADE ON UPDATE CASCADE,
+  `item_id` INTEGER NOT NULL REFERENCES `stock_items` (`item_id`) ON DELETE RESTRICT ON UPDATE CASCADE,
+  `quantity` DECIMAL(14,4) NOT NULL,
+  `expires_on` DATE NULL,
+  `received_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS `household_expiry_idx` ON `inventory_lots` (`household_id`, `expires_on`);
+CREATE INDEX IF NOT EXISTS `fk_inventory_lots_inventory_idx` ON `inventory_lots` (`inventory_id`);
+CREATE INDEX IF NOT EXISTS `fk_inventory_lots_stock_items_idx` ON `inventory_lots` (`item_id`);
@@ -1,9 +1,15 @@
 SET FOREIGN_KEY_CHECKS = 0;
 
+TRUNCATE TABLE `inventory_lots`;
+TRUNCATE TABLE `inventory_ledger`;
+TRUNCATE TABLE `menu_requirements`;
 TRUNCATE TABLE `menu_plan`;
 TRUNCATE TABLE `recipe_ingredients`;
 TRUNCATE TABLE `inventory`;
 TRUNCATE TABLE `recipes`;
 TRUNCATE TABLE `stock_items`;
+TRUNCATE TABLE `households`;
+
+INSERT INTO `households` (`household_id`, `household_name`) VALUES (1, 'My Kitchen');
 
 SET FOREIGN_KEY_CHECKS = 1;
@@ -41,6 +41,16 @@ INSERT IGNORE INTO `stock_items` (`item_name`, `base_unit`) VALUES
 ('Tamarind', 'g'),
 ('Veggies', 'kg');
 
+-- Densities and piece weights let recipes use a different unit than the stock item
+-- (e.g. 'ml' of Ghee or 'pcs' of Onion).
+UPDATE `stock_items` SET `density_g_per_ml` = 0.92 WHERE `item_name` = 'Oil';
+UPDATE `stock_items` SET `density_g_per_ml` = 0.91 WHERE `item_name` = 'Ghee';
+UPDATE `stock_items` SET `density_g_per_ml` = 1.01 WHERE `item_name` = 'Cream';
+UPDATE `stock_items` SET `piece_weight_g` = 150 WHERE `item_name` = 'Onion';
+UPDATE `stock_items` SET `piece_weight_g` = 100 WHERE `item_name` = 'Tomato';
+UPDATE `stock_items` SET `piece_weight_g` = 170 WHERE `item_name` = 'Potato';
+UPDATE `stock_items` SET `piece_weight_g` = 5 WHERE `item_name` = 'Chili';
+
 -- -----------------------------------------------------
 -- 2. Populate the Personal Inventory with Initial Quantities
 -- We use a subquery `(SELECT item_id FROM ...)` to get the correct foreign key.
@@ -87,17 +97,17 @@ INSERT IGNORE INTO `recipe_ingredients` (`recipe_id`, `item_id`, `quantity_per_p
 -- Add other ingredients for other recipes as needed...
 
 -- -----------------------------------------------------
--- 5. Populate the Weekly Menu Plan
--- `ON DUPLICATE KEY UPDATE` will update the dish if a slot is already filled.
+-- 5. Populate This Week's Menu Plan
+-- Dates count from the Monday of the current week. `ON DUPLICATE KEY UPDATE` will update the dish if a slot is already filled.
 -- -----------------------------------------------------
-INSERT INTO `menu_plan` (`meal_day`, `meal_time`, `recipe_id`, `num_persons`) VALUES
-('Monday', 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Poha'), 2),
-('Monday', 'Lunch', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Veg Pulao'), 2),
-('Monday', 'Dinner', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Paneer Butter Masala'), 4),
-('Tuesday', 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Idli'), 2),
-('Tuesday', 'Lunch', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Rajma Chawal'), 4),
-('Tuesday', 'Dinner', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Chole'), 4),
-('Wednesday', 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Upma'), 2)
+INSERT INTO `menu_plan` (`meal_date`, `meal_time`, `recipe_id`, `num_persons`) VALUES
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY, 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Poha'), 2),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY, 'Lunch', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Veg Pulao'), 2),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY, 'Dinner', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Paneer Butter Masala'), 4),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL 1 DAY, 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Idli'), 2),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL 1 DAY, 'Lunch', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Rajma Chawal'), 4),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL 1 DAY, 'Dinner', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Chole'), 4),
+(CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL 2 DAY, 'Breakfast', (SELECT recipe_id FROM recipes WHERE recipe_name = 'Upma'), 2)
 ON DUPLICATE KEY UPDATE 
     recipe_id = VALUES(recipe_id), 
     num_persons = VALUES(num_persons);
\ No newline at end of file
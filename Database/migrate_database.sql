@@ -0,0 +1,63 @@
+-- Upgrades a database created with the original schema (meal_day menu, one global inventory) to the
+-- current one without dropping its data. Run it once, after create_database.sql, which adds the new
+-- tables (households, menu_requirements, inventory_ledger, inventory_lots) and the default household:
+--   mysql < create_database.sql && mysql < migrate_database.sql
+-- Existing stock, recipes and menu slots all go to household 1; recipes become shared by every household.
+-- menu_requirements, the low-stock flags and the stock lots are filled in by the app on its next start;
+-- the old schema has no expiry dates, so the existing stock becomes one undated lot per item.
+USE inmyfridge_db;
+
+-- --- stock_items: per-item conversions between mass, volume and pieces ---
+ALTER TABLE `stock_items`
+  ADD COLUMN `density_g_per_ml` DECIMAL(10,4) NULL COMMENT 'Converts between mass and volume units' AFTER `base_unit`,
+  ADD COLUMN `piece_weight_g` DECIMAL(10,2) NULL COMMENT 'Converts between pcs and mass/volume units' AFTER `density_g_per_ml`;
+
+-- --- inventory: household scope, ledger snapshot, reorder points, optimistic concurrency ---
+ALTER TABLE `inventory`
+  ADD COLUMN `household_id` INT NOT NULL DEFAULT 1 AFTER `inventory_id`,
+  MODIFY COLUMN `quantity` DECIMAL(14,4) NOT NULL COMMENT 'Snapshot up to ledger_seq, same precision as the ledger events folded into it',
+  ADD COLUMN `reorder_point` DECIMAL(14,4) NULL COMMENT 'Base units (g / ml / pcs); NULL = default for the unit' AFTER `unit`,
+  ADD COLUMN `is_low` TINYINT NOT NULL DEFAULT 0 COMMENT 'Maintained by the app: base quantity below the reorder point' AFTER `reorder_point`,
+  ADD COLUMN `ledger_seq` BIGINT NOT NULL DEFAULT 0 COMMENT 'Last inventory_ledger.ledger_id folded into quantity' AFTER `is_low`,
+  ADD COLUMN `row_version` INT NOT NULL DEFAULT 0 COMMENT 'Bumped by every stock change; queued edits check it (optimistic concurrency)' AFTER `ledger_seq`,
+  -- fk_inventory_stock_items needs an index on item_id of its own before item_id_UNIQUE goes
+  ADD INDEX `fk_inventory_stock_items_idx` (`item_id` ASC) VISIBLE;
+
+ALTER TABLE `inventory`
+  DROP INDEX `item_id_UNIQUE`,
+  ADD UNIQUE INDEX `household_item_UNIQUE` (`household_id` ASC, `item_id` ASC) VISIBLE,
+  ADD INDEX `household_low_stock_idx` (`household_id` ASC, `is_low` ASC) VISIBLE,
+  ADD CONSTRAINT `fk_inventory_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- --- recipes: owned by a household, or shared (NULL) ---
+ALTER TABLE `recipes`
+  ADD COLUMN `household_id` INT NULL DEFAULT NULL COMMENT 'NULL = shared by every household' AFTER `recipe_id`,
+  ADD COLUMN `household_key` INT AS (COALESCE(`household_id`, 0)) VIRTUAL NOT NULL COMMENT 'household_id with shared recipes as 0: NULLs never clash in a unique key' AFTER `description`,
+  DROP INDEX `recipe_name_UNIQUE`,
+  ADD UNIQUE INDEX `household_recipe_name_UNIQUE` (`household_key` ASC, `recipe_name` ASC) VISIBLE,
+  ADD INDEX `fk_recipes_households_idx` (`household_id` ASC) VISIBLE,
+  ADD CONSTRAINT `fk_recipes_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- --- menu_plan: weekday slots become dated slots of the current week ---
+ALTER TABLE `menu_plan`
+  ADD COLUMN `household_id` INT NOT NULL DEFAULT 1 AFTER `plan_id`,
+  ADD COLUMN `meal_date` DATE NULL AFTER `recipe_id`;
+
+-- meal_day + 0 is the ENUM position: Monday = 1 ... Sunday = 7
+UPDATE `menu_plan`
+SET `meal_date` = CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY + INTERVAL (`meal_day` + 0 - 1) DAY;
+
+ALTER TABLE `menu_plan`
+  MODIFY COLUMN `meal_date` DATE NOT NULL,
+  DROP INDEX `meal_slot_UNIQUE`,
+  DROP COLUMN `meal_day`,
+  ADD UNIQUE INDEX `household_meal_slot_UNIQUE` (`household_id` ASC, `meal_date` ASC, `meal_time` ASC) VISIBLE,
+  ADD INDEX `meal_date_idx` (`meal_date` ASC) VISIBLE,
+  ADD INDEX `fk_menu_plan_recipes_idx` (`recipe_id` ASC) VISIBLE,
+  ADD CONSTRAINT `fk_menu_plan_households`
+    FOREIGN KEY (`household_id`) REFERENCES `households` (`household_id`)
+    ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,98 @@
+# bench_basket_sql.py
+#
+# Compares the two ways of building the Prep Basket shopping list as the recipe book grows: the
+# depletion forecast in pandas (the household's inventory and the horizon's requirement rows read
+# into Python and walked there) against the single aggregate statement behind get_basket_items,
+# which returns only the items to buy. Reported per size and horizon: cold latency, and rows and
+# bytes that reach Python for each path.
+# Run from the repository root:
+#   python benchmarks/bench_basket_sql.py [--sizes small,medium,large] [--horizons 2,7,14]
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import SIZES, git_commit, timed, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+from forecast import MEALS, plan_dates  # noqa: E402
+import database_utils as du  # noqa: E402
+
+PLANNED_DAYS = 14
+
+def plan_ahead(backend, n_recipes, rng):
+    """Plans every meal of the next PLANNED_DAYS days that the synthetic week left open."""
+    days = plan_dates(datetime.date.today(), PLANNED_DAYS)
+    rows = pd.DataFrame({
+        "household_id": du.DEFAULT_HOUSEHOLD,
+        "recipe_id": rng.integers(1, n_recipes + 1, len(days) * len(MEALS)),
+        "meal_date": np.repeat([day.isoformat() for day in days], len(MEALS)),
+        "meal_time": np.tile(MEALS, len(days)),
+        "num_persons": rng.integers(1, 7, len(days) * len(MEALS)),
+    })
+    columns = ["household_id", "recipe_id", "meal_date", "meal_time", "num_persons"]
+    with backend.session as s:
+        s.execute(text(backend.insert_ignore("menu_plan", columns)), rows.astype(object).to_dict("records"))
+        s.commit()
+    du.rebuild_menu_requirements(since=days[0])
+
+def forecast_basket(horizon):
+    """The shopping list as get_basket_items built it before: the depletion forecast, filtered in pandas."""
+    forecast_df = du.get_depletion_forecast(horizon)
+    return forecast_df[forecast_df["runs_out"]]
+
+def transferred(frames):
+    return {"rows": int(sum(len(df) for df in frames)), "bytes": int(sum(df.memory_usage(deep=True).sum() for df in frames))}
+
+def main():
+    parser = argparse.ArgumentParser(description="Pandas forecast against the SQL aggregate for the shopping list.")
+    parser.add_argument("--sizes", default="small,medium,large", help=f"Comma-separated subset of {', '.join(SIZES)}.")
+    parser.add_argument("--horizons", default="2,7,14", help="Comma-separated planning horizons (days).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes.split(","):
+        n_items, n_recipes, n_ingredients = SIZES[size]
+        data = generate(n_items, n_recipes, n_ingredients, seed=args.seed)
+        backend = SQLiteBackend()
+        seed_backend(backend, data)
+        use_backend(backend)
+        du.rebuild_menu_requirements()
+        du.rebuild_low_stock_flags()
+        plan_ahead(backend, n_recipes, np.random.default_rng(args.seed))
+
+        for horizon in (int(value) for value in args.horizons.split(",")):
+            today = datetime.date.today()
+            cold()
+            inputs = [du.get_inventory(), du.get_menu_requirements(today, today + datetime.timedelta(days=horizon))]
+            cold()
+            basket = du.get_basket_items(horizon)
+            reference = forecast_basket(horizon)
+            results.append({
+                "size": size,
+                "recipe_ingredients": n_ingredients,
+                "horizon_days": horizon,
+                "basket_items": len(basket),
+                "same_items": set(basket["item_name"]) == set(reference["item_name"]),
+                "forecast_pandas_cold": timed(lambda: forecast_basket(horizon), args.repeat, setup=cold),
+                "aggregate_sql_cold": timed(lambda: du.get_basket_items(horizon), args.repeat, setup=cold),
+                "forecast_pandas_transfer": transferred(inputs),
+                "aggregate_sql_transfer": transferred([basket]),
+            })
+        use_backend(None)
+
+    print(json.dumps({"commit": git_commit(), "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_calendar.py
+#
+# Checks that the dashboard and basket reads stay flat as meal-plan history accumulates: years of
+# fully planned past days are added to the calendar and, at each size, this week's plan, the
+# next week's requirements and the basket forecast are read cold, next to a full pass that reads
+# every plan row of the household and filters the week in pandas.
+# Run from the repository root:
+#   python benchmarks/bench_calendar.py [--years 1,5,20] [--items 2000] [--recipes 500]
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, timed, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+from forecast import MEALS, week_start  # noqa: E402
+import database_utils as du  # noqa: E402
+
+FORECAST_DAYS = 7
+INSERT_CHUNK = 20_000
+
+def add_history(backend, first_day, last_day, n_recipes, rng):
+    """Plans every meal from `first_day` up to, not including, `last_day` (all in the past)."""
+    days = pd.date_range(first_day, last_day - datetime.timedelta(days=1), freq="D").date
+    rows = pd.DataFrame({
+        "household_id": du.DEFAULT_HOUSEHOLD,
+        "recipe_id": rng.integers(1, n_recipes + 1, len(days) * len(MEALS)),
+        "meal_date": np.repeat([day.isoformat() for day in days], len(MEALS)),
+        "meal_time": np.tile(MEALS, len(days)),
+        "num_persons": rng.integers(1, 7, len(days) * len(MEALS)),
+    })
+    statement = text("""
+        INSERT INTO menu_plan (household_id, recipe_id, meal_date, meal_time, num_persons)
+        VALUES (:household_id, :recipe_id, :meal_date, :meal_time, :num_persons);
+    """)
+    with backend.session as s:
+        for start in range(0, len(rows), INSERT_CHUNK):
+            s.execute(statement, rows.iloc[start:start + INSERT_CHUNK].astype(object).to_dict("records"))
+        s.commit()
+    # Past slots get their requirements too, as they would have had when they were planned
+    du.rebuild_menu_requirements(since=first_day)
+
+def full_pass():
+    """This week's plan without the date range: every plan row of the household, filtered in pandas."""
+    with du.get_db_connection().engine.connect() as c:
+        plan = pd.read_sql(text("""
+            SELECT mp.meal_date, mp.meal_time, mp.recipe_id, r.recipe_name, mp.num_persons
+            FROM menu_plan mp JOIN recipes r ON mp.recipe_id = r.recipe_id
+            WHERE mp.household_id = :household;
+        """), c, params={"household": du.DEFAULT_HOUSEHOLD})
+    start = week_start()
+    dates = pd.to_datetime(plan["meal_date"]).dt.date
+    return plan[(dates >= start) & (dates < start + datetime.timedelta(days=7))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Calendar read latency as meal-plan history grows.")
+    parser.add_argument("--years", default="1,5,20", help="Comma-separated years of history to time at.")
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = generate(args.items, args.recipes, args.recipes * 8, seed=args.seed)
+    backend = SQLiteBackend()
+    seed_backend(backend, data)
+    use_backend(backend)
+    du.rebuild_menu_requirements()
+    du.rebuild_low_stock_flags()
+    rng = np.random.default_rng(args.seed)
+
+    results, covered_from = [], week_start()
+    for years in sorted(int(value) for value in args.years.split(",")):
+        first_day = week_start() - datetime.timedelta(days=365 * years)
+        start = time.perf_counter()
+        add_history(backend, first_day, covered_from, args.recipes, rng)
+        history_s = time.perf_counter() - start
+        covered_from = first_day
+        with backend.engine.connect() as c:
+            slots = c.execute(text("SELECT COUNT(*) FROM menu_plan;")).scalar_one()
+        today = datetime.date.today()
+        results.append({
+            "years": years,
+            "plan_rows": int(slots),
+            "history_insert_s": round(history_s, 3),
+            "week_plan_cold": timed(du.get_menu_plan, args.repeat, setup=cold),
+            "week_plan_full_pass": timed(full_pass, args.repeat),
+            "requirements_next_week_cold": timed(
+                lambda: du.get_menu_requirements(today, today + datetime.timedelta(days=FORECAST_DAYS)), args.repeat, setup=cold
+            ),
+            "basket_7_days_cold": timed(lambda: du.get_basket_items(FORECAST_DAYS), args.repeat, setup=cold),
+        })
+    use_backend(None)
+    print(json.dumps({"commit": git_commit(), "rows": {table: len(df) for table, df in data.items()}, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
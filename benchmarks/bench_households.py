@@ -0,0 +1,102 @@
+# bench_households.py
+#
+# Checks that per-household query latency stays flat as the number of households grows,
+# and that one household's writes leave the other households' cached results alone.
+# Run from the repository root:
+#   python benchmarks/bench_households.py [--households 1,10,100,1000,10000] [--sample 20]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate_households, seed_backend  # noqa: E402
+from bench_suite import git_commit  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+from query_cache import get_query_cache  # noqa: E402
+import database_utils as du  # noqa: E402
+
+QUERIES = {
+    "get_inventory": lambda h: du.get_inventory(household_id=h),
+    "get_menu_plan": lambda h: du.get_menu_plan(household_id=h),
+    "get_low_stock_items": lambda h: du.get_low_stock_items(household_id=h),
+    "check_menu_status": lambda h: du.check_menu_status(du.get_menu_plan(household_id=h), household_id=h),
+    "basket_7_days": lambda h: du.get_basket_items(7, household_id=h),
+}
+
+def cold_latencies(household_ids):
+    """Median cold-cache latency (ms) of each query over the sampled households."""
+    timings = {name: [] for name in QUERIES}
+    for h in household_ids:
+        for name, query in QUERIES.items():
+            get_query_cache().clear()
+            start = time.perf_counter()
+            query(h)
+            timings[name].append((time.perf_counter() - start) * 1000)
+    return {name: round(float(np.median(values)), 3) for name, values in timings.items()}
+
+def cross_household_hits(household_ids):
+    """Share of other households' warm inventory reads still served from cache after one household writes."""
+    if len(household_ids) < 2:
+        return None
+    writer, readers = household_ids[0], household_ids[1:]
+    for h in readers:
+        du.get_inventory(household_id=h)
+    inventory = du.get_inventory(household_id=writer)
+    du.apply_inventory_changes(updates={int(inventory['inventory_id'].iloc[0]): 1.0}, household_id=writer)
+
+    before = get_query_cache().stats()['inventory']['hits']
+    for h in readers:
+        du.get_inventory(household_id=h)
+    return (get_query_cache().stats()['inventory']['hits'] - before) / len(readers)
+
+def run(n_households, sample, seed):
+    data = generate_households(n_households, seed=seed)
+    backend = SQLiteBackend()
+    start = time.perf_counter()
+    seed_backend(backend, data)
+    use_backend(backend)
+    get_query_cache().clear()
+    du.rebuild_menu_requirements()
+    du.rebuild_low_stock_flags()
+    seed_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    household_ids = sorted(rng.choice(np.arange(1, n_households + 1), min(sample, n_households), replace=False).tolist())
+    return {
+        "households": n_households,
+        "rows": {table: len(df) for table, df in data.items()},
+        "seed_s": round(seed_s, 3),
+        "sampled": len(household_ids),
+        "cold_median_ms": cold_latencies(household_ids),
+        "cross_household_cache_hit_rate": cross_household_hits(household_ids),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-household latency as the number of households grows.")
+    parser.add_argument("--households", default="1,10,100,1000,10000")
+    parser.add_argument("--sample", type=int, default=20, help="Households timed per run.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "results": [run(int(n), args.sample, args.seed) for n in args.households.split(",")],
+    }
+    use_backend(None)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
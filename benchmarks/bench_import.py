@@ -0,0 +1,87 @@
+# bench_import.py
+#
+# Throughput and peak memory of the streaming CSV importer, against adding the same purchases
+# one item at a time through upsert_inventory_item.
+# Run from the repository root:  python benchmarks/bench_import.py [--rows 200000] [--items 20000]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from bench_search import make_catalogue  # noqa: E402
+from bench_suite import git_commit  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+from importer import import_csv, CHUNK_ROWS  # noqa: E402
+
+def write_receipts(path, n_rows, names, seed=42):
+    """A receipts CSV of `n_rows` purchases over `names`, written in pieces so it never sits in memory whole."""
+    rng = np.random.default_rng(seed)
+    units = np.array(["kg", "g", "L", "ml", "pcs"])
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, n_rows, 50_000):
+            size = min(50_000, n_rows - start)
+            pd.DataFrame({
+                "item_name": np.asarray(names, dtype=object)[rng.integers(0, len(names), size)],
+                "quantity": np.round(rng.uniform(0.1, 5, size), 2),
+                "unit": units[rng.integers(0, len(units), size)],
+            }).to_csv(f, header=start == 0, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming CSV import benchmark.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--one-by-one", type=int, default=500, help="Purchases to time through upsert_inventory_item.")
+    args = parser.parse_args()
+
+    names = make_catalogue(args.items)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "receipts.csv")
+        write_receipts(path, args.rows, names)
+        file_mb = os.path.getsize(path) / 2**20
+
+        use_backend(SQLiteBackend())
+        start = time.perf_counter()
+        summary = import_csv(path, "stock", chunk_rows=args.chunk_rows)
+        import_s = time.perf_counter() - start
+
+        # Memory is traced in a second run: tracing slows Python down several times over
+        use_backend(SQLiteBackend())
+        tracemalloc.start()
+        import_csv(path, "stock", chunk_rows=args.chunk_rows)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        use_backend(SQLiteBackend())
+        sample = pd.read_csv(path, nrows=args.one_by_one)
+        start = time.perf_counter()
+        for name, quantity, unit in sample.itertuples(index=False):
+            du.upsert_inventory_item(name, quantity, unit)
+        one_by_one_s = time.perf_counter() - start
+    use_backend(None)
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "rows": args.rows,
+        "file_mb": round(file_mb, 1),
+        "chunk_rows": args.chunk_rows,
+        "summary": summary,
+        "import_s": round(import_s, 3),
+        "import_rows_per_s": round(args.rows / import_s),
+        "import_peak_mb": round(peak / 2**20, 1),
+        "one_by_one_rows_per_s": round(len(sample) / one_by_one_s),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# bench_ledger.py
+#
+# Checks that current-stock reads stay flat as the stock ledger grows: events are posted in
+# batches (like meals being cooked) and the inventory reads are timed at each history size,
+# once with the app's automatic compaction and once with it switched off for comparison.
+# Also checks that marking a planned meal cooked leaves the shopping list of the remaining slots
+# unchanged, apart from what that meal was short of (its deductions replace its requirements).
+# Run from the repository root:
+#   python benchmarks/bench_ledger.py [--history 0,5000,20000,50000] [--batch 50]
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, timed, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+
+def post_history(inventory_ids, n_events, batch, rng):
+    """Posts `n_events` small random stock changes in batches, each batch one ledger write."""
+    for start in range(0, n_events, batch):
+        size = min(batch, n_events - start)
+        ids = rng.choice(inventory_ids, size, replace=False)
+        du.post_ledger_events([
+            dict(inventory_id=int(inv_id), event='cooked' if rng.random() < 0.7 else 'purchase', quantity=float(change))
+            for inv_id, change in zip(ids, np.round(rng.uniform(-0.2, 0.5, size), 2))
+        ])
+
+def run_mode(data, history, batch, repeat, compact_after, seed):
+    backend = SQLiteBackend()
+    seed_backend(backend, data)
+    use_backend(backend)
+    cold()
+    du.rebuild_low_stock_flags()
+    du.COMPACT_AFTER_EVENTS = compact_after
+    inventory_ids = data["inventory"]["inventory_id"].to_numpy()
+    rng = np.random.default_rng(seed)
+
+    results, posted = [], 0
+    for size in history:
+        start = time.perf_counter()
+        post_history(inventory_ids, size - posted, batch, rng)
+        post_s = time.perf_counter() - start
+        posted = size
+        results.append({
+            "events": size,
+            "unfolded_events": du._ledger_tail_size(du.DEFAULT_HOUSEHOLD),
+            "post_s": round(post_s, 3),
+            "get_inventory_cold": timed(du.get_inventory, repeat, setup=cold),
+            "inventory_page_by_quantity_cold": timed(lambda: du.get_inventory_page(0, 50, sort="quantity"), repeat, setup=cold),
+            "low_stock_cold": timed(du.get_low_stock_items, repeat, setup=cold),
+        })
+    return results
+
+def shopping_list():
+    """The 7-day shopping list, checked to come out the same from the forecast and the basket query."""
+    forecast_df = du.get_depletion_forecast(7)
+    to_buy = forecast_df[forecast_df["runs_out"]].set_index("item_name")["to_buy"].astype(float)
+    basket = du.get_basket_items(7).set_index("item_name")["shortfall"]
+    assert np.allclose(basket.reindex(to_buy.index), to_buy) and len(basket) == len(to_buy), "basket and forecast disagree"
+    return to_buy
+
+def check_cooked_slot(data, seed):
+    """Marks each of today's planned meals cooked in turn and compares the shopping list before and after."""
+    backend = SQLiteBackend()
+    seed_backend(backend, data)
+    use_backend(backend)
+    cold()
+    du.rebuild_menu_requirements()
+    today = datetime.date.today()
+    menu = du.get_menu_plan(today, today + datetime.timedelta(days=1))
+    checked, mismatches, cooked_runs_out = 0, 0, 0
+    for meal in menu["meal_time"]:
+        before = shopping_list()
+        short = du.mark_meal_cooked(today, meal).set_index("item_name")["short"].fillna(0)
+        after = shopping_list()
+        expected = (before - short.reindex(before.index).fillna(0)).clip(lower=0)
+        expected = expected[expected > 1e-6]
+        checked += len(expected.index.union(after.index))
+        mismatches += int((~np.isclose(after.reindex(expected.index).fillna(0), expected, atol=1e-6)).sum())
+        mismatches += len(after.index.difference(expected.index))
+        forecast_df = du.get_depletion_forecast(7)
+        cooked_runs_out += int(((forecast_df["runs_out_on"] == today) & (forecast_df["runs_out_meal"] == meal)).sum())
+    return {"meals_cooked": len(menu), "items_checked": checked, "mismatches": mismatches, "runs_out_at_cooked_meal": cooked_runs_out}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory read latency as the stock ledger grows.")
+    parser.add_argument("--history", default="0,5000,20000,50000", help="Comma-separated ledger sizes to time at.")
+    parser.add_argument("--batch", type=int, default=50, help="Events per ledger write.")
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    history = sorted(int(size) for size in args.history.split(","))
+    data = generate(args.items, 200, 2_000, stocked_share=1.0, seed=args.seed)
+    compact_after = du.COMPACT_AFTER_EVENTS
+    report = {
+        "commit": git_commit(),
+        "inventory_rows": len(data["inventory"]),
+        "batch": args.batch,
+        "compact_after_events": compact_after,
+        "compacted": run_mode(data, history, args.batch, args.repeat, compact_after, args.seed),
+        "never_compacted": run_mode(data, history, args.batch, args.repeat, float("inf"), args.seed),
+        "cooked_slot_check": check_cooked_slot(data, args.seed),
+    }
+    use_backend(None)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench_loader.py
+#
+# Cold page-load time of the home page's datasets fetched one after another against fetched
+# together through loader.load_datasets. Uses a file-backed SQLite database (pooled connections,
+# WAL readers); `--latency-ms` adds a fixed delay to every statement to stand in for the network
+# round trip to a database server.
+# Run from the repository root:
+#   python benchmarks/bench_loader.py [--items 10000] [--recipes 4000] [--ingredients 100000] [--latency-ms 0,2,10]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, timed, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+from loader import load_datasets  # noqa: E402
+
+FORECAST_DAYS = 7
+
+# What home.py loads up front
+HOME_DATASETS = {
+    "menu": du.get_menu_plan,
+    "low_stock": du.get_low_stock_items,
+    "forecast": (du.get_depletion_forecast, FORECAST_DAYS),
+    "cooked_slots": du.get_cooked_slots,
+}
+
+def serial():
+    for spec in HOME_DATASETS.values():
+        fn, *args = spec if isinstance(spec, tuple) else (spec,)
+        fn(*args)
+
+def concurrent():
+    data = load_datasets(HOME_DATASETS)
+    if data.errors:
+        raise RuntimeError(data.errors)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial against concurrent page data loading.")
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--recipes", type=int, default=4_000)
+    parser.add_argument("--ingredients", type=int, default=100_000)
+    parser.add_argument("--latency-ms", default="0,2,10", help="Comma-separated per-statement delays to time at.")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = generate(args.items, args.recipes, args.ingredients, seed=args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "bench.db"))
+        seed_backend(backend, data)
+        use_backend(backend)
+        du.rebuild_menu_requirements()
+        du.rebuild_low_stock_flags()
+        latency = {"s": 0.0}
+
+        @event.listens_for(backend.engine, "before_cursor_execute")
+        def _network(*_):
+            time.sleep(latency["s"])
+
+        for ms in sorted(float(value) for value in args.latency_ms.split(",")):
+            latency["s"] = ms / 1000
+            results.append({
+                "latency_ms": ms,
+                "serial_cold": timed(serial, args.repeat, setup=cold),
+                "concurrent_cold": timed(concurrent, args.repeat, setup=cold),
+            })
+        use_backend(None)
+        backend.engine.dispose()
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "rows": {table: len(df) for table, df in data.items()},
+        "read_concurrency": backend.read_concurrency,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
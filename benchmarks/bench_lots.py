@@ -0,0 +1,98 @@
+# bench_lots.py
+#
+# Checks that the expiring-soon read stays flat as the number of stock lots grows: purchases
+# with expiry dates are imported in chunks (one lot per item and date) and, at each lot count,
+# the indexed expiry read is timed against a full pass over the household's lots, along with
+# a batch of FIFO consumption (cooked events drawing the oldest lots down).
+# Run from the repository root:
+#   python benchmarks/bench_lots.py [--lots 1000,10000,100000] [--items 2000]
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, timed, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+
+EXPIRING_DAYS = 7
+
+def buy_lots(inventory, n_lots, rng, chunk=5_000):
+    """Imports `n_lots` purchases of stocked items, each with its own expiry date (so its own lot)."""
+    today = datetime.date.today()
+    for start in range(0, n_lots, chunk):
+        size = min(chunk, n_lots - start)
+        picked = inventory.iloc[rng.integers(0, len(inventory), size)]
+        du.import_purchases(pd.DataFrame({
+            "item_name": picked["item_name"].to_numpy(),
+            "quantity": np.round(rng.uniform(0.1, 2, size), 2),
+            "unit": picked["unit"].to_numpy(),
+            # Start-offset dates keep (item, date) pairs distinct across chunks
+            "expires_on": [today + datetime.timedelta(days=int(d)) for d in start + np.arange(size) * 7 % 3_650 - 30],
+        }))
+
+def full_pass():
+    """The same question answered without the index: every lot of the household, filtered in pandas."""
+    with du.get_db_connection().engine.connect() as c:
+        lots = pd.read_sql(text("""
+            SELECT l.lot_id, si.item_name, l.quantity, l.expires_on
+            FROM inventory_lots l JOIN stock_items si ON l.item_id = si.item_id
+            WHERE l.household_id = :household;
+        """), c, params={"household": du.DEFAULT_HOUSEHOLD})
+    until = (datetime.date.today() + datetime.timedelta(days=EXPIRING_DAYS)).isoformat()
+    return lots[lots["expires_on"].notna() & (lots["expires_on"] <= until)].sort_values(["expires_on", "lot_id"]).head(20)
+
+def consume(inventory_ids, rng, batch=50):
+    """One batch of small 'cooked' deductions, each drawing its row's lots down FIFO."""
+    ids = rng.choice(inventory_ids, batch, replace=False)
+    du.post_ledger_events([dict(inventory_id=int(inv_id), event="cooked", quantity=-0.05) for inv_id in ids])
+
+def main():
+    parser = argparse.ArgumentParser(description="Expiring-soon read latency as the number of lots grows.")
+    parser.add_argument("--lots", default="1000,10000,100000", help="Comma-separated lot counts to time at.")
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.lots.split(","))
+    data = generate(args.items, 50, 500, stocked_share=1.0, seed=args.seed)
+    backend = SQLiteBackend()
+    seed_backend(backend, data)
+    use_backend(backend)
+    cold()
+    rng = np.random.default_rng(args.seed)
+    inventory = du.get_inventory()
+    inventory_ids = inventory["inventory_id"].to_numpy()
+
+    results, bought = [], 0
+    for size in sizes:
+        start = time.perf_counter()
+        buy_lots(inventory, size - bought, rng)
+        import_s = time.perf_counter() - start
+        bought = size
+        with backend.engine.connect() as c:
+            lots = c.execute(text("SELECT COUNT(*) FROM inventory_lots;")).scalar_one()
+        results.append({
+            "lots": int(lots),
+            "import_s": round(import_s, 3),
+            "expiring_indexed_cold": timed(lambda: du.get_expiring_lots(EXPIRING_DAYS), args.repeat, setup=cold),
+            "expiring_full_pass": timed(full_pass, args.repeat),
+            "fifo_consume_batch_of_50": timed(lambda: consume(inventory_ids, rng), args.repeat),
+        })
+    use_backend(None)
+    print(json.dumps({"commit": git_commit(), "inventory_rows": len(inventory_ids), "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bench_pages.py
+#
+# Database work and server CPU per widget interaction, with the interaction rerunning the whole
+# page (what every click used to cost) against rerunning only the fragment the widget lives in.
+# Pages run through Streamlit's AppTest; the fragment-scoped reruns the browser asks for are
+# reproduced by handing the runner the fragment's id, as a real session does.
+# Run from the repository root:
+#   python benchmarks/bench_pages.py [--items 1000] [--recipes 400] [--ingredients 10000] [--repeat 5]
+
+import argparse
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge")
+sys.path.insert(0, PAGES_DIR)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+import streamlit.testing.v1.local_script_runner as local_script_runner  # noqa: E402
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+from instrumentation import _metrics  # noqa: E402
+
+def _click(label):
+    return lambda at, rep: next(b for b in at.button if label in str(b.label)).click()
+
+def _open_panel(at):
+    at.button[0].click().run()
+
+# page, what the user does, the fragment the widget is in, optional untimed preparation, the action
+INTERACTIONS = [
+    ("stocks.py", "next page", "stock_list", None, _click("Next")),
+    ("stocks.py", "search", "stock_list", None, lambda at, rep: at.text_input(key="stock_search").input(str(rep + 1))),
+    ("stocks.py", "open add form", "add_item_panel", None, lambda at, rep: at.button[0].click()),
+    ("menu.py", "open management panel", "management_panel", None, lambda at, rep: at.button[0].click()),
+    ("menu.py", "find a recipe", "recipe_editor", _open_panel, lambda at, rep: at.text_input(key="edit_recipe_search").input(str(rep + 1))),
+    ("home.py", "change persons", "what_can_i_make", None, lambda at, rep: at.number_input(key="suggest_persons").set_value(3 + rep)),
+    ("baskets.py", "add one item", "basket_card", None, lambda at, rep: [b for b in at.button if str(b.key).startswith("add_") and b.key != "add_all"][rep].click()),
+]
+
+def fragment_id(at, name, nth=0):
+    """Id of the `nth` fragment drawn from the function `name` in the app's last run."""
+    storage = at._fragment_storage
+    ids = [
+        fid for fid, fragment in sorted(storage._fragments.items(), key=lambda item: storage._registration_sequence_by_id.get(item[0], 0))
+        if any(getattr(cell.cell_contents, "__name__", None) == name for cell in fragment.__closure__ or ())
+    ]
+    return ids[nth]
+
+@contextmanager
+def fragment_scope(fid):
+    """Makes the next AppTest run a fragment-scoped rerun of `fid`, as the browser requests it."""
+    original = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fid], is_fragment_scoped_rerun=True)
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = original
+
+def measure(page, fragment, prepare, act, rep, scoped):
+    """One interaction on a freshly loaded page: round trips, cached-query lookups, CPU and wall ms."""
+    at = AppTest.from_file(os.path.join(PAGES_DIR, page), default_timeout=120)
+    at.run()
+    if prepare:
+        prepare(at)
+    fid = fragment_id(at, fragment, rep if fragment == "basket_card" else 0)
+    act(at, rep)
+
+    metrics = _metrics()
+    metrics.reset()
+    cpu, wall = time.process_time(), time.perf_counter()
+    if scoped:
+        with fragment_scope(fid):
+            at.run()
+    else:
+        at.run()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    if at.exception:
+        raise RuntimeError(f"{page} ({fragment}): {at.exception[0].message}")
+    queries = metrics.snapshot()["queries"]
+    return {
+        "round_trips": sum(q["calls"] for q in queries),
+        "queries_issued": sum(q["calls"] for q in queries if not q["cache_hits"] and not q["cache_misses"])
+        + sum(q["cache_hits"] + q["cache_misses"] for q in queries),
+        "cpu_ms": cpu * 1000,
+        "wall_ms": wall * 1000,
+    }
+
+def summarize(runs):
+    return {key: round(float(np.median([run[key] for run in runs])), 2) for key in runs[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-interaction cost of full-page against fragment reruns.")
+    parser.add_argument("--items", type=int, default=1_000)
+    parser.add_argument("--recipes", type=int, default=400)
+    parser.add_argument("--ingredients", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    data = generate(args.items, args.recipes, args.ingredients, seed=args.seed)
+    metrics = _metrics()
+    metrics.sample_rate = 1.0
+
+    results = []
+    for page, action, fragment, prepare, act in INTERACTIONS:
+        row = {"page": page, "interaction": action, "fragment": fragment}
+        for mode, scoped in (("full_rerun", False), ("fragment_rerun", True)):
+            # Each mode starts from the same database, so write interactions find the same rows
+            backend = SQLiteBackend()
+            seed_backend(backend, data)
+            use_backend(backend)
+            cold()
+            du.rebuild_menu_requirements()
+            du.rebuild_low_stock_flags()
+            row[mode] = summarize([measure(page, fragment, prepare, act, rep, scoped) for rep in range(args.repeat)])
+        row["cpu_saved_pct"] = round(100 * (1 - row["fragment_rerun"]["cpu_ms"] / row["full_rerun"]["cpu_ms"]), 1)
+        results.append(row)
+    use_backend(None)
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "rows": {table: len(df) for table, df in data.items()},
+        "repeat": args.repeat,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench_search.py
+#
+# Latency of the in-memory name index behind the ingredient / recipe pickers.
+# Run from the repository root:  python benchmarks/bench_search.py [--items 100000]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from search_index import SearchIndex  # noqa: E402
+from bench_suite import git_commit  # noqa: E402
+
+BRANDS = ["Amul", "Tata", "Aashirvaad", "Fortune", "MDH", "Everest", "Patanjali", "Daawat", "India Gate", "Haldiram",
+          "Britannia", "Mother Dairy", "Saffola", "Catch", "Organic Tattva", "24 Mantra", "Nestle", "Del Monte"]
+QUALIFIERS = ["", "Organic", "Fresh", "Frozen", "Red", "Green", "Whole", "Split", "Roasted", "Unpolished", "Premium",
+              "Low Fat", "Baby", "Desi", "Basmati", "Kashmiri", "Cold Pressed", "Instant"]
+FOODS = ["Onion", "Tomato", "Potato", "Rice", "Toor Dal", "Moong Dal", "Urad Dal", "Chana Dal", "Rajma", "Chickpeas",
+         "Paneer", "Butter", "Ghee", "Milk", "Curd", "Cheese", "Wheat Flour", "Besan", "Rava", "Poha", "Sugar", "Salt",
+         "Jaggery", "Turmeric", "Chili Powder", "Coriander Powder", "Cumin Seeds", "Mustard Seeds", "Garam Masala",
+         "Cardamom", "Cloves", "Cinnamon", "Bay Leaves", "Garlic", "Ginger", "Green Chili", "Curry Leaves", "Spinach",
+         "Cauliflower", "Cabbage", "Carrot", "Peas", "Beans", "Capsicum", "Brinjal", "Okra", "Cucumber", "Lemon",
+         "Mango", "Banana", "Apple", "Coconut", "Peanuts", "Cashews", "Almonds", "Raisins", "Oil", "Vinegar", "Bread",
+         "Eggs", "Chicken", "Fish", "Mutton", "Noodles", "Pasta", "Oats", "Cornflakes", "Honey", "Jam", "Ketchup"]
+SIZES = ["", "100g", "200g", "250g", "500g", "1kg", "2kg", "5kg", "500ml", "1L", "6 pcs", "12 pcs"]
+
+def make_catalogue(n_items, seed=42):
+    """Unique, realistic-looking item names ("Tata Organic Toor Dal 1kg")."""
+    rng = np.random.default_rng(seed)
+    names = set()
+    while len(names) < n_items:
+        parts = [rng.choice(BRANDS), rng.choice(QUALIFIERS), rng.choice(FOODS), rng.choice(SIZES)]
+        names.add(" ".join(p for p in parts if p))
+        if len(names) == len(BRANDS) * len(QUALIFIERS) * len(FOODS) * len(SIZES):
+            break
+    return sorted(names)
+
+def percentiles_us(fn, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return {"p50_us": round(float(np.percentile(timings, 50)), 1), "p99_us": round(float(np.percentile(timings, 99)), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Search index latency on a synthetic catalogue.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    names = make_catalogue(args.items)
+    start = time.perf_counter()
+    index = SearchIndex(enumerate(names))
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(7)
+    picked = [names[i] for i in rng.integers(0, len(names), args.queries)]
+    words = [name.split()[-1 if rng.random() < 0.5 else 0] for name in picked]
+    prefixes = [word[:rng.integers(1, len(word) + 1)] for word in words]
+    # One dropped character per query, so there is no exact prefix to lean on
+    typos = []
+    for name in picked:
+        food = next((f for f in FOODS if f in name), name)
+        cut = int(rng.integers(1, len(food)))
+        typos.append(food[:cut] + food[cut + 1:])
+
+    start = time.perf_counter()
+    for i, name in enumerate(picked[:100]):
+        index.add(len(names) + i, name + " Family Pack")
+    add_us = (time.perf_counter() - start) / 100 * 1e6
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "items": len(index),
+        "build_s": round(build_s, 3),
+        "incremental_add_us": round(add_us, 1),
+        "prefix_search": percentiles_us(lambda q: index.search(q, args.k), prefixes),
+        "full_name_search": percentiles_us(lambda q: index.search(q, args.k), picked),
+        "fuzzy_search": percentiles_us(lambda q: index.search(q, args.k), typos),
+        "near_duplicates": percentiles_us(lambda q: index.near_duplicates(q + "s"), picked),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# bench_suite.py
+#
+# Times the data layer and page computations against synthetic catalogues of increasing size.
+# Each size runs on a fresh in-memory SQLite database; results are printed (and optionally
+# written) as JSON so runs from different commits can be diffed.
+# Run from the repository root:
+#   python benchmarks/bench_suite.py [--sizes small,medium,large] [--repeat 5] [--output results.json]
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+from query_cache import get_query_cache  # noqa: E402
+import database_utils as du  # noqa: E402
+from utils import build_week_grid  # noqa: E402
+from planner import plan_week  # noqa: E402
+
+# (stock items, recipes, recipe_ingredients rows)
+SIZES = {
+    "small": (1_000, 400, 10_000),
+    "medium": (10_000, 4_000, 100_000),
+    "large": (50_000, 20_000, 500_000),
+}
+SAVE_SHARE = 0.01  # share of recipes / inventory rows touched by each save benchmark
+
+def timed(fn, repeat, setup=None):
+    """Runs `fn` `repeat` times (after `setup`, untimed) and returns min/median wall-clock ms."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(timings), 3), "median_ms": round(float(np.median(timings)), 3)}
+
+def cold():
+    """Empties the query cache so the next call reads from the database."""
+    get_query_cache().clear()
+
+def read_benchmarks(repeat):
+    menu_df = du.get_menu_plan()
+    dish = menu_df["recipe_name"].iloc[0]
+    item = du.get_inventory()["item_name"].iloc[0]
+    # The synthetic week is fully planned, so the planner benchmark fills an empty one
+    matrix, stock = du._recipe_stock()
+    empty_week = menu_df.iloc[:0]
+    week = sorted(menu_df["meal_date"].unique())
+    return {
+        "get_inventory_cold": timed(du.get_inventory, repeat, setup=cold),
+        "get_inventory_warm": timed(du.get_inventory, repeat),
+        "inventory_page_cold": timed(lambda: du.get_inventory_page(0, 50), repeat, setup=cold),
+        "inventory_page_last_cold": timed(lambda: du.get_inventory_page(10**9, 50), repeat, setup=cold),
+        "inventory_page_search_cold": timed(lambda: du.get_inventory_page(0, 50, search="12", sort="quantity"), repeat, setup=cold),
+        "low_stock_cold": timed(du.get_low_stock_items, repeat, setup=cold),
+        "read_model_build_cold": timed(du.get_read_model, repeat, setup=cold),
+        "recipes_warm": timed(du.get_recipes, repeat),
+        "recipe_details_warm": timed(lambda: du.get_recipe_details(int(menu_df["recipe_id"].iloc[0])), repeat),
+        "check_dish_status_cold": timed(lambda: du.check_dish_status(dish, 2), repeat, setup=cold),
+        "check_dish_status_warm": timed(lambda: du.check_dish_status(dish, 2), repeat),
+        "check_menu_status_cold": timed(lambda: du.check_menu_status(du.get_menu_plan()), repeat, setup=cold),
+        "check_menu_status_warm": timed(lambda: du.check_menu_status(du.get_menu_plan()), repeat),
+        "basket_2_days_cold": timed(lambda: du.get_basket_items(2), repeat, setup=cold),
+        "basket_7_days_warm": timed(lambda: du.get_basket_items(7), repeat),
+        "basket_90_days_warm": timed(lambda: du.get_basket_items(90), repeat),
+        "menu_timetable_pivot": timed(lambda: build_week_grid(menu_df), repeat),
+        "cookable_recipes_cold": timed(lambda: du.get_cookable_recipes(2, limit=10), repeat, setup=cold),
+        "cookable_recipes_warm": timed(lambda: du.get_cookable_recipes(2, limit=10), repeat),
+        "recipes_using_warm": timed(lambda: du.get_recipes_using([item], 2, limit=10), repeat),
+        "plan_empty_week_warm": timed(lambda: plan_week(matrix, stock.copy(), empty_week, week, persons=2, seed=1), repeat),
+    }
+
+def save_benchmarks(data, repeat, rng):
+    """Times the write paths on a share of the catalogue, re-randomizing quantities every run."""
+    recipes = data["recipes"].sample(frac=SAVE_SHARE, random_state=1)
+    ingredients = data["recipe_ingredients"].merge(data["stock_items"][["item_id", "item_name"]], on="item_id")
+    by_recipe = dict(tuple(ingredients[ingredients["recipe_id"].isin(recipes["recipe_id"])].groupby("recipe_id")))
+
+    def save_recipes():
+        batch = []
+        for recipe_id, name in zip(recipes["recipe_id"], recipes["recipe_name"]):
+            df = by_recipe.get(recipe_id, ingredients.iloc[:0])[["item_id", "item_name", "quantity_per_person", "unit"]].copy()
+            # Change about a third of the rows so the diff has real work to do
+            changed = rng.random(len(df)) < 0.3
+            df.loc[changed, "quantity_per_person"] = np.round(rng.uniform(5, 300, changed.sum()), 2)
+            batch.append((int(recipe_id), name, df))
+        du.save_recipes(batch)
+
+    inventory = data["inventory"].sample(frac=SAVE_SHARE, random_state=2)
+
+    def apply_inventory_changes():
+        updates = dict(zip(inventory["inventory_id"], np.round(rng.uniform(0, 5, len(inventory)), 2)))
+        du.apply_inventory_changes(updates=updates)
+
+    slot = data["menu_plan"].iloc[0]
+    recipe_ids = data["recipes"]["recipe_id"].to_numpy()
+
+    return {
+        "save_recipes": dict(timed(save_recipes, repeat), recipes=len(recipes)),
+        "apply_inventory_changes": dict(timed(apply_inventory_changes, repeat), rows=len(inventory)),
+        "set_menu_slot": timed(lambda: du.set_menu_slot(slot["meal_date"], slot["meal_time"], rng.choice(recipe_ids), 4), repeat),
+    }
+
+def run_size(name, n_items, n_recipes, n_ingredients, repeat, seed):
+    data = generate(n_items, n_recipes, n_ingredients, seed=seed)
+    backend = SQLiteBackend()
+    start = time.perf_counter()
+    seed_backend(backend, data)
+    use_backend(backend)
+    cold()
+    du.rebuild_menu_requirements()
+    du.rebuild_low_stock_flags()
+    seed_s = time.perf_counter() - start
+
+    return {
+        "size": name,
+        "rows": {table: len(df) for table, df in data.items()},
+        "seed_s": round(seed_s, 3),
+        "reads": read_benchmarks(repeat),
+        "read_model_mb": round(du.get_read_model().nbytes() / 2**20, 2),
+        "saves": save_benchmarks(data, repeat, np.random.default_rng(seed)),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Data layer benchmarks over synthetic catalogues.")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated presets: {', '.join(SIZES)}.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": args.repeat,
+        "results": [run_size(name, *SIZES[name], args.repeat, args.seed) for name in args.sizes.split(",")],
+    }
+    use_backend(None)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+if __name__ == "__main__":
+    main()
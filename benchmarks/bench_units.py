@@ -0,0 +1,100 @@
+# bench_units.py
+#
+# Measures what unit normalization costs inside the basket computation.
+# Run from the repository root:  python benchmarks/bench_units.py [--rows 100000]
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from database_utils import compute_basket  # noqa: E402
+from units import to_base_units  # noqa: E402
+
+UNITS = np.array(["kg", "g", "L", "ml", "pcs"], dtype=object)
+SAME_DIMENSION = {"kg": "g", "g": "kg", "L": "ml", "ml": "L", "pcs": "pcs"}
+
+def make_workload(rows, n_items=5000, ingredients_per_recipe=20, cross_share=0.1, seed=42):
+    """Builds menu/recipe/inventory frames whose basket merge yields `rows` ingredient rows."""
+    rng = np.random.default_rng(seed)
+    n_recipes = max(1, rows // ingredients_per_recipe)
+    item_names = np.array([f"item_{i}" for i in range(n_items)], dtype=object)
+    item_base = UNITS[rng.integers(0, len(UNITS), n_items)]
+    density = rng.uniform(0.5, 1.5, n_items)
+    piece_weight = rng.uniform(5, 500, n_items)
+
+    item_idx = rng.integers(0, n_items, n_recipes * ingredients_per_recipe)
+    # Most recipes quote an ingredient in its own dimension (kg item -> g); ~10% cross dimensions
+    same_dimension = np.vectorize(SAME_DIMENSION.get)(item_base[item_idx])
+    recipe_units = np.where(
+        rng.random(len(item_idx)) < cross_share,
+        UNITS[rng.integers(0, len(UNITS), len(item_idx))],
+        same_dimension
+    ).astype(object)
+    recipes_df = pd.DataFrame({
+        "recipe_name": np.repeat([f"recipe_{r}" for r in range(n_recipes)], ingredients_per_recipe),
+        "item_name": item_names[item_idx],
+        "quantity_per_person": rng.uniform(0.01, 0.5, len(item_idx)),
+        "unit": recipe_units,
+        "base_unit": item_base[item_idx],
+        "density_g_per_ml": density[item_idx],
+        "piece_weight_g": piece_weight[item_idx],
+    })
+    menu_df = pd.DataFrame({
+        "meal_date": datetime.date.today(),
+        "meal_time": "Lunch",
+        "recipe_name": [f"recipe_{r}" for r in range(n_recipes)],
+        "num_persons": rng.integers(1, 6, n_recipes),
+    })
+    inventory_df = pd.DataFrame({
+        "inventory_id": np.arange(n_items),
+        "item_name": item_names,
+        "quantity": rng.uniform(0, 5, n_items),
+        "unit": item_base,
+        "base_unit": item_base,
+        "density_g_per_ml": density,
+        "piece_weight_g": piece_weight,
+    })
+    return menu_df, recipes_df, inventory_df
+
+def best_of(fn, repeat):
+    """Returns the fastest wall-clock time of `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    menu_df, recipes_df, inventory_df = make_workload(args.rows)
+    needed = menu_df.merge(recipes_df, on="recipe_name")
+
+    normalize_ms = best_of(lambda: to_base_units(
+        needed["quantity_per_person"].to_numpy(), needed["unit"], needed["base_unit"],
+        density=needed["density_g_per_ml"], piece_weight=needed["piece_weight_g"]
+    ), args.repeat)
+    basket_ms = best_of(lambda: compute_basket(menu_df, recipes_df, inventory_df, [datetime.date.today()]), args.repeat)
+
+    print(json.dumps({
+        "benchmark": "unit_normalization",
+        "ingredient_rows": len(needed),
+        "normalize_ms": round(normalize_ms, 3),
+        "basket_total_ms": round(basket_ms, 3),
+        "normalize_share": round(normalize_ms / basket_ms, 4),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench_write_queue.py
+#
+# Bursty concurrent stock writes, made directly against made through write_queue. `--sessions`
+# threads each click "Add to Stocks" `--clicks` times on a few hot items (the basket page), then
+# each reads a row and saves a new quantity for it (the stock grid). Reported per mode: wall time,
+# transactions committed, and whether stock ends up where the clicks and edits say it should:
+# direct absolute saves silently lose the edits overwritten by a later one; queued saves apply
+# deltas and report the edits made against a stale row as conflicts.
+# Uses a file-backed SQLite database; run from the repository root:
+#   python benchmarks/bench_write_queue.py [--sessions 8] [--clicks 25] [--hot-items 5]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from synthetic import generate, seed_backend  # noqa: E402
+from bench_suite import git_commit, cold  # noqa: E402
+from db_connector import SQLiteBackend, use_backend  # noqa: E402
+import database_utils as du  # noqa: E402
+from write_queue import WriteQueue  # noqa: E402
+
+CLICK_QUANTITY = 0.5
+EDIT_QUANTITY = 1.0
+
+def stock_of(names):
+    inventory = du.get_inventory().set_index("item_name")
+    return {name: float(inventory.at[name, "quantity"]) for name in names}
+
+def direct_session(session, hot, clicks):
+    for click in range(clicks):
+        name, unit = hot[(session + click) % len(hot)]
+        du.upsert_inventory_item(name, CLICK_QUANTITY, unit)
+    # Read a row, then save the quantity read plus this session's edit as the new absolute quantity
+    page = du.get_inventory_page(0, 50)[0]
+    row = page[page["item_name"] == hot[session % len(hot)][0]].iloc[0]
+    du.update_inventory_quantity(int(row["inventory_id"]), float(row["quantity"]) + EDIT_QUANTITY)
+    return 1
+
+def queued_session(queue, session, hot, clicks):
+    household = du.DEFAULT_HOUSEHOLD
+    futures = []
+    for click in range(clicks):
+        name, unit = hot[(session + click) % len(hot)]
+        futures.append(queue.submit(dict(household_id=household, item_name=name, quantity=CLICK_QUANTITY, unit=unit, note="Prep basket"), session))
+    wait(futures)
+    page = du.get_inventory_page(0, 50)[0]
+    row = page[page["item_name"] == hot[session % len(hot)][0]].iloc[0]
+    outcome = queue.submit(dict(
+        household_id=household, inventory_id=int(row["inventory_id"]), quantity=EDIT_QUANTITY, row_version=int(row["row_version"]), note="Stock grid"
+    ), session).result()
+    return int(outcome["status"] == "applied")
+
+def run_mode(backend, mode, hot, sessions, clicks):
+    names = [name for name, _ in hot]
+    before = stock_of(names)
+    commits = {"n": 0}
+    listener = lambda *_: commits.__setitem__("n", commits["n"] + 1)  # noqa: E731
+    event.listen(backend.engine, "commit", listener)
+    queue = WriteQueue()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        if mode == "direct":
+            futures = [pool.submit(direct_session, session, hot, clicks) for session in range(sessions)]
+        else:
+            futures = [pool.submit(queued_session, queue, session, hot, clicks) for session in range(sessions)]
+        results = [future.result() for future in futures]
+    wall_ms = (time.perf_counter() - start) * 1000
+    event.remove(backend.engine, "commit", listener)
+    cold()
+    after = stock_of(names)
+
+    applied_edits = sum(results)
+    expected = sessions * clicks * CLICK_QUANTITY + applied_edits * EDIT_QUANTITY
+    gained = sum(after.values()) - sum(before.values())
+    return {
+        "mode": mode,
+        "wall_ms": round(wall_ms, 1),
+        "commits": commits["n"],
+        "clicks": sessions * clicks,
+        "edits_reported_saved": applied_edits,
+        "edits_reported_conflict": sessions - applied_edits,
+        "stock_gained": round(gained, 3),
+        "stock_expected": round(expected, 3),
+        "lost_quantity": round(expected - gained, 3),
+        **({"queue": dict(queue.stats)} if mode == "queued" else {}),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct against queued concurrent stock writes.")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--clicks", type=int, default=25)
+    parser.add_argument("--hot-items", type=int, default=5)
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = generate(args.items, 200, 2_000, stocked_share=1.0, seed=args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SQLiteBackend(os.path.join(tmp, "bench.db"))
+        seed_backend(backend, data)
+        use_backend(backend)
+        inventory = du.get_inventory()
+        hot = list(inventory[["item_name", "unit"]].head(args.hot_items).itertuples(index=False, name=None))
+        for mode in ("direct", "queued"):
+            results.append(run_mode(backend, mode, hot, args.sessions, args.clicks))
+        use_backend(None)
+        backend.engine.dispose()
+
+    print(json.dumps({
+        "commit": git_commit(),
+        "sessions": args.sessions,
+        "clicks_per_session": args.clicks,
+        "hot_items": args.hot_items,
+        "results": results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
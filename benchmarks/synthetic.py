@@ -0,0 +1,168 @@
+# synthetic.py
+#
+# Seeded synthetic catalogue for benchmarks and local SQLite databases.
+# Seed a SQLite file to run the app against:
+#   python benchmarks/synthetic.py --sqlite inmyfridge.db --items 50000 --recipes 20000 --ingredients 500000
+#   INMYFRIDGE_BACKEND=sqlite INMYFRIDGE_SQLITE_PATH=inmyfridge.db streamlit run inMyFridge/streamlit_app.py
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inMyFridge"))
+
+from forecast import DAYS, MEALS, week_start, plan_dates  # noqa: E402
+
+UNITS = np.array(["kg", "g", "L", "ml", "pcs"], dtype=object)
+# Recipes usually quote an ingredient in a unit of its own dimension (a kg item in g, an L item in ml)
+RECIPE_UNIT = {"kg": "g", "g": "g", "L": "ml", "ml": "ml", "pcs": "pcs"}
+INSERT_CHUNK = 50_000
+
+def week_dates():
+    """This week's dates (Monday to Sunday) as ISO strings, the days the synthetic plans fill."""
+    return [day.isoformat() for day in plan_dates(week_start(), len(DAYS))]
+
+def generate(n_items, n_recipes, n_ingredients, stocked_share=0.8, persons=(1, 6), seed=42):
+    """Builds the tables of a synthetic catalogue as DataFrames keyed by table name.
+
+    Ids are assigned here (1-based) so the frames can be inserted as-is. Every recipe gets
+    about `n_ingredients / n_recipes` distinct ingredients and every slot of this week is planned.
+    """
+    rng = np.random.default_rng(seed)
+    base_unit = UNITS[rng.integers(0, len(UNITS), n_items)]
+    stock_items = pd.DataFrame({
+        "item_id": np.arange(1, n_items + 1),
+        "item_name": [f"item_{i:06d}" for i in range(n_items)],
+        "base_unit": base_unit,
+        "density_g_per_ml": np.round(rng.uniform(0.5, 1.5, n_items), 4),
+        "piece_weight_g": np.round(rng.uniform(5, 500, n_items), 2),
+    })
+
+    stocked = np.flatnonzero(rng.random(n_items) < stocked_share)
+    inventory = pd.DataFrame({
+        "inventory_id": np.arange(1, len(stocked) + 1),
+        "item_id": stocked + 1,
+        "quantity": np.round(rng.uniform(0, 5, len(stocked)), 2),
+        "unit": base_unit[stocked],
+    })
+
+    recipes = pd.DataFrame({
+        "recipe_id": np.arange(1, n_recipes + 1),
+        "recipe_name": [f"recipe_{r:06d}" for r in range(n_recipes)],
+    })
+
+    # Sample with replacement, then drop repeats of the same item within a recipe
+    ingredients = pd.DataFrame({
+        "recipe_id": rng.integers(1, n_recipes + 1, n_ingredients),
+        "item_id": rng.integers(1, n_items + 1, n_ingredients),
+    }).drop_duplicates(["recipe_id", "item_id"]).sort_values(["recipe_id", "item_id"], ignore_index=True)
+    recipe_unit = np.array([RECIPE_UNIT[u] for u in base_unit[ingredients["item_id"].to_numpy() - 1]], dtype=object)
+    # 5-300 g/ml per person, or 1-3 pieces
+    ingredients["quantity_per_person"] = np.where(
+        recipe_unit == "pcs", rng.integers(1, 4, len(ingredients)), np.round(rng.uniform(5, 300, len(ingredients)), 2)
+    )
+    ingredients["unit"] = recipe_unit
+
+    n_slots = len(DAYS) * len(MEALS)
+    menu_plan = pd.DataFrame({
+        "plan_id": np.arange(1, n_slots + 1),
+        "recipe_id": rng.integers(1, n_recipes + 1, n_slots),
+        "meal_date": np.repeat(week_dates(), len(MEALS)),
+        "meal_time": np.tile(MEALS, len(DAYS)),
+        "num_persons": rng.integers(persons[0], persons[1] + 1, n_slots),
+    })
+
+    return {
+        "stock_items": stock_items,
+        "inventory": inventory,
+        "recipes": recipes,
+        "recipe_ingredients": ingredients,
+        "menu_plan": menu_plan,
+    }
+
+def generate_households(n_households, n_items=2_000, n_recipes=500, ingredients_per_recipe=8, stocked_per_household=40, seed=42):
+    """Builds a shared catalogue plus `n_households` kitchens, each with its own inventory and full plan for this week.
+
+    Household 1 already exists in a fresh schema, so only households 2..n are generated.
+    """
+    data = generate(n_items, n_recipes, n_recipes * ingredients_per_recipe, stocked_share=0, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    household_ids = np.arange(1, n_households + 1)
+
+    households = pd.DataFrame({
+        "household_id": household_ids[1:],
+        "household_name": [f"household_{h:06d}" for h in household_ids[1:]],
+    })
+
+    # Distinct items per household: a random offset plus a stride that stays inside the catalogue
+    offsets = rng.integers(0, n_items, n_households)
+    picks = (offsets[:, None] + np.arange(stocked_per_household) * (n_items // stocked_per_household)) % n_items
+    item_ids = picks.ravel() + 1
+    base_unit = data["stock_items"]["base_unit"].to_numpy()
+    inventory = pd.DataFrame({
+        "household_id": np.repeat(household_ids, stocked_per_household),
+        "item_id": item_ids,
+        "quantity": np.round(rng.uniform(0, 5, len(item_ids)), 2),
+        "unit": base_unit[item_ids - 1],
+    })
+
+    n_slots = len(DAYS) * len(MEALS)
+    menu_plan = pd.DataFrame({
+        "household_id": np.repeat(household_ids, n_slots),
+        "recipe_id": rng.integers(1, n_recipes + 1, n_households * n_slots),
+        "meal_date": np.tile(np.repeat(week_dates(), len(MEALS)), n_households),
+        "meal_time": np.tile(MEALS, len(DAYS) * n_households),
+        "num_persons": rng.integers(1, 7, n_households * n_slots),
+    })
+
+    return {
+        "households": households,
+        "stock_items": data["stock_items"],
+        "recipes": data["recipes"],
+        "recipe_ingredients": data["recipe_ingredients"],
+        "inventory": inventory,
+        "menu_plan": menu_plan,
+    }
+
+def _records(df):
+    """Rows as dicts of plain Python scalars (DB-API drivers reject NumPy types)."""
+    return df.astype(object).to_dict("records")
+
+def seed_backend(backend, data):
+    """Bulk-loads `generate()` output into an empty database, in chunked executemany batches."""
+    with backend.session as s:
+        for table, df in data.items():
+            columns = list(df.columns)
+            statement = text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)});")
+            for start in range(0, len(df), INSERT_CHUNK):
+                s.execute(statement, _records(df.iloc[start:start + INSERT_CHUNK]))
+        s.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Seeds a SQLite database with a synthetic catalogue.")
+    parser.add_argument("--sqlite", required=True, help="Database file to create (must not already hold data).")
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--recipes", type=int, default=20_000)
+    parser.add_argument("--ingredients", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from db_connector import SQLiteBackend
+
+    start = time.perf_counter()
+    data = generate(args.items, args.recipes, args.ingredients, seed=args.seed)
+    seed_backend(SQLiteBackend(args.sqlite), data)
+    print(json.dumps({
+        "sqlite": args.sqlite,
+        "rows": {table: len(df) for table, df in data.items()},
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
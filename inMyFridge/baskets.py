@@ -1,92 +1,84 @@
 # baskets.py
 
 import streamlit as st
-import datetime
-import pandas as pd
-from database_utils import (
-    get_menu_plan, 
-    get_inventory, 
-    get_all_recipe_ingredients, 
-    upsert_inventory_item
-)
+from concurrent.futures import wait
+from database_utils import get_basket_items
+from instrumentation import page_fragment
+from utils import rerun_fragment, track_queued_write, report_queued_writes
+from write_queue import queue_purchase
+
+# Seconds "Add All" waits for its purchases to be written
+ADD_ALL_TIMEOUT = 10
 
 st.set_page_config(page_title="Prep Basket", layout="wide")
 st.title("🧺 Prep Basket")
-st.markdown("Here's what you need to buy for meals planned for **today and tomorrow**.")
-
-# --- DATA FETCHING ---
-menu_df = get_menu_plan()
-inventory_df = get_inventory()
-recipes_df = get_all_recipe_ingredients()
-
-def get_basket_items():
-    """Calculates the shopping list based on the next 48 hours of meals."""
-    
-    # 1. Identify relevant meals
-    today = datetime.datetime.now().strftime('%A')
-    tomorrow = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%A')
-    upcoming_meals_df = menu_df[menu_df['meal_day'].isin([today, tomorrow])]
-
-    if upcoming_meals_df.empty:
-        return pd.DataFrame()
+horizon_days = st.slider("Planning horizon (days)", min_value=1, max_value=90, value=2)
+st.markdown(f"Here's what you need to buy for meals planned over the **next {horizon_days} day(s)**.")
+report_queued_writes()
 
-    # 2. Merge to get required ingredients
-    needed_df = pd.merge(upcoming_meals_df, recipes_df, on='recipe_name')
-    needed_df['total_required'] = needed_df['num_persons'] * needed_df['quantity_per_person']
-    
-    # 3. Aggregate total requirements
-    required_agg = needed_df.groupby('item_name').agg(
-        total_required=('total_required', 'sum'),
-        unit=('unit', 'first'), # Assuming unit is consistent for an ingredient
-        dishes=('recipe_name', lambda x: list(set(x)))
-    ).reset_index()
-
-    # 4. Merge with current inventory to find shortfall
-    comparison_df = pd.merge(
-        required_agg, 
-        inventory_df[['item_name', 'quantity']], 
-        on='item_name', 
-        how='left'
-    ).fillna(0)
-    
-    comparison_df['shortfall'] = comparison_df['total_required'] - comparison_df['quantity']
-    
-    # 5. Filter for items you need to buy
-    basket_df = comparison_df[comparison_df['shortfall'] > 0].copy()
-    
-    return basket_df
-
-def add_to_stock_callback(item_name, quantity, unit):
-    """Callback function to add a purchased item to the inventory."""
+def add_all_to_stock_callback(horizon_days):
+    """Callback queueing the whole shopping list as purchases, waiting for them to be written."""
     try:
-        upsert_inventory_item(item_name, quantity, unit)
-        st.toast(f"Added {quantity:.2f} {unit} of {item_name} to your stock!")
+        # Read again rather than taken from the last full run: cards may have been added since
+        basket = get_basket_items(horizon_days)
+        futures = [
+            queue_purchase(row['item_name'], row['shortfall'], row['unit'], note="Prep basket")
+            for row in basket.to_dict('records')
+        ]
+        done, pending = wait(futures, timeout=ADD_ALL_TIMEOUT)
+        for future in done:
+            future.result()
+        if pending:
+            st.warning(f"{len(pending)} item(s) are still being saved.")
+        st.toast(f"Added {len(done)} item(s) to your stock!")
     except Exception as e:
         st.error(f"Failed to update stock: {e}")
 
+# Purchases added from a card, by (item, quantity): a card reruns on its own when clicked, so the
+# rest of the list isn't recomputed until the page next reruns
+st.session_state.setdefault('basket_added', set())
+
+@page_fragment("Baskets")
+def basket_card(row):
+    with st.container(border=True):
+        col1, col2 = st.columns([0.7, 0.3])
+        
+        with col1:
+            st.markdown(f"#### {row['item_name']}")
+            st.markdown(f"**Need to buy:** `{row['shortfall']:.2f} {row['unit']}`")
+            st.caption(
+                f"Runs out on {row['runs_out_on']:%A %d %b} ({row['runs_out_meal']}), "
+                f"needs {row['needed_by_then']:.2f} {row['unit']} by then · "
+                f"Required for: {', '.join(row['dishes'])}"
+            )
+        
+        with col2:
+            if (row['item_name'], row['shortfall']) in st.session_state.basket_added:
+                st.success("✓ In stock")
+            elif st.button("✓ Add to Stocks", key=f"add_{row['item_name']}", use_container_width=True):
+                # Written with the other clicks of the next moment; a failure is reported on a later rerun
+                future = queue_purchase(row['item_name'], row['shortfall'], row['unit'], note="Prep basket")
+                track_queued_write(future, f"{row['item_name']} ({row['shortfall']:.2f} {row['unit']})")
+                st.session_state.basket_added.add((row['item_name'], row['shortfall']))
+                st.toast(f"Added {row['shortfall']:.2f} {row['unit']} of {row['item_name']} to your stock!")
+                rerun_fragment()
+
 # --- UI DISPLAY ---
-basket = get_basket_items()
+basket = get_basket_items(horizon_days)
 
 st.markdown("---")
 
 if basket.empty:
-    st.success("✅ You're all set! You have all the ingredients for the next two days.")
+    st.success(f"✅ You're all set! You have all the ingredients for the next {horizon_days} day(s).")
 else:
     st.subheader("Your Shopping List")
-    for index, row in basket.iterrows():
-        with st.container(border=True):
-            col1, col2 = st.columns([0.7, 0.3])
-            
-            with col1:
-                st.markdown(f"#### {row['item_name']}")
-                st.markdown(f"**Need to buy:** `{row['shortfall']:.2f} {row['unit']}`")
-                st.caption(f"Required for: {', '.join(row['dishes'])}")
-            
-            with col2:
-                st.button(
-                    "✓ Add to Stocks",
-                    key=f"add_{row['item_name']}",
-                    on_click=add_to_stock_callback,
-                    args=(row['item_name'], row['shortfall'], row['unit']),
-                    use_container_width=True
-                )
\ No newline at end of file
+    st.button(
+        f"✓ Add All {len(basket)} to Stocks",
+        key="add_all",
+        on_click=add_all_to_stock_callback,
+        args=(horizon_days,),
+        type="primary",
+        use_container_width=True
+    )
+    for row in basket.to_dict('records'):
+        basket_card(row)
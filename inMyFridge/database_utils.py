@@ -1,213 +1,1681 @@
 # database_utils.py
 
+import datetime
+import time
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 from db_connector import get_db_connection
-from sqlalchemy import text
+from query_cache import cached_query, cached_value, invalidate_tables
+from units import (
+    to_base_units, from_base_units, UNIT_FACTOR, UNIT_DIMENSION, GRAMS, MILLILITRES, PIECES, DENSITY_COLUMN, PIECE_WEIGHT_COLUMN
+)
+from forecast import forecast_depletion, week_start, plan_dates, DAYS, MEALS
+from search_index import SearchIndex
+from read_model import get_read_model, SHARED
+from planner import plan_week, NO_REPEAT_DAYS
+from loader import load_datasets
+from sqlalchemy import text, bindparam, event as sa_event
 
 # -----------------------------------------------------------------------------
-# --- STOCK / INVENTORY FUNCTIONS ---
+# --- HOUSEHOLDS ---
 # -----------------------------------------------------------------------------
 
-def get_inventory():
-    """Fetches the current inventory, joining with stock_items to get names."""
+DEFAULT_HOUSEHOLD = 1
+
+def current_household(household_id=None):
+    """The household a call is scoped to: `household_id` if given, else the session's, else the default kitchen."""
+    if household_id is not None:
+        return int(household_id)
+    try:
+        return int(st.session_state.get('household_id', DEFAULT_HOUSEHOLD))
+    except Exception:
+        # No Streamlit session behind this call (CLI tools, benchmarks)
+        return DEFAULT_HOUSEHOLD
+
+def _visible_recipes(alias='r'):
+    """SQL condition for recipes a household can see: its own plus the shared ones."""
+    return f"({alias}.household_id = :household OR {alias}.household_id IS NULL)"
+
+def get_households():
+    """Fetches every household (kitchen)."""
+    return cached_query('SELECT household_id, household_name FROM households ORDER BY household_id;', tables=('households',), ttl=60)
+
+def create_household(name):
+    """Creates a household (or finds the one with this name) and returns its id."""
     conn = get_db_connection()
-    # Cache the result for 10 seconds to reduce DB calls on quick reloads
-    return conn.query("""
-        SELECT i.inventory_id, si.item_name, i.quantity, i.unit, i.last_updated
+    with conn.session as s:
+        s.execute(text(conn.insert_ignore('households', ['household_name'])), params={'household_name': name})
+        household_id = s.execute(
+            text('SELECT household_id FROM households WHERE household_name = :name;'), params={'name': name}
+        ).scalar_one()
+        s.commit()
+    invalidate_tables('households')
+    return household_id
+
+# -----------------------------------------------------------------------------
+# --- STOCK / INVENTORY FUNCTIONS ---
+# -----------------------------------------------------------------------------
+
+def _current_quantity_sql(alias):
+    """SQL for an inventory row's current quantity: its snapshot plus the ledger events not folded in yet."""
+    return (
+        f"({alias}.quantity + COALESCE((SELECT SUM(l.quantity) FROM inventory_ledger l "
+        f"WHERE l.household_id = {alias}.household_id AND l.item_id = {alias}.item_id "
+        f"AND l.ledger_id > {alias}.ledger_seq), 0))"
+    )
+
+CURRENT_QUANTITY_SQL = _current_quantity_sql('i')
+
+def get_inventory(household_id=None):
+    """Fetches the household's current inventory, joining with stock_items to get names."""
+    household_id = current_household(household_id)
+    # Cached until inventory or stock_items change (ttl guards against edits made outside the app);
+    # every ledger write also touches its inventory rows, so the inventory version covers the events
+    return cached_query(f"""
+        SELECT i.inventory_id, si.item_name, {CURRENT_QUANTITY_SQL} AS quantity, i.unit, i.last_updated, i.reorder_point, i.is_low,
+               si.base_unit, si.density_g_per_ml, si.piece_weight_g
         FROM inventory i
         JOIN stock_items si ON i.item_id = si.item_id
+        WHERE i.household_id = :household
         ORDER BY si.item_name;
-    """, ttl=10)
+    """, tables=('inventory', 'stock_items'), params={'household': household_id}, ttl=10, household_id=household_id)
+
+# Sortable columns of the paged inventory grid (whitelisted: they are spliced into ORDER BY)
+INVENTORY_SORT_COLUMNS = {'item_name': 'si.item_name', 'quantity': CURRENT_QUANTITY_SQL, 'unit': 'i.unit', 'last_updated': 'i.last_updated'}
 
-def update_inventory_quantity(inventory_id, new_quantity):
+def get_inventory_page(page=0, page_size=50, search="", sort='item_name', descending=False, household_id=None):
+    """Fetches one page of the household's inventory, filtered by name and sorted in the database.
+
+    Only `page_size` rows cross the wire (LIMIT/OFFSET, with inventory_id as a tie-breaker so pages
+    are stable). Returns `(page_df, total_rows)` where total_rows counts every row matching `search`.
+    """
+    household_id = current_household(household_id)
+    # '!' escapes LIKE wildcards typed into the search box (a backslash would need per-dialect quoting)
+    escaped = search.strip().replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    params = {'household': household_id, 'pattern': f"%{escaped}%"}
+    tables = ('inventory', 'stock_items')
+
+    if escaped:
+        total = cached_query("""
+            SELECT COUNT(*) AS total_rows
+            FROM inventory i
+            JOIN stock_items si ON i.item_id = si.item_id
+            WHERE i.household_id = :household AND si.item_name LIKE :pattern ESCAPE '!';
+        """, tables=tables, params=params, ttl=10, household_id=household_id)['total_rows'].iloc[0]
+    else:
+        total = cached_query(
+            'SELECT COUNT(*) AS total_rows FROM inventory i WHERE i.household_id = :household;',
+            tables=('inventory',), params={'household': household_id}, ttl=10, household_id=household_id
+        )['total_rows'].iloc[0]
+
+    if sort == 'item_name' and total * 4 >= get_stock_item_count():
+        # A household stocking much of the catalogue pages faster by walking the name index and stopping
+        # after one page than by sorting all its rows; CROSS JOIN keeps SQLite from reordering the join
+        source = 'stock_items si CROSS JOIN inventory i ON i.item_id = si.item_id AND i.household_id = :household'
+    else:
+        source = 'inventory i JOIN stock_items si ON i.item_id = si.item_id AND i.household_id = :household'
+    order = f"{INVENTORY_SORT_COLUMNS[sort]} {'DESC' if descending else 'ASC'}, i.inventory_id"
+    page_df = cached_query(f"""
+        SELECT i.inventory_id, si.item_name, {CURRENT_QUANTITY_SQL} AS quantity, i.unit, i.reorder_point, i.is_low, i.last_updated, i.row_version
+        FROM {source}
+        WHERE si.item_name LIKE :pattern ESCAPE '!'
+        ORDER BY {order}
+        LIMIT :limit OFFSET :offset;
+    """, tables=tables, params=dict(params, limit=int(page_size), offset=int(page) * int(page_size)),
+        ttl=10, household_id=household_id)
+    return page_df, int(total)
+
+def get_stock_item_count():
+    """Size of the shared item catalogue."""
+    return int(cached_query('SELECT COUNT(*) AS items FROM stock_items;', tables=('stock_items',), ttl=60)['items'].iloc[0])
+
+def apply_inventory_changes(updates=None, deletes=None, inserts=None, household_id=None):
+    """Applies a batch of inventory updates, deletes and inserts in a single transaction.
+
+    `updates` maps inventory_id -> new quantity, `deletes` lists inventory_ids and `inserts` is a
+    list of dicts with `item_name`, `quantity`, `unit` and optionally `expires_on`. Statements are batched (executemany /
+    multi-row) and the cache is invalidated once. Rows of other households count as not found.
+    Returns a DataFrame with one outcome per row.
+    """
+    household_id = current_household(household_id)
+    updates = {int(inv_id): float(qty) for inv_id, qty in dict(updates or {}).items()}
+    deletes = sorted({int(inv_id) for inv_id in (deletes or [])})
+    inserts = list(inserts or [])
+    outcomes = []
+
+    conn = get_db_connection()
+    with conn.session as s:
+        # Which of the referenced rows still exist (another session may have deleted them)
+        referenced = sorted(set(updates) | set(deletes))
+        existing = set()
+        if referenced:
+            result = s.execute(
+                text('SELECT inventory_id FROM inventory WHERE household_id = :household AND inventory_id IN :ids;').bindparams(
+                    bindparam('ids', expanding=True)
+                ),
+                params={'household': household_id, 'ids': referenced}
+            )
+            existing = {row[0] for row in result}
+
+        # A new quantity is recorded as an adjustment event by the difference to current stock
+        to_update = [
+            dict(inventory_id=inv_id, event='adjustment', quantity=qty)
+            for inv_id, qty in updates.items() if inv_id in existing and inv_id not in deletes
+        ]
+        if to_update:
+            _insert_ledger_events(s, household_id, to_update, absolute=True)
+            _refresh_low_stock(s, 'inventory_id IN :ids', {'ids': [row['inventory_id'] for row in to_update]}, touch=True)
+        for inv_id in updates:
+            status = 'updated' if inv_id in existing and inv_id not in deletes else 'not_found'
+            outcomes.append(dict(op='update', inventory_id=inv_id, item_name=None, status=status))
+
+        to_delete = [inv_id for inv_id in deletes if inv_id in existing]
+        if to_delete:
+            s.execute(
+                text('DELETE FROM inventory WHERE inventory_id IN :ids;').bindparams(bindparam('ids', expanding=True)),
+                params={'ids': to_delete}
+            )
+        for inv_id in deletes:
+            outcomes.append(dict(op='delete', inventory_id=inv_id, item_name=None, status='deleted' if inv_id in existing else 'not_found'))
+
+        new_items = 0
+        if inserts:
+            result = s.execute(
+                text(conn.insert_ignore('stock_items', ['item_name', 'base_unit'])),
+                [dict(item_name=row['item_name'], base_unit=row['unit']) for row in inserts]
+            )
+            new_items = result.rowcount
+            names = sorted({row['item_name'] for row in inserts})
+            result = s.execute(
+                text("""
+                    SELECT si.item_name, si.item_id, i.inventory_id
+                    FROM stock_items si
+                    LEFT JOIN inventory i ON i.item_id = si.item_id AND i.household_id = :household
+                    WHERE si.item_name IN :names;
+                """).bindparams(bindparam('names', expanding=True)),
+                params={'household': household_id, 'names': names}
+            )
+            # Item names compare case-insensitively, so "onion" resolves to an existing "Onion"
+            item_rows = {name.casefold(): (item_id, inv_id, name) for name, item_id, inv_id in result}
+
+            to_insert, seen = [], set()
+            for row in inserts:
+                item_id, inv_id, _ = item_rows[row['item_name'].casefold()]
+                if inv_id is not None or item_id in seen:
+                    # Insert-or-ignore semantics: an existing inventory row is left alone
+                    outcomes.append(dict(op='insert', inventory_id=inv_id, item_name=row['item_name'], status='exists'))
+                    continue
+                seen.add(item_id)
+                to_insert.append(dict(
+                    household=household_id, id=item_id, qty=float(row['quantity']), unit=row['unit'], expires_on=row.get('expires_on')
+                ))
+                outcomes.append(dict(op='insert', inventory_id=None, item_name=row['item_name'], status='inserted'))
+            if to_insert:
+                # New rows start from an empty snapshot past every earlier event (an item stocked before
+                # keeps its history), and the initial quantity is posted as a purchase
+                head = _ledger_head(s)
+                s.execute(
+                    text('INSERT INTO inventory (household_id, item_id, quantity, unit, ledger_seq) VALUES (:household, :id, 0, :unit, :seq);'),
+                    [dict(row, seq=head) for row in to_insert]
+                )
+                inserted = dict(s.execute(
+                    text('SELECT item_id, inventory_id FROM inventory WHERE household_id = :household AND item_id IN :item_ids;').bindparams(
+                        bindparam('item_ids', expanding=True)
+                    ),
+                    params={'household': household_id, 'item_ids': [row['id'] for row in to_insert]}
+                ).fetchall())
+                _insert_ledger_events(s, household_id, [
+                    dict(inventory_id=inserted[row['id']], event='purchase', quantity=row['qty'], expires_on=row['expires_on'])
+                    for row in to_insert if row['qty']
+                ])
+                _refresh_low_stock(
+                    s, 'household_id = :household AND item_id IN :item_ids',
+                    {'household': household_id, 'item_ids': [row['id'] for row in to_insert]}
+                )
+        s.commit()
+
+    if updates or deletes or inserts:
+        # One invalidation for the whole batch; recipe and menu caches and other households stay warm
+        # (deleted rows take their lots with them, which _sync_lots doesn't see)
+        invalidate_tables('inventory', 'inventory_ledger', 'inventory_lots', household_id=household_id)
+        _compact_if_needed(household_id)
+    if new_items:
+        # A new catalogue entry is shared data (rowcount may be -1 when the driver can't tell)
+        invalidate_tables('stock_items')
+        _update_search_index('stock_items', add=[(item_id, name) for item_id, _, name in item_rows.values()])
+    return pd.DataFrame(outcomes, columns=['op', 'inventory_id', 'item_name', 'status'])
+
+def update_inventory_quantity(inventory_id, new_quantity, household_id=None):
     """Updates the quantity of a specific item in the inventory."""
+    apply_inventory_changes(updates={inventory_id: new_quantity}, household_id=household_id)
+
+def add_stock_item(name, quantity, unit, expires_on=None, household_id=None):
+    """Adds a new master item and sets its initial inventory quantity (one lot, expiring on `expires_on`)."""
+    apply_inventory_changes(inserts=[dict(item_name=name, quantity=quantity, unit=unit, expires_on=expires_on)], household_id=household_id)
+
+def delete_inventory_item(inventory_id, household_id=None):
+    """Deletes an item from the personal inventory."""
+    apply_inventory_changes(deletes=[inventory_id], household_id=household_id)
+
+def upsert_inventory_item(item_name, quantity_to_add, unit, expires_on=None, household_id=None):
+    """Adds quantity to an existing inventory item or creates it if it doesn't exist (see import_purchases)."""
+    import_purchases(pd.DataFrame({
+        'item_name': [item_name], 'quantity': [quantity_to_add], 'unit': [unit], 'expires_on': [expires_on]
+    }), household_id=household_id)
+
+def _ensure_stock_items(s, conn, items):
+    """Adds the catalogue entries `items` (item_name, base_unit) that don't exist yet, in one multi-row insert.
+
+    Returns the highest item_id before the insert, so the caller's lookup can tell which entries are new.
+    """
+    last_id = int(s.execute(text('SELECT COALESCE(MAX(item_id), 0) FROM stock_items;')).scalar_one())
+    s.execute(text(conn.insert_ignore('stock_items', ['item_name', 'base_unit'])), items[['item_name', 'base_unit']].to_dict('records'))
+    return last_id
+
+def _after_catalogue_insert(resolved, last_id):
+    """Invalidates the catalogue and indexes the entries of `resolved` (item_id, item_name) newer than `last_id`."""
+    created = [(int(item_id), name) for item_id, name in resolved if item_id > last_id]
+    if created:
+        invalidate_tables('stock_items')
+        _update_search_index('stock_items', add=created)
+    return len(created)
+
+def import_catalogue(rows):
+    """Adds catalogue entries in one transaction: one multi-row insert, one update and one lookup.
+
+    `rows` has item_name and base_unit, and optionally density_g_per_ml and piece_weight_g, which
+    overwrite the stored values where given. Names compare case-insensitively; existing entries keep
+    their base unit. Returns `(ids, created)`: item_id by case-folded name, and the count of new entries.
+    """
+    rows = rows.assign(key=rows['item_name'].str.casefold()).drop_duplicates('key', keep='last')
+    if rows.empty:
+        return {}, 0
     conn = get_db_connection()
     with conn.session as s:
-        s.execute(
-            text('UPDATE inventory SET quantity = :qty WHERE inventory_id = :id;'),
-            params=dict(qty=new_quantity, id=inventory_id)
-        )
+        last_id = _ensure_stock_items(s, conn, rows)
+        extra = [column for column in (DENSITY_COLUMN, PIECE_WEIGHT_COLUMN) if column in rows]
+        given = rows[rows[extra].notna().any(axis=1)] if extra else rows.iloc[:0]
+        if not given.empty:
+            assignments = ', '.join(f"{column} = COALESCE(:{column}, {column})" for column in extra)
+            s.execute(
+                text(f'UPDATE stock_items SET {assignments} WHERE item_name = :item_name;'),
+                given[['item_name', *extra]].astype(object).where(given[['item_name', *extra]].notna(), None).to_dict('records')
+            )
+        resolved = s.execute(
+            text('SELECT item_id, item_name FROM stock_items WHERE item_name IN :names;').bindparams(bindparam('names', expanding=True)),
+            params={'names': rows['item_name'].tolist()}
+        ).fetchall()
         s.commit()
-    # Clear all data caches to reflect the change immediately
-    st.cache_data.clear()
+    if not given.empty:
+        invalidate_tables('stock_items')
+    created = _after_catalogue_insert(resolved, last_id)
+    return {name.casefold(): int(item_id) for item_id, name in resolved}, created
+
+def _stock_purchases(s, conn, rows, household_id, note=None):
+    """Adds purchases to stock inside the caller's session (see import_purchases).
+
+    Returns `(stocked, stocked_ids, last_id)`: the resolved items, the inventory rows that got
+    events and the catalogue's last item_id before any were added, for _after_catalogue_insert.
+    """
+    # New catalogue entries and inventory rows take the unit of the item's first purchase
+    firsts = rows.drop_duplicates('key')
+    last_id = _ensure_stock_items(s, conn, firsts.assign(base_unit=firsts['unit']))
+    # New rows start past every earlier event (see apply_inventory_changes)
+    head = _ledger_head(s)
+    s.execute(text("""
+        INSERT INTO inventory (household_id, item_id, quantity, unit, ledger_seq)
+        SELECT :household, si.item_id, 0, :unit, :seq
+        FROM stock_items si
+        WHERE si.item_name = :item_name
+          AND NOT EXISTS (SELECT 1 FROM inventory i WHERE i.household_id = :household AND i.item_id = si.item_id);
+    """), [
+        dict(household=household_id, item_name=name, unit=unit, seq=head)
+        for name, unit in zip(firsts['item_name'], firsts['unit'])
+    ])
+    stocked = pd.DataFrame(s.execute(
+        text("""
+            SELECT si.item_id, si.item_name, si.base_unit, si.density_g_per_ml, si.piece_weight_g, i.inventory_id, i.unit
+            FROM stock_items si
+            JOIN inventory i ON i.item_id = si.item_id AND i.household_id = :household
+            WHERE si.item_name IN :names;
+        """).bindparams(bindparam('names', expanding=True)),
+        params={'household': household_id, 'names': firsts['item_name'].tolist()}
+    ).fetchall(), columns=['item_id', 'item_name', 'base_unit', DENSITY_COLUMN, PIECE_WEIGHT_COLUMN, 'inventory_id', 'stocked_unit'])
+    stocked['key'] = stocked['item_name'].str.casefold()
+
+    purchases = rows[['key', 'quantity', 'unit', 'expires_on']].merge(stocked.drop(columns='item_name'), on='key')
+    # Purchased quantity over one stocked unit, both in the item's base unit
+    bought = _base_quantities(purchases, purchases['quantity'].to_numpy())
+    per_unit = _base_quantities(purchases.assign(unit=purchases['stocked_unit']), np.ones(len(purchases)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        converted = bought / per_unit
+    purchases['converted'] = np.where(np.isfinite(converted), converted, purchases['quantity'])
+    totals = purchases.groupby(['inventory_id', 'expires_on'], dropna=False)['converted'].sum()
+    _insert_ledger_events(s, household_id, [
+        dict(inventory_id=inv_id, event='purchase', quantity=qty, note=note, expires_on=expires_on)
+        for (inv_id, expires_on), qty in totals.items()
+    ])
+    stocked_ids = sorted({int(inv_id) for inv_id, _ in totals.index})
+    _refresh_low_stock(s, 'inventory_id IN :ids', {'ids': stocked_ids}, touch=True)
+    return stocked, stocked_ids, last_id
+
+def _purchase_rows(rows):
+    """Purchase rows with a casefolded `key`, numeric quantities and ISO expiry dates; rows adding nothing are dropped."""
+    rows = rows.assign(
+        key=rows['item_name'].str.casefold(), quantity=pd.to_numeric(rows['quantity'], errors='coerce').astype(float),
+        expires_on=[_iso_date(value) for value in rows['expires_on']] if 'expires_on' in rows else None
+    )
+    return rows[rows['quantity'].notna() & (rows['quantity'] != 0)]
+
+def import_purchases(rows, household_id=None, note=None):
+    """Adds a batch of purchases to stock in one transaction, creating catalogue and inventory rows as needed.
 
-def add_stock_item(name, quantity, unit):
-    """Adds a new master item and sets its initial inventory quantity."""
+    `rows` has item_name, quantity and unit, and optionally expires_on. Names are resolved with one
+    lookup; missing catalogue entries and inventory rows are added with multi-row inserts, and each
+    inventory row gets one purchase event (and lot) per expiry date in the chunk (quantities
+    converted into the unit it is stocked in; units that can't be converted are added as they
+    are). Returns a summary dict of row counts.
+    """
+    household_id = current_household(household_id)
+    rows = _purchase_rows(rows)
+    summary = dict(rows=len(rows), items_created=0, stocked=0)
+    if rows.empty:
+        return summary
     conn = get_db_connection()
     with conn.session as s:
-        s.execute(
-            text('INSERT IGNORE INTO stock_items (item_name, base_unit) VALUES (:name, :unit);'), 
-            params=dict(name=name, unit=unit)
-        )
+        stocked, stocked_ids, last_id = _stock_purchases(s, conn, rows, household_id, note)
         s.commit()
-        
-        result = s.execute(text('SELECT item_id FROM stock_items WHERE item_name = :name;'), params=dict(name=name))
-        item_id = result.fetchone()[0]
 
-        s.execute(
-            text('INSERT IGNORE INTO inventory (item_id, quantity, unit) VALUES (:id, :qty, :unit);'),
-            params=dict(id=item_id, qty=quantity, unit=unit)
-        )
+    summary.update(stocked=len(stocked_ids))
+    invalidate_tables('inventory', 'inventory_ledger', household_id=household_id)
+    summary['items_created'] = _after_catalogue_insert(zip(stocked['item_id'], stocked['item_name']), last_id)
+    _compact_if_needed(household_id)
+    return summary
+
+def apply_stock_changes(changes):
+    """Applies a batch of stock changes, possibly of several households, in one transaction.
+
+    Each change is a dict with `household_id` and either `item_name`, `quantity`, `unit` (and
+    optionally `note`, `expires_on`): a purchase, added like import_purchases does; or
+    `inventory_id`, `quantity` (a signed change in the row's unit) and `row_version`: an
+    adjustment. An adjustment made against a version of the row that has changed since is a
+    conflict and is not applied; so is a second adjustment of the same row in the batch, since it
+    was made against the version the first one replaced. `row_version` None applies the change
+    whatever the version. Purchases don't conflict, and don't move the version adjustments of the
+    same batch are checked against.
+    Returns one outcome dict per change, in order: `status` (applied / conflict / not_found) and,
+    for adjustments, the row's `quantity`, `unit` and `row_version`: after the change if it was
+    applied, as found otherwise.
+    """
+    changes = list(changes)
+    outcomes = [dict(status='applied') for _ in changes]
+    by_household = {}
+    for position, change in enumerate(changes):
+        by_household.setdefault(int(change['household_id']), []).append(position)
+    conn = get_db_connection()
+    catalogue = []
+    with conn.session as s:
+        for household_id, positions in by_household.items():
+            purchases = [changes[p] for p in positions if 'inventory_id' not in changes[p]]
+            adjustments = [p for p in positions if 'inventory_id' in changes[p]]
+            if adjustments:
+                ids = sorted({int(changes[p]['inventory_id']) for p in adjustments})
+                current = {row.inventory_id: row for row in s.execute(text(f"""
+                    SELECT i.inventory_id, i.row_version, {CURRENT_QUANTITY_SQL} AS quantity, i.unit
+                    FROM inventory i
+                    WHERE i.household_id = :household AND i.inventory_id IN :ids;
+                """).bindparams(bindparam('ids', expanding=True)), params={'household': household_id, 'ids': ids})}
+                events, claimed = [], set()
+                for p in adjustments:
+                    change, row = changes[p], current.get(int(changes[p]['inventory_id']))
+                    if row is None:
+                        outcomes[p] = dict(status='not_found')
+                        continue
+                    outcomes[p].update(quantity=float(row.quantity), unit=row.unit, row_version=int(row.row_version))
+                    if change.get('row_version') is not None:
+                        if int(change['row_version']) != row.row_version or row.inventory_id in claimed:
+                            outcomes[p]['status'] = 'conflict'
+                            continue
+                        claimed.add(row.inventory_id)
+                    if float(change['quantity']) == 0:
+                        continue
+                    outcomes[p].update(quantity=float(row.quantity) + float(change['quantity']), row_version=int(row.row_version) + 1)
+                    events.append(dict(inventory_id=row.inventory_id, event='adjustment', quantity=float(change['quantity']), note=change.get('note')))
+                _insert_ledger_events(s, household_id, events)
+                if events:
+                    _refresh_low_stock(s, 'inventory_id IN :ids', {'ids': sorted({event['inventory_id'] for event in events})}, touch=True)
+            if purchases:
+                rows = _purchase_rows(pd.DataFrame(purchases))
+                if 'note' not in rows:
+                    rows['note'] = None
+                # One batch of purchase events per note (the ledger keeps one note per event)
+                for note, group in rows.groupby('note', dropna=False, sort=False):
+                    stocked, _, last_id = _stock_purchases(s, conn, group, household_id, None if pd.isna(note) else note)
+                    catalogue.append((stocked, last_id))
         s.commit()
-    st.cache_data.clear()
 
-def delete_inventory_item(inventory_id):
-    """Deletes an item from the personal inventory."""
+    for household_id in by_household:
+        invalidate_tables('inventory', 'inventory_ledger', household_id=household_id)
+    for stocked, last_id in catalogue:
+        _after_catalogue_insert(zip(stocked['item_id'], stocked['item_name']), last_id)
+    for household_id in by_household:
+        _compact_if_needed(household_id)
+    return outcomes
+
+def set_reorder_points(points, household_id=None):
+    """Sets per-item reorder points: `points` maps inventory_id -> threshold in base units (None = unit default)."""
+    household_id = current_household(household_id)
+    rows = [
+        dict(id=int(inv_id), point=None if point is None or pd.isna(point) else float(point), household=household_id)
+        for inv_id, point in dict(points).items()
+    ]
+    if not rows:
+        return
     conn = get_db_connection()
     with conn.session as s:
-        s.execute(text('DELETE FROM inventory WHERE inventory_id = :id;'), params=dict(id=inventory_id))
+        s.execute(text('UPDATE inventory SET reorder_point = :point WHERE inventory_id = :id AND household_id = :household;'), rows)
+        _refresh_low_stock(s, 'household_id = :household AND inventory_id IN :ids', {'household': household_id, 'ids': [row['id'] for row in rows]})
         s.commit()
-    st.cache_data.clear()
+    invalidate_tables('inventory', household_id=household_id)
+
+# -----------------------------------------------------------------------------
+# --- LOW STOCK (per-item reorder points, maintained is_low flag) ---
+# -----------------------------------------------------------------------------
+
+# Reorder point (base units) for rows without their own, keyed by the unit the item is stocked in
+DEFAULT_REORDER_POINTS = {'kg': 250.0, 'l': 250.0, 'g': 100.0, 'ml': 100.0, 'pcs': 3.0}
+
+def _unit_case_sql(column, values):
+    """CASE expression mapping a unit column to `values[unit]` (case-insensitive, NULL for unknown units)."""
+    branches = ' '.join(f"WHEN '{unit}' THEN {float(value)!r}" for unit, value in values.items())
+    return f"CASE LOWER({column}) {branches} ELSE NULL END"
+
+def _base_quantity_sql(quantity, unit, base_unit, density, piece_weight):
+    """SQL twin of units.to_base_units: `quantity` in `unit` converted to the base of `base_unit`.
 
-def upsert_inventory_item(item_name, quantity_to_add, unit):
-    """Adds quantity to an existing inventory item or creates it if it doesn't exist."""
+    Crosses dimensions through grams with the item's density / piece weight; NULL when it can't.
+    """
+    source, target = _unit_case_sql(unit, UNIT_DIMENSION), _unit_case_sql(base_unit, UNIT_DIMENSION)
+    value = f"{quantity} * ({_unit_case_sql(unit, UNIT_FACTOR)})"
+    return (
+        f"(CASE WHEN ({target}) IS NULL OR ({source}) = ({target}) THEN {value} "
+        f"ELSE (CASE {source} WHEN {GRAMS} THEN {value} WHEN {MILLILITRES} THEN {value} * {density} "
+        f"WHEN {PIECES} THEN {value} * {piece_weight} END) "
+        f"/ (CASE {target} WHEN {GRAMS} THEN 1 WHEN {MILLILITRES} THEN {density} ELSE {piece_weight} END) END)"
+    )
+
+# Base quantity below the row's reorder point -> 1
+LOW_STOCK_SQL = (
+    f"CASE WHEN {_current_quantity_sql('inventory')} * ({_unit_case_sql('unit', UNIT_FACTOR)}) "
+    f"< COALESCE(reorder_point, {_unit_case_sql('unit', DEFAULT_REORDER_POINTS)}) THEN 1 ELSE 0 END"
+)
+
+def _refresh_low_stock(s, where, params, touch=False):
+    """Recomputes inventory.is_low for the rows matching `where`, inside the caller's session.
+
+    `touch` marks a stock change made through ledger events: it stamps last_updated and bumps
+    row_version, which queued edits check before they apply (see apply_stock_changes).
+    """
+    statement_params = [bindparam(name, expanding=True) for name, value in params.items() if isinstance(value, (list, tuple))]
+    stamp = ', last_updated = CURRENT_TIMESTAMP, row_version = row_version + 1' if touch else ''
+    s.execute(text(f'UPDATE inventory SET is_low = {LOW_STOCK_SQL}{stamp} WHERE {where};').bindparams(*statement_params), params)
+
+def rebuild_low_stock_flags():
+    """Recomputes is_low for every inventory row (e.g. after rows were loaded by SQL scripts)."""
     conn = get_db_connection()
     with conn.session as s:
-        s.execute(
-            text('INSERT IGNORE INTO stock_items (item_name, base_unit) VALUES (:name, :unit);'),
-            params={'name': item_name, 'unit': unit}
-        )
+        _refresh_low_stock(s, '1 = 1', {})
         s.commit()
-        
-        result = s.execute(text('SELECT item_id FROM stock_items WHERE item_name = :name;'), params={'name': item_name})
-        item_id = result.fetchone()[0]
+    invalidate_tables('inventory')
 
-        s.execute(
-            text("""
-                INSERT INTO inventory (item_id, quantity, unit)
-                VALUES (:id, :qty, :unit)
-                ON DUPLICATE KEY UPDATE quantity = quantity + :qty;
-            """), 
-            params={'id': item_id, 'qty': quantity_to_add, 'unit': unit}
+@st.cache_resource
+def _bootstrap_low_stock_flags():
+    """Rebuilds the flags once per process so rows written outside the app are covered."""
+    rebuild_low_stock_flags()
+    return True
+
+# -----------------------------------------------------------------------------
+# --- LEDGER (append-only stock events over compacted snapshots) ---
+# -----------------------------------------------------------------------------
+
+LEDGER_EVENTS = ('purchase', 'cooked', 'adjustment', 'waste')
+# A household's unfolded events are compacted into the snapshots once there are more than this many
+COMPACT_AFTER_EVENTS = 500
+
+def _ledger_head(s):
+    """Id of the latest ledger event (0 for an empty ledger)."""
+    return int(s.execute(text('SELECT COALESCE(MAX(ledger_id), 0) FROM inventory_ledger;')).scalar_one())
+
+def _insert_ledger_events(s, household_id, events, absolute=False):
+    """Appends stock events inside the caller's session, in one executemany.
+
+    `events` are dicts with `inventory_id`, `event`, `quantity` (a signed change in the row's unit)
+    and optionally `plan_id`, `note` and, for purchases, `expires_on`. With `absolute` the
+    quantities are target stock levels instead: the event records the difference to current
+    stock, and rows already there get none. Item, unit and household come from the inventory row,
+    so rows of other households are skipped. The rows' lots are brought in step (see _sync_lots).
+    """
+    if not events:
+        return
+    if absolute:
+        quantity, condition = f':quantity - {CURRENT_QUANTITY_SQL}', f'AND {CURRENT_QUANTITY_SQL} <> :quantity'
+    else:
+        quantity, condition = ':quantity', ''
+    created_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    s.execute(text(f"""
+        INSERT INTO inventory_ledger (household_id, item_id, event, quantity, unit, plan_id, note, created_at)
+        SELECT i.household_id, i.item_id, :event, {quantity}, i.unit, :plan_id, :note, :created_at
+        FROM inventory i
+        WHERE i.inventory_id = :inventory_id AND i.household_id = :household {condition};
+    """), [
+        dict(
+            inventory_id=int(event['inventory_id']), event=event['event'], quantity=float(event['quantity']),
+            plan_id=event.get('plan_id'), note=event.get('note'), household=household_id, created_at=created_at
         )
+        for event in events
+    ])
+    incoming = [] if absolute else [event for event in events if event.get('expires_on') is not None and float(event['quantity']) > 0]
+    _sync_lots(s, household_id, [event['inventory_id'] for event in events], incoming)
+
+def post_ledger_events(events, household_id=None):
+    """Records stock events (see _insert_ledger_events) in one transaction, e.g. waste or a correction."""
+    household_id = current_household(household_id)
+    events = list(events)
+    unknown = {event['event'] for event in events} - set(LEDGER_EVENTS)
+    if unknown:
+        raise ValueError(f"Unknown ledger event(s): {', '.join(sorted(unknown))}")
+    if not events:
+        return
+    conn = get_db_connection()
+    with conn.session as s:
+        _insert_ledger_events(s, household_id, events)
+        _refresh_low_stock(
+            s, 'household_id = :household AND inventory_id IN :ids',
+            {'household': household_id, 'ids': sorted({int(event['inventory_id']) for event in events})}, touch=True
+        )
+        s.commit()
+    invalidate_tables('inventory', 'inventory_ledger', household_id=household_id)
+    _compact_if_needed(household_id)
+
+def record_waste(inventory_id, quantity, note=None, household_id=None):
+    """Takes `quantity` (in the row's unit, at most what is in stock) of spoiled or thrown-away stock out of an inventory row."""
+    inventory = get_inventory(household_id).set_index('inventory_id')['quantity']
+    if int(inventory_id) not in inventory.index:
+        return
+    quantity = min(abs(float(quantity)), max(float(inventory[int(inventory_id)]), 0.0))
+    post_ledger_events([dict(inventory_id=inventory_id, event='waste', quantity=-quantity, note=note)], household_id)
+
+def compact_ledger(household_id=None):
+    """Folds the ledger events into the inventory snapshots of one household (None = every household).
+
+    Current stock is unchanged; reads just have no tail left to sum. History stays in the ledger.
+    Returns the number of inventory rows folded.
+    """
+    where, params = '', {}
+    if household_id is not None:
+        where, params = 'household_id = :household AND ', {'household': int(household_id)}
+    conn = get_db_connection()
+    with conn.session as s:
+        params['upto'] = _ledger_head(s)
+        tail = ("FROM inventory_ledger l WHERE l.household_id = inventory.household_id AND l.item_id = inventory.item_id "
+                "AND l.ledger_id > inventory.ledger_seq AND l.ledger_id <= :upto")
+        # quantity is assigned before ledger_seq moves (MySQL applies SET left to right); last_updated
+        # is kept, since folding events in is not a stock change
+        folded = s.execute(text(f"""
+            UPDATE inventory
+            SET quantity = quantity + COALESCE((SELECT SUM(l.quantity) {tail}), 0),
+                ledger_seq = :upto,
+                last_updated = last_updated
+            WHERE {where}EXISTS (SELECT 1 {tail});
+        """), params).rowcount
+        s.commit()
+    invalidate_tables('inventory', household_id=household_id)
+    return folded
+
+def _ledger_tail_size(household_id):
+    """Events of the household not yet folded into a snapshot."""
+    conn = get_db_connection()
+    with conn.session as s:
+        return int(s.execute(text("""
+            SELECT COUNT(*)
+            FROM inventory_ledger l
+            JOIN inventory i ON i.household_id = l.household_id AND i.item_id = l.item_id
+            WHERE l.household_id = :household AND l.ledger_id > i.ledger_seq;
+        """), params={'household': household_id}).scalar_one())
+
+def _compact_if_needed(household_id):
+    """Keeps reads proportional to the items stocked, not to history, by compacting a long tail."""
+    if _ledger_tail_size(household_id) > COMPACT_AFTER_EVENTS:
+        compact_ledger(household_id)
+
+# A menu_plan slot (alias `mp`) that was marked cooked: its ingredients are already out of stock, so
+# demand reads (requirements, menu status, forecast, basket) leave it out
+COOKED_SLOT_SQL = "EXISTS (SELECT 1 FROM inventory_ledger l WHERE l.plan_id = mp.plan_id AND l.event = 'cooked')"
+
+def get_cooked_slots(start=None, end=None, household_id=None):
+    """Slots (meal_date, meal_time) of the household from `start` up to `end` (default: today) marked cooked.
+
+    A slot counts as cooked once it has 'cooked' ledger events, whenever they were posted.
+    """
+    household_id = current_household(household_id)
+    start = start or datetime.date.today()
+    start, end = _plan_range(start, end or start + datetime.timedelta(days=1))
+    slots = cached_query(f"""
+        SELECT mp.meal_date, mp.meal_time
+        FROM menu_plan mp
+        WHERE mp.household_id = :household AND mp.meal_date >= :start AND mp.meal_date < :end
+          AND {COOKED_SLOT_SQL};
+    """, tables=('inventory_ledger', 'menu_plan'), params={'household': household_id, 'start': start, 'end': end},
+        ttl=60, household_id=household_id)
+    return _dated_slots(slots)
+
+def mark_meal_cooked(meal_date, meal_time, household_id=None):
+    """Deducts the ingredients of a planned slot (recipe x num_persons) as one batch of 'cooked' events.
+
+    Deductions are capped at the stock on hand. Returns one row per ingredient with the `deducted`
+    quantity and the `short` part that wasn't in stock, both in the inventory row's unit (items not
+    stocked at all have no unit and no event). Raises ValueError if the slot is empty or was already
+    marked cooked.
+    """
+    household_id = current_household(household_id)
+    day = pd.Timestamp(meal_date).date()
+    _bootstrap_menu_requirements()
+    conn = get_db_connection()
+    with conn.session as s:
+        slot = s.execute(text("""
+            SELECT mp.plan_id, r.recipe_name
+            FROM menu_plan mp
+            JOIN recipes r ON mp.recipe_id = r.recipe_id
+            WHERE mp.household_id = :household AND mp.meal_date = :day AND mp.meal_time = :time;
+        """), params={'household': household_id, 'day': day.isoformat(), 'time': meal_time}).one_or_none()
+        if slot is None:
+            raise ValueError(f"Nothing is planned for {meal_time} on {day:%A %d %b}.")
+        already = s.execute(
+            text("SELECT COUNT(*) FROM inventory_ledger WHERE plan_id = :plan_id AND event = 'cooked';"),
+            params={'plan_id': slot.plan_id}
+        ).scalar_one()
+        if already:
+            raise ValueError(f"{slot.recipe_name} ({meal_time}, {day:%a %d %b}) is already marked cooked.")
+
+        rows = s.execute(text(f"""
+            SELECT si.item_name, mr.required_qty, i.inventory_id, i.unit, {CURRENT_QUANTITY_SQL} AS stock,
+                   si.base_unit, si.density_g_per_ml, si.piece_weight_g
+            FROM menu_requirements mr
+            JOIN stock_items si ON mr.item_id = si.item_id
+            LEFT JOIN inventory i ON i.item_id = mr.item_id AND i.household_id = :household
+            WHERE mr.plan_id = :plan_id;
+        """), params={'household': household_id, 'plan_id': slot.plan_id}).fetchall()
+        needed = pd.DataFrame(rows, columns=[
+            'item_name', 'required_qty', 'inventory_id', 'unit', 'stock', 'base_unit', 'density_g_per_ml', 'piece_weight_g'
+        ])
+        # Requirements are in the item's base unit; one stocked unit converts the other way
+        per_unit = _base_quantities(needed, np.ones(len(needed)))
+        required = needed['required_qty'].to_numpy(dtype=float) / per_unit
+        stock = np.maximum(needed['stock'].to_numpy(dtype=float), 0.0)
+        deducted = np.where(np.isfinite(required), np.fmin(required, stock), 0.0)
+        report = pd.DataFrame({
+            'item_name': needed['item_name'],
+            'deducted': deducted,
+            'short': np.where(np.isfinite(required), required - deducted, np.nan),
+            'unit': needed['unit'],
+        })
+
+        # Every stocked ingredient gets an event, even one that ran out, so the slot reads as cooked
+        note = f"{slot.recipe_name} ({meal_time}, {day:%a %d %b})"
+        _insert_ledger_events(s, household_id, [
+            dict(inventory_id=inv_id, event='cooked', quantity=-qty, plan_id=slot.plan_id, note=note)
+            for inv_id, qty in zip(needed['inventory_id'], deducted) if pd.notna(inv_id)
+        ])
+        touched = [int(inv_id) for inv_id in needed['inventory_id'].dropna()]
+        if touched:
+            _refresh_low_stock(s, 'inventory_id IN :ids', {'ids': touched}, touch=True)
         s.commit()
-    st.cache_data.clear()
+    invalidate_tables('inventory', 'inventory_ledger', household_id=household_id)
+    _compact_if_needed(household_id)
+    return report
+
+def get_inventory_ledger(limit=50, household_id=None):
+    """The household's most recent stock events, newest first."""
+    household_id = current_household(household_id)
+    return cached_query("""
+        SELECT l.created_at, si.item_name, l.event, l.quantity, l.unit, l.note
+        FROM inventory_ledger l
+        JOIN stock_items si ON l.item_id = si.item_id
+        WHERE l.household_id = :household
+        ORDER BY l.ledger_id DESC
+        LIMIT :limit;
+    """, tables=('inventory_ledger', 'stock_items'), params={'household': household_id, 'limit': int(limit)},
+        ttl=30, household_id=household_id)
 
 # -----------------------------------------------------------------------------
-# --- RECIPE & MENU FUNCTIONS ---
+# --- LOTS (dated batches of stock, drawn oldest first) ---
 # -----------------------------------------------------------------------------
 
-def get_recipes():
-    """Fetches all recipes."""
-    conn = get_db_connection()
-    return conn.query('SELECT recipe_id, recipe_name FROM recipes ORDER BY recipe_name;', ttl=30)
+# Lot quantities below this (base units) count as used up
+LOT_EPSILON = 1e-6
+# Inventory rows per _sync_lots call when lots are rebuilt (keeps its IN list bounded)
+LOT_SYNC_BATCH = 1000
+
+def _iso_date(value):
+    """A date-like value as 'YYYY-MM-DD', or None for a missing one."""
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).date().isoformat()
+
+def _sync_lots(s, household_id, inventory_ids, incoming=()):
+    """Brings the lots of inventory rows in line with their current stock, inside the caller's session.
+
+    Stock the lots don't cover yet becomes new lots: an undated one for stock that predates lot
+    tracking, then the `incoming` purchases (events with `expires_on`), capped at what is left.
+    Stock the lots hold too much of is drawn from the oldest lots first (FIFO), in one batched
+    update and one delete. Lot quantities are in the item's base unit. The household's cached lot
+    reads are invalidated once the caller commits.
+    """
+    ids = sorted({int(inv_id) for inv_id in inventory_ids})
+    if not ids:
+        return
+    sa_event.listen(s, 'after_commit', lambda _: invalidate_tables('inventory_lots', household_id=household_id), once=True)
+    rows = pd.DataFrame(s.execute(text(f"""
+        SELECT i.inventory_id, i.item_id, {CURRENT_QUANTITY_SQL} AS quantity, i.unit,
+               si.base_unit, si.density_g_per_ml, si.piece_weight_g,
+               COALESCE((SELECT SUM(l.quantity) FROM inventory_lots l WHERE l.inventory_id = i.inventory_id), 0) AS in_lots
+        FROM inventory i
+        JOIN stock_items si ON i.item_id = si.item_id
+        WHERE i.household_id = :household AND i.inventory_id IN :ids;
+    """).bindparams(bindparam('ids', expanding=True)), params={'household': household_id, 'ids': ids}).fetchall(), columns=[
+        'inventory_id', 'item_id', 'quantity', 'unit', 'base_unit', DENSITY_COLUMN, PIECE_WEIGHT_COLUMN, 'in_lots'
+    ])
+    if rows.empty:
+        return
+    # One stocked unit in base units; rows stocked in a unit that doesn't convert keep lots in that unit
+    per_unit = _base_quantities(rows, np.ones(len(rows)))
+    per_unit = pd.Series(np.where(np.isfinite(per_unit), per_unit, 1.0), index=rows['inventory_id'])
+    stock = np.maximum(rows['quantity'].to_numpy(dtype=float), 0.0) * per_unit.to_numpy()
+    surplus = pd.Series(stock - rows['in_lots'].to_numpy(dtype=float), index=rows['inventory_id'])
+
+    short = surplus[surplus < -LOT_EPSILON]
+    if not short.empty:
+        lots = pd.DataFrame(s.execute(
+            text('SELECT lot_id, inventory_id, quantity FROM inventory_lots WHERE inventory_id IN :ids ORDER BY inventory_id, lot_id;').bindparams(
+                bindparam('ids', expanding=True)
+            ),
+            params={'ids': [int(inv_id) for inv_id in short.index]}
+        ).fetchall(), columns=['lot_id', 'inventory_id', 'quantity'])
+        held = lots['quantity'].to_numpy(dtype=float)
+        # Each lot gives what the row still needs after the older lots, up to all it holds
+        before = lots.assign(quantity=held).groupby('inventory_id')['quantity'].cumsum().to_numpy() - held
+        taken = np.clip(-lots['inventory_id'].map(short).to_numpy() - before, 0.0, held)
+        left = held - taken
+        emptied = left <= LOT_EPSILON
+        if emptied.any():
+            s.execute(
+                text('DELETE FROM inventory_lots WHERE lot_id IN :ids;').bindparams(bindparam('ids', expanding=True)),
+                params={'ids': lots['lot_id'][emptied].astype(int).tolist()}
+            )
+        drawn = (taken > LOT_EPSILON) & ~emptied
+        if drawn.any():
+            s.execute(text('UPDATE inventory_lots SET quantity = :quantity WHERE lot_id = :lot_id;'), [
+                dict(lot_id=int(lot_id), quantity=float(quantity)) for lot_id, quantity in zip(lots['lot_id'][drawn], left[drawn])
+            ])
 
-def get_menu_plan():
-    """Fetches the current weekly menu plan."""
+    extra = surplus[surplus > LOT_EPSILON].to_dict()
+    if not extra:
+        return
+    purchases = {}
+    for event in incoming:
+        purchases.setdefault(int(event['inventory_id']), []).append(event)
+    item_ids = dict(zip(rows['inventory_id'], rows['item_id']))
+    new_lots = []
+    for inv_id, amount in extra.items():
+        bought = [(float(event['quantity']) * per_unit[inv_id], _iso_date(event['expires_on'])) for event in purchases.get(inv_id, [])]
+        # Stock beyond this event's purchases was there before lots were tracked (it is the oldest)
+        older = amount - sum(quantity for quantity, _ in bought)
+        if older > LOT_EPSILON:
+            bought.insert(0, (older, None))
+        for quantity, expires_on in bought:
+            quantity = min(quantity, amount)
+            if quantity > LOT_EPSILON:
+                new_lots.append(dict(household=household_id, inv_id=int(inv_id), item_id=int(item_ids[inv_id]), qty=quantity, expires_on=expires_on))
+                amount -= quantity
+    if new_lots:
+        s.execute(text("""
+            INSERT INTO inventory_lots (household_id, inventory_id, item_id, quantity, expires_on)
+            VALUES (:household, :inv_id, :item_id, :qty, :expires_on);
+        """), new_lots)
+
+def rebuild_lots():
+    """Gives every stocked inventory row without lots its undated lot (e.g. rows from migrate_database.sql).
+
+    Rows that already have lots are kept in step by the writes that change them, so only rows never
+    written through the app are read here.
+    """
     conn = get_db_connection()
-    return conn.query("""
-        SELECT mp.meal_day, mp.meal_time, r.recipe_name, mp.num_persons
+    with conn.session as s:
+        rows = s.execute(text(f"""
+            SELECT i.household_id, i.inventory_id
+            FROM inventory i
+            WHERE {CURRENT_QUANTITY_SQL} > 0
+              AND NOT EXISTS (SELECT 1 FROM inventory_lots l WHERE l.inventory_id = i.inventory_id);
+        """)).fetchall()
+        by_household = {}
+        for household_id, inv_id in rows:
+            by_household.setdefault(int(household_id), []).append(int(inv_id))
+        for household_id, inventory_ids in by_household.items():
+            for chunk in _chunks(inventory_ids, LOT_SYNC_BATCH):
+                _sync_lots(s, household_id, chunk)
+        s.commit()
+
+@st.cache_resource
+def _bootstrap_lots():
+    """Rebuilds the missing lots once per process, so stock loaded by SQL scripts is covered."""
+    rebuild_lots()
+    return True
+
+def get_expiring_lots(days=7, limit=20, household_id=None):
+    """The household's lots expiring within `days` days (or already expired), soonest first.
+
+    Reads a range of the (household_id, expires_on) index and stops after `limit` lots, so it
+    costs the same however many lots are held. Quantities are shown in the inventory row's unit.
+    """
+    household_id = current_household(household_id)
+    _bootstrap_lots()
+    until = (datetime.date.today() + datetime.timedelta(days=int(days))).isoformat()
+    lots = cached_query("""
+        SELECT l.lot_id, l.inventory_id, si.item_name, l.quantity AS base_quantity, i.unit, l.expires_on,
+               si.base_unit, si.density_g_per_ml, si.piece_weight_g
+        FROM inventory_lots l
+        JOIN inventory i ON l.inventory_id = i.inventory_id
+        JOIN stock_items si ON l.item_id = si.item_id
+        WHERE l.household_id = :household AND l.expires_on <= :until
+        ORDER BY l.expires_on, l.lot_id
+        LIMIT :limit;
+    """, tables=('inventory_lots', 'inventory', 'stock_items'), params={'household': household_id, 'until': until, 'limit': int(limit)},
+        ttl=60, household_id=household_id)
+    per_unit = _base_quantities(lots, np.ones(len(lots)))
+    base = lots['base_quantity'].to_numpy(dtype=float)
+    expires_on = pd.to_datetime(lots['expires_on']).dt.date
+    return pd.DataFrame({
+        'lot_id': lots['lot_id'],
+        'inventory_id': lots['inventory_id'],
+        'item_name': lots['item_name'],
+        'quantity': np.where(np.isfinite(per_unit), base / per_unit, base),
+        'unit': lots['unit'],
+        'expires_on': expires_on,
+        'days_left': [(day - datetime.date.today()).days for day in expires_on],
+    })
+
+# -----------------------------------------------------------------------------
+# --- RECIPE & MENU FUNCTIONS ---
+# -----------------------------------------------------------------------------
+
+def get_recipes(household_id=None):
+    """The recipes a household can use (its own and the shared ones), from the shared read model.
+
+    The frame is shared by every session; callers must not mutate it.
+    """
+    return get_read_model().recipes_frame(current_household(household_id))
+
+def _plan_range(start=None, end=None):
+    """ISO bounds of the dates from `start` (default this week's Monday) up to, not including, `end` (default a week on)."""
+    start = start or week_start()
+    end = end or start + datetime.timedelta(days=7)
+    return _iso_date(start), _iso_date(end)
+
+def _dated_slots(slots):
+    """Parses a slot frame's `meal_date` into dates and adds the weekday name after it as `meal_day`."""
+    dates = pd.to_datetime(slots['meal_date'])
+    slots['meal_date'] = dates.dt.date
+    slots.insert(slots.columns.get_loc('meal_date') + 1, 'meal_day', np.asarray(DAYS, dtype=object)[dates.dt.weekday.to_numpy(dtype=int)])
+    return slots
+
+def get_menu_plan(start=None, end=None, household_id=None):
+    """The household's planned meals from `start` up to, not including, `end` (default: this week, Monday to Sunday).
+
+    Reads one range of the (household_id, meal_date, meal_time) index, so it costs the same however
+    much plan history has built up.
+    """
+    household_id = current_household(household_id)
+    start, end = _plan_range(start, end)
+    plan = cached_query("""
+        SELECT mp.meal_date, mp.meal_time, mp.recipe_id, r.recipe_name, mp.num_persons
         FROM menu_plan mp
-        JOIN recipes r ON mp.recipe_id = r.recipe_id;
-    """, ttl=10)
+        JOIN recipes r ON mp.recipe_id = r.recipe_id
+        WHERE mp.household_id = :household AND mp.meal_date >= :start AND mp.meal_date < :end
+        ORDER BY mp.meal_date;
+    """, tables=('menu_plan', 'recipes'), params={'household': household_id, 'start': start, 'end': end},
+        ttl=10, household_id=household_id)
+    return _dated_slots(plan)
 
-def set_menu_slot(day, time, recipe_id, persons):
-    """Sets or updates a meal slot in the menu plan."""
+def set_menu_slots(slots, household_id=None):
+    """Sets or updates many meal slots of the household's menu plan in one transaction.
+
+    `slots` is an iterable of `(meal_date, time, recipe_id, persons)` tuples. A cooked slot given
+    another recipe or headcount is replaced by a new, uncooked one; its cooked events stay in the
+    ledger, as they do for a cleared slot.
+    """
+    household_id = current_household(household_id)
+    rows = [
+        dict(household_id=household_id, meal_date=_iso_date(day), meal_time=time, recipe_id=int(recipe_id), num_persons=int(persons))
+        for day, time, recipe_id, persons in slots
+    ]
+    if not rows:
+        return
     conn = get_db_connection()
     with conn.session as s:
+        # The upsert keeps a slot's plan_id, and with it the cooked events that mark the slot cooked
+        restarted = s.execute(text("""
+            DELETE FROM menu_plan
+            WHERE household_id = :household_id AND meal_date = :meal_date AND meal_time = :meal_time
+              AND (recipe_id <> :recipe_id OR num_persons <> :num_persons)
+              AND EXISTS (SELECT 1 FROM inventory_ledger l WHERE l.plan_id = menu_plan.plan_id AND l.event = 'cooked');
+        """), rows).rowcount
         s.execute(
-            text("""
-                INSERT INTO menu_plan (meal_day, meal_time, recipe_id, num_persons)
-                VALUES (:day, :time, :id, :persons)
-                ON DUPLICATE KEY UPDATE recipe_id = :id, num_persons = :persons;
-            """), 
-            params=dict(day=day, time=time, id=recipe_id, persons=persons)
+            text(conn.upsert(
+                'menu_plan', ['household_id', 'meal_date', 'meal_time', 'recipe_id', 'num_persons'],
+                ['household_id', 'meal_date', 'meal_time'], update=['recipe_id', 'num_persons']
+            )),
+            rows
+        )
+        # Covers every written slot (and possibly a few untouched ones on the same days, recomputed as-is)
+        _refresh_menu_requirements(
+            s, 'mp.household_id = :household AND mp.meal_date IN :days AND mp.meal_time IN :times',
+            dict(household=household_id, days=sorted({r['meal_date'] for r in rows}), times=sorted({r['meal_time'] for r in rows}))
         )
         s.commit()
-    st.cache_data.clear()
+    # Replaced cooked slots let go of their ledger events (plan_id SET NULL)
+    invalidate_tables('menu_plan', 'menu_requirements', *(['inventory_ledger'] if restarted else []), household_id=household_id)
 
-def get_all_stock_items():
-    """Fetches the master list of all possible stock items."""
-    conn = get_db_connection()
-    return conn.query('SELECT item_id, item_name FROM stock_items ORDER BY item_name;', ttl=30)
+def set_menu_slot(meal_date, time, recipe_id, persons, household_id=None):
+    """Sets or updates a meal slot in the household's menu plan."""
+    set_menu_slots([(meal_date, time, recipe_id, persons)], household_id=household_id)
 
-def get_recipe_details(recipe_id):
-    """Fetches the ingredients for a specific recipe."""
+def clear_menu_slots(slots, household_id=None):
+    """Removes planned meals, given as `(meal_date, time)` tuples; returns how many were planned.
+
+    Their requirements go with them; stock events of a cleared slot that was cooked stay in the ledger.
+    """
+    household_id = current_household(household_id)
+    rows = [dict(household=household_id, day=_iso_date(day), time=time) for day, time in slots]
+    if not rows:
+        return 0
     conn = get_db_connection()
-    return conn.query(
-        'SELECT ri.item_id, si.item_name, ri.quantity_per_person, ri.unit FROM recipe_ingredients ri JOIN stock_items si ON ri.item_id = si.item_id WHERE ri.recipe_id = :id;',
-        params={'id': recipe_id}, ttl=10
+    with conn.session as s:
+        cleared = s.execute(
+            text('DELETE FROM menu_plan WHERE household_id = :household AND meal_date = :day AND meal_time = :time;'), rows
+        ).rowcount
+        s.commit()
+    invalidate_tables('menu_plan', 'menu_requirements', 'inventory_ledger', household_id=household_id)
+    return cleared
+
+def get_all_stock_items():
+    """The master list of all possible stock items (shared; callers must not mutate it)."""
+    return get_read_model().items_frame()
+
+def get_recipe_details(recipe_id, household_id=None):
+    """The ingredients of a recipe the household can see (a fresh frame, safe to edit)."""
+    model = get_read_model()
+    recipe_id = int(recipe_id)
+    visible = 0 <= recipe_id < len(model.recipe_owner) and model.recipe_owner[recipe_id] in (current_household(household_id), SHARED)
+    details = model.ingredient_frame([recipe_id] if visible else [])
+    return details[['item_id', 'item_name', 'quantity_per_person', 'unit']]
+
+RECIPE_BATCH_SIZE = 1000
+INGREDIENT_COLUMNS = ['recipe_id', 'item_id', 'quantity_per_person', 'unit']
+
+def _chunks(values, size):
+    """Splits a list into consecutive slices of at most `size` items (keeps IN lists bounded)."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _is_new_recipe(recipe_id):
+    return recipe_id is None or (isinstance(recipe_id, str) and recipe_id == "new")
+
+def _fetch_recipe_ids(s, names, owner):
+    """Maps recipe names to ids, one IN query per batch of names.
+
+    Looks among the recipes household `owner` can see, preferring its own over shared ones with the
+    same name; with `owner` None only shared recipes are considered.
+    """
+    ids_by_name, owned_names = {}, set()
+    visible = 'household_id IS NULL' if owner is None else '(household_id = :owner OR household_id IS NULL)'
+    query = text(f'SELECT recipe_id, recipe_name, household_id FROM recipes WHERE {visible} AND recipe_name IN :names;').bindparams(
+        bindparam('names', expanding=True)
     )
+    for chunk in _chunks(names, RECIPE_BATCH_SIZE):
+        for rid, name, rid_owner in s.execute(query, params={'owner': owner, 'names': chunk}):
+            if name not in owned_names:
+                ids_by_name[name] = rid
+            if rid_owner is not None:
+                owned_names.add(name)
+    return ids_by_name
+
+def _recipe_owners(s, recipe_ids):
+    """Maps recipe ids to their owning household (None for shared recipes)."""
+    owners = {}
+    query = text('SELECT recipe_id, household_id FROM recipes WHERE recipe_id IN :ids;').bindparams(bindparam('ids', expanding=True))
+    for chunk in _chunks(sorted(set(recipe_ids)), RECIPE_BATCH_SIZE):
+        owners.update(dict(s.execute(query, params={'ids': chunk}).fetchall()))
+    return owners
+
+def save_recipes(recipes, household_id=None, shared=False, by_name=False):
+    """Adds or updates many recipes in one transaction, writing only the ingredient rows that changed.
+
+    `recipes` is an iterable of `(recipe_id, recipe_name, ingredients_df)` tuples, where recipe_id is
+    "new" (or None) for recipes to create. A new name that is already taken raises ValueError, unless
+    `by_name` is set (imports): then the existing recipe is updated instead. New recipes belong to the
+    household, or are shared by every household when `shared` is set; existing ids must be visible to
+    the household. Stored ingredients are diffed against `ingredients_df` and applied as batched
+    inserts, updates and deletes.
+    Returns a summary dict with row counts, the saved recipe ids and the recipes/second throughput.
+    """
+    started = time.perf_counter()
+    household_id = current_household(household_id)
+    owner = None if shared else household_id
+    recipes = list(recipes)
+    summary = dict(recipes=len(recipes), created=0, inserted=0, updated=0, deleted=0, recipe_ids=[])
 
-def save_recipe(recipe_id, recipe_name, ingredients_df):
-    """Adds a new recipe or updates an existing one."""
     conn = get_db_connection()
     with conn.session as s:
-        if recipe_id == "new":
-            result = s.execute(text('INSERT INTO recipes (recipe_name) VALUES (:name);'), params={'name': recipe_name})
-            new_recipe_id = result.lastrowid
-        else:
-            new_recipe_id = recipe_id
-            s.execute(text('UPDATE recipes SET recipe_name = :name WHERE recipe_id = :id;'), params={'name': recipe_name, 'id': recipe_id})
-            s.execute(text('DELETE FROM recipe_ingredients WHERE recipe_id = :id;'), params={'id': recipe_id})
+        # 1. Resolve recipe ids: new names are created with one multi-row insert
+        new_names = list(dict.fromkeys(name for rid, name, _ in recipes if _is_new_recipe(rid)))
+        ids_by_name = _fetch_recipe_ids(s, new_names, owner)
+        if ids_by_name and not by_name:
+            raise ValueError(f"A recipe named {', '.join(map(repr, sorted(ids_by_name)))} already exists; open it to edit it instead.")
+        to_create = [name for name in new_names if name not in ids_by_name]
+        if to_create:
+            s.execute(
+                text('INSERT INTO recipes (household_id, recipe_name) VALUES (:owner, :name);'),
+                [{'owner': owner, 'name': name} for name in to_create]
+            )
+            ids_by_name.update(_fetch_recipe_ids(s, to_create, owner))
+            summary['created'] = len(to_create)
 
-        for _, row in ingredients_df.iterrows():
+        # Existing recipes must be the household's own or shared ones
+        explicit_ids = {int(rid) for rid, _, _ in recipes if not _is_new_recipe(rid)}
+        owners = _recipe_owners(s, explicit_ids | set(ids_by_name.values()))
+        unavailable = sorted(rid for rid in explicit_ids if rid not in owners or owners[rid] not in (None, household_id))
+        if unavailable:
+            raise ValueError(f"Recipes not available to household {household_id}: {unavailable}")
+
+        renames = [dict(id=int(rid), name=name) for rid, name, _ in recipes if not _is_new_recipe(rid)]
+        renamed = 0
+        if renames:
+            result = s.execute(text('UPDATE recipes SET recipe_name = :name WHERE recipe_id = :id AND recipe_name <> :name;'), renames)
+            renamed = max(result.rowcount, 0)
+
+        # 2. Desired ingredient rows for every saved recipe
+        # (gathered as plain arrays and turned into one frame; per-recipe DataFrame ops dominate bulk loads)
+        columns = {column: [] for column in INGREDIENT_COLUMNS}
+        for rid, name, ingredients_df in recipes:
+            target_id = int(ids_by_name[name] if _is_new_recipe(rid) else rid)
+            summary['recipe_ids'].append(target_id)
+            if ingredients_df is None or ingredients_df.empty:
+                continue
+            columns['recipe_id'].append(np.full(len(ingredients_df), target_id))
+            for column in INGREDIENT_COLUMNS[1:]:
+                columns[column].append(ingredients_df[column].to_numpy())
+        desired = pd.DataFrame({
+            column: np.concatenate(parts) if parts else [] for column, parts in columns.items()
+        }).drop_duplicates(['recipe_id', 'item_id'], keep='last').astype(
+            {'recipe_id': int, 'item_id': int, 'quantity_per_person': float, 'unit': str}
+        )
+
+        # 3. What is stored now for those recipes
+        stored_rows = []
+        query = text(
+            'SELECT recipe_id, item_id, quantity_per_person, unit FROM recipe_ingredients WHERE recipe_id IN :ids;'
+        ).bindparams(bindparam('ids', expanding=True))
+        for chunk in _chunks(sorted(set(summary['recipe_ids'])), RECIPE_BATCH_SIZE):
+            stored_rows.extend(s.execute(query, params={'ids': chunk}).fetchall())
+        stored = pd.DataFrame(stored_rows, columns=INGREDIENT_COLUMNS).astype(
+            {'recipe_id': int, 'item_id': int, 'quantity_per_person': float, 'unit': str}
+        )
+
+        # 4. Diff and apply only the changes
+        diff = desired.merge(stored, on=['recipe_id', 'item_id'], how='outer', suffixes=('', '_stored'), indicator=True)
+        both = diff['_merge'] == 'both'
+        changed = both & (
+            ~np.isclose(diff['quantity_per_person'].astype(float), diff['quantity_per_person_stored'].astype(float))
+            | (diff['unit'] != diff['unit_stored'])
+        )
+        to_insert = diff.loc[diff['_merge'] == 'left_only', INGREDIENT_COLUMNS]
+        to_update = diff.loc[changed, INGREDIENT_COLUMNS]
+        to_delete = diff.loc[diff['_merge'] == 'right_only', ['recipe_id', 'item_id']]
+
+        if not to_insert.empty:
             s.execute(
-                text('INSERT INTO recipe_ingredients (recipe_id, item_id, quantity_per_person, unit) VALUES (:rid, :iid, :qty, :unit);'),
-                params={'rid': new_recipe_id, 'iid': row['item_id'], 'qty': row['quantity_per_person'], 'unit': row['unit']}
+                text('INSERT INTO recipe_ingredients (recipe_id, item_id, quantity_per_person, unit) VALUES (:recipe_id, :item_id, :quantity_per_person, :unit);'),
+                to_insert.to_dict('records')
             )
+        if not to_update.empty:
+            s.execute(
+                text('UPDATE recipe_ingredients SET quantity_per_person = :quantity_per_person, unit = :unit WHERE recipe_id = :recipe_id AND item_id = :item_id;'),
+                to_update.to_dict('records')
+            )
+        if not to_delete.empty:
+            s.execute(
+                text('DELETE FROM recipe_ingredients WHERE recipe_id = :recipe_id AND item_id = :item_id;'),
+                to_delete.to_dict('records')
+            )
+
+        # 5. Keep the per-slot requirements in step for planned meals that use a changed recipe
+        changed_recipes = sorted(set(to_insert['recipe_id']) | set(to_update['recipe_id']) | set(to_delete['recipe_id']))
+        for chunk in _chunks([int(rid) for rid in changed_recipes], RECIPE_BATCH_SIZE):
+            _refresh_menu_requirements(s, 'mp.recipe_id IN :recipe_ids', {'recipe_ids': chunk})
         s.commit()
-    st.cache_data.clear()
 
-def delete_recipe(recipe_id):
-    """Deletes a recipe and its ingredients from the database."""
+    summary.update(inserted=len(to_insert), updated=len(to_update), deleted=len(to_delete))
+    elapsed = time.perf_counter() - started
+    summary['elapsed_s'] = elapsed
+    summary['recipes_per_second'] = len(recipes) / elapsed if elapsed > 0 else float('inf')
+
+    touched = [table for table, dirty in (
+        ('recipes', summary['created'] + renamed),
+        ('recipe_ingredients', len(changed_recipes)),
+        ('menu_requirements', len(changed_recipes)),
+    ) if dirty]
+    if touched:
+        # Shared recipes reach every household's plans; private ones only their owner's
+        touches_shared = any(owners.get(rid) is None for rid in summary['recipe_ids'])
+        invalidate_tables(*touched, household_id=None if touches_shared else household_id)
+    if summary['created'] or renamed:
+        named = [(ids_by_name[name], name) for name in to_create] + [(row['id'], row['name']) for row in renames]
+        _update_search_index('recipes', add=[(rid, name, owners.get(rid, owner)) for rid, name in named])
+    return summary
+
+def save_recipe(recipe_id, recipe_name, ingredients_df, household_id=None):
+    """Adds a new recipe or updates an existing one, writing only the ingredient changes.
+
+    Raises ValueError when a new recipe's name is already taken.
+    """
+    return save_recipes([(recipe_id, recipe_name, ingredients_df)], household_id=household_id)['recipe_ids'][0]
+
+def delete_recipe(recipe_id, household_id=None):
+    """Deletes a recipe visible to the household, with its ingredients, from the database."""
+    household_id = current_household(household_id)
     conn = get_db_connection()
     with conn.session as s:
-        s.execute(text('DELETE FROM recipes WHERE recipe_id = :id;'), params={'id': recipe_id})
+        owners = _recipe_owners(s, [int(recipe_id)])
+        deleted = s.execute(
+            text(f'DELETE FROM recipes WHERE recipe_id = :id AND {_visible_recipes("recipes")};'),
+            params={'id': int(recipe_id), 'household': household_id}
+        ).rowcount
         s.commit()
-    st.cache_data.clear()
+    if deleted:
+        _update_search_index('recipes', remove=[int(recipe_id)])
+    # menu_plan (and so menu_requirements) rows cascade with the recipe, in every household for a shared one
+    scope = household_id if owners.get(int(recipe_id)) == household_id else None
+    invalidate_tables('recipes', 'recipe_ingredients', 'menu_plan', 'menu_requirements', household_id=scope)
 
 # -----------------------------------------------------------------------------
-# --- DASHBOARD & BASKET LOGIC ---
+# --- SEARCH (in-memory name index behind the pickers) ---
 # -----------------------------------------------------------------------------
 
-def get_low_stock_items():
-    """Fetches inventory items that are below a certain threshold."""
+# Seconds before an index is rebuilt, so names written by other processes show up
+SEARCH_INDEX_TTL = 600
+SEARCH_SOURCES = {
+    'stock_items': 'SELECT item_id, item_name FROM stock_items;',
+    'recipes': 'SELECT recipe_id, recipe_name, household_id FROM recipes;',
+}
+
+@st.cache_resource
+def _search_indexes():
+    """Process-wide {(backend, kind): SearchIndex}, shared by every session."""
+    return {}
+
+def _search_index(kind):
+    """The name index of `kind` for the active backend, built from the database on first use."""
     conn = get_db_connection()
-    return conn.query("""
-        SELECT si.item_name, i.quantity, i.unit
+    indexes = _search_indexes()
+    index = indexes.get((conn, kind))
+    if index is None or index.age() > SEARCH_INDEX_TTL:
+        with conn.session as s:
+            index = indexes[(conn, kind)] = SearchIndex(s.execute(text(SEARCH_SOURCES[kind])).fetchall())
+    return index
+
+def _update_search_index(kind, add=(), remove=()):
+    """Applies a write to an already built index; one not built yet reads the table when first used."""
+    index = _search_indexes().get((get_db_connection(), kind))
+    if index is None:
+        return
+    for doc_id in remove:
+        index.remove(doc_id)
+    for entry in add:
+        index.add(*entry)
+
+def search_stock_items(query, k=10):
+    """Top-k catalogue items for a typed query (prefix matches first, then fuzzy ones)."""
+    return pd.DataFrame(_search_index('stock_items').search(query, k), columns=['item_id', 'item_name', 'score'])
+
+def search_recipes(query, k=10, household_id=None):
+    """Top-k recipes visible to the household for a typed query."""
+    matches = _search_index('recipes').search(query, k, tags={None, current_household(household_id)})
+    return pd.DataFrame(matches, columns=['recipe_id', 'recipe_name', 'score'])
+
+def find_similar_stock_items(name, k=5):
+    """Catalogue items that look like the same thing as `name` ("Onions" vs "onion"), best first."""
+    return pd.DataFrame(_search_index('stock_items').near_duplicates(name, k=k), columns=['item_id', 'item_name', 'score'])
+
+def find_similar_recipes(name, k=5, household_id=None):
+    """Recipes visible to the household that look like the same dish as `name`, best first."""
+    matches = _search_index('recipes').near_duplicates(name, k=k, tags={None, current_household(household_id)})
+    return pd.DataFrame(matches, columns=['recipe_id', 'recipe_name', 'score'])
+
+# -----------------------------------------------------------------------------
+# --- MENU REQUIREMENTS (materialized slot -> item -> base quantity) ---
+# -----------------------------------------------------------------------------
+
+def _refresh_menu_requirements(s, where, params):
+    """Recomputes menu_requirements rows for the menu_plan slots matching `where` (alias `mp`).
+
+    Runs inside the caller's session so the requirements commit together with the change that caused them.
+    """
+    statement_params = [bindparam(name, expanding=True) for name, value in params.items() if isinstance(value, (list, tuple))]
+    s.execute(
+        text(f'DELETE FROM menu_requirements WHERE plan_id IN (SELECT mp.plan_id FROM menu_plan mp WHERE {where});').bindparams(*statement_params),
+        params
+    )
+    rows = s.execute(
+        text(f"""
+            SELECT mp.plan_id, ri.item_id, mp.num_persons, ri.quantity_per_person, ri.unit,
+                   si.base_unit, si.density_g_per_ml, si.piece_weight_g
+            FROM menu_plan mp
+            JOIN recipe_ingredients ri ON ri.recipe_id = mp.recipe_id
+            JOIN stock_items si ON ri.item_id = si.item_id
+            WHERE {where};
+        """).bindparams(*statement_params),
+        params
+    ).fetchall()
+    if not rows:
+        return
+    needed = pd.DataFrame(rows, columns=[
+        'plan_id', 'item_id', 'num_persons', 'quantity_per_person', 'unit', 'base_unit', 'density_g_per_ml', 'piece_weight_g'
+    ])
+    needed['required_qty'] = _base_quantities(
+        needed, needed['num_persons'].to_numpy(dtype=float) * needed['quantity_per_person'].to_numpy(dtype=float)
+    )
+    s.execute(
+        text('INSERT INTO menu_requirements (plan_id, item_id, required_qty) VALUES (:plan_id, :item_id, :required_qty);'),
+        needed[['plan_id', 'item_id', 'required_qty']].astype({'plan_id': int, 'item_id': int, 'required_qty': float}).to_dict('records')
+    )
+
+def rebuild_menu_requirements(since=None):
+    """Recomputes menu_requirements for every slot, or those dated `since` or later (e.g. after the menu was edited outside the app)."""
+    where, params = ('mp.meal_date >= :since', {'since': _iso_date(since)}) if since is not None else ('1 = 1', {})
+    conn = get_db_connection()
+    with conn.session as s:
+        _refresh_menu_requirements(s, where, params)
+        s.commit()
+    invalidate_tables('menu_requirements')
+
+@st.cache_resource
+def _bootstrap_menu_requirements():
+    """Rebuilds menu_requirements of this week on once per process, so rows loaded by SQL scripts are covered.
+
+    Older slots are history: they keep the requirements they had, so startup doesn't grow with it.
+    """
+    rebuild_menu_requirements(since=week_start())
+    return True
+
+def get_menu_requirements(start=None, end=None, household_id=None):
+    """Fetches the materialized requirements (base units) of the household's slots from `start` up to, not including, `end`.
+
+    Like get_menu_plan, a range read of the (household_id, meal_date, meal_time) index. Slots marked
+    cooked are left out: their ingredients were already deducted from stock.
+    """
+    household_id = current_household(household_id)
+    _bootstrap_menu_requirements()
+    start, end = _plan_range(start, end)
+    requirements = cached_query(f"""
+        SELECT mp.meal_date, mp.meal_time, r.recipe_name, si.item_name, si.base_unit, mr.required_qty
+        FROM menu_plan mp
+        JOIN menu_requirements mr ON mr.plan_id = mp.plan_id
+        JOIN recipes r ON mp.recipe_id = r.recipe_id
+        JOIN stock_items si ON mr.item_id = si.item_id
+        WHERE mp.household_id = :household AND mp.meal_date >= :start AND mp.meal_date < :end
+          AND NOT {COOKED_SLOT_SQL};
+    """, tables=('menu_plan', 'menu_requirements', 'recipes', 'stock_items', 'inventory_ledger'),
+        params={'household': household_id, 'start': start, 'end': end}, ttl=10, household_id=household_id)
+    return _dated_slots(requirements)
+
+# -----------------------------------------------------------------------------
+# --- DASHBOARD & BASKET LOGIC ---
+# -----------------------------------------------------------------------------
+
+def get_low_stock_items(household_id=None):
+    """Fetches inventory items below their reorder point (reads only the flagged rows)."""
+    household_id = current_household(household_id)
+    _bootstrap_low_stock_flags()
+    return cached_query(f"""
+        SELECT si.item_name, {CURRENT_QUANTITY_SQL} AS quantity, i.unit, i.reorder_point
         FROM inventory i
         JOIN stock_items si ON i.item_id = si.item_id
-        WHERE 
-            (i.unit IN ('kg', 'L') AND i.quantity < 0.25) OR
-            (i.unit IN ('g', 'ml') AND i.quantity < 100) OR
-            (i.unit = 'pcs' AND i.quantity <= 2);
-    """, ttl=30)
+        WHERE i.household_id = :household AND i.is_low = 1
+        ORDER BY si.item_name;
+    """, tables=('inventory', 'stock_items'), params={'household': household_id}, ttl=30, household_id=household_id)
+
+def _base_quantities(df, quantity):
+    """Converts `quantity` (aligned with `df` rows) into each item's stock base unit."""
+    values, _ = to_base_units(
+        quantity, df['unit'], df['base_unit'],
+        density=df['density_g_per_ml'], piece_weight=df['piece_weight_g']
+    )
+    return values
+
+def _from_base_quantities(df, values):
+    """Converts base-unit `values` (aligned with `df` rows) back into each row's `unit`; the inverse of _base_quantities."""
+    return from_base_units(
+        values, df['unit'], df['base_unit'],
+        density=df['density_g_per_ml'], piece_weight=df['piece_weight_g']
+    )
+
+def _stock_unit_conversions(item_names, inventory_df, stock_units):
+    """Per item of `item_names`, the unit it is shown and bought in plus what converting into it takes.
+
+    That is the inventory row's unit, or the stock item's unit (`stock_units`, by item name) for
+    items not in stock yet.
+    """
+    conversions = inventory_df.drop_duplicates('item_name').set_index('item_name').reindex(item_names)
+    conversions = conversions[['unit', 'base_unit', 'density_g_per_ml', 'piece_weight_g']].reset_index(drop=True)
+    stock_unit = pd.Series(item_names).map(stock_units).to_numpy(dtype=object)
+    conversions['unit'] = conversions['unit'].fillna(pd.Series(stock_unit))
+    conversions['base_unit'] = conversions['base_unit'].fillna(pd.Series(stock_unit))
+    return conversions
+
+def _group_lists(keys, values):
+    """Collects `values` into one list per distinct key (a fast groupby(...).agg(list))."""
+    if len(keys) == 0:
+        return pd.Series(dtype=object)
+    keys = keys.to_numpy(dtype=object)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    values = values.to_numpy(dtype=object)[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return pd.Series([chunk.tolist() for chunk in np.split(values, starts[1:])], index=keys[starts])
+
+def _available_base_quantities(inventory_df):
+    """Sums current inventory per item name in base units."""
+    available = _base_quantities(inventory_df, inventory_df['quantity'].to_numpy(dtype=float))
+    return pd.Series(available, index=inventory_df['item_name']).groupby(level=0).sum()
+
+def compute_menu_status(menu_df, recipes_df, inventory_df):
+    """Vectorized feasibility check of every menu slot against one inventory snapshot.
+
+    `recipes_df` holds one row per recipe ingredient with its `per_person_base` requirement (see
+    CatalogueModel.ingredient_frame); it only needs the recipes `menu_df` plans. Slots flagged in an
+    optional boolean `cooked` column are reported as cooked and not checked against stock.
+    Returns one row per slot of `menu_df` with `status`, `icon`, `missing` and `low_stock` columns.
+    Requirements and stock are both compared in the item's base unit.
+    """
+    slots = menu_df[['meal_date', 'meal_day', 'meal_time', 'recipe_id', 'recipe_name', 'num_persons']].reset_index(drop=True)
+    slots['slot'] = np.arange(len(slots))
+    cooked = menu_df['cooked'].to_numpy(dtype=bool) if 'cooked' in menu_df.columns else np.zeros(len(slots), dtype=bool)
+
+    needed = slots[~cooked].merge(recipes_df[['recipe_id', 'item_name', 'per_person_base']], on='recipe_id')
+    available_by_item = _available_base_quantities(inventory_df)
+
+    required = needed['num_persons'].to_numpy(dtype=float) * needed['per_person_base'].to_numpy(dtype=float)
+    available = needed['item_name'].map(available_by_item).fillna(0).to_numpy(dtype=float)
+    is_missing = available < required
+    is_low = ~is_missing & ((available - required) < (0.2 * available))
+
+    by_slot = slots['slot']
+    missing = _group_lists(needed.loc[is_missing, 'slot'], needed.loc[is_missing, 'item_name']).reindex(by_slot)
+    low_stock = _group_lists(needed.loc[is_low, 'slot'], needed.loc[is_low, 'item_name']).reindex(by_slot)
+    slots['missing'] = [items if isinstance(items, list) else [] for items in missing]
+    slots['low_stock'] = [items if isinstance(items, list) else [] for items in low_stock]
+
+    missing_text = np.array([', '.join(items) for items in slots['missing']], dtype=object)
+    low_text = np.array([', '.join(items) for items in slots['low_stock']], dtype=object)
+    conditions = [cooked, ~by_slot.isin(needed['slot']).to_numpy(), missing_text != '', low_text != '']
+    slots['status'] = np.select(
+        conditions,
+        ["Cooked", "Recipe not found", "Missing: " + missing_text, "Low Stock: " + low_text],
+        default="Available"
+    )
+    slots['icon'] = np.select(conditions, ["🍽️", "❓", "❌", "⚠️"], default="✅")
+    return slots.drop(columns='slot')
+
+def _cooked_slots_of(menu_df, household_id=None):
+    """Boolean mask of the dated slots of `menu_df` already marked cooked."""
+    dates = menu_df['meal_date'].dropna()
+    if dates.empty:
+        return np.zeros(len(menu_df), dtype=bool)
+    cooked = get_cooked_slots(dates.min(), dates.max() + datetime.timedelta(days=1), household_id)
+    keys = pd.MultiIndex.from_frame(menu_df[['meal_date', 'meal_time']])
+    return keys.isin(pd.MultiIndex.from_frame(cooked[['meal_date', 'meal_time']]))
 
-def check_dish_status(dish_name, num_persons):
+def check_menu_status(menu_df, household_id=None):
+    """Checks every slot of a menu plan with one inventory fetch; ingredients come from the read model."""
+    ingredients = get_read_model().ingredient_frame(menu_df['recipe_id'].dropna().unique())
+    menu_df = menu_df.assign(cooked=_cooked_slots_of(menu_df, household_id))
+    return compute_menu_status(menu_df, ingredients, get_inventory(household_id))
+
+def check_dish_status(dish_name, num_persons, household_id=None):
     """Checks if a single dish can be made and returns a status tuple."""
-    conn = get_db_connection()
-    recipe_df = conn.query(
-        "SELECT si.item_name, ri.quantity_per_person, ri.unit FROM recipe_ingredients ri JOIN stock_items si ON ri.item_id = si.item_id JOIN recipes r ON ri.recipe_id = r.recipe_id WHERE r.recipe_name = :dish;",
-        params={'dish': dish_name}
+    recipe_id = get_read_model().recipe_id(dish_name, current_household(household_id))
+    menu_df = pd.DataFrame([{
+        'meal_date': None, 'meal_day': None, 'meal_time': None, 'recipe_id': -1 if recipe_id is None else recipe_id,
+        'recipe_name': dish_name, 'num_persons': num_persons
+    }])
+    row = check_menu_status(menu_df, household_id).iloc[0]
+    return row['status'], row['icon']
+
+def get_all_recipe_ingredients(household_id=None):
+    """Every ingredient of every recipe the household can use (shared; callers must not mutate it)."""
+    return get_read_model().household_ingredients(current_household(household_id))
+
+def get_recipe_matrix(household_id=None):
+    """Sparse requirement matrix of every recipe the household can use, rebuilt only when recipes or items change."""
+    return get_read_model().recipe_matrix(current_household(household_id))
+
+def _recipe_stock(household_id=None):
+    """(matrix, current stock aligned with its columns), with the alignment cached until stock changes."""
+    household_id = current_household(household_id)
+    matrix = get_recipe_matrix(household_id)
+    cached_matrix, stock = cached_value(
+        ('recipe_stock', household_id), ('inventory', 'stock_items', 'recipe_ingredients', 'recipes'),
+        lambda: (matrix, matrix.stock_vector(_available_base_quantities(get_inventory(household_id)))),
+        ttl=30, household_id=household_id
+    )
+    if cached_matrix is not matrix:
+        # The matrix was rebuilt (ttl) since this vector was aligned
+        stock = matrix.stock_vector(_available_base_quantities(get_inventory(household_id)))
+    return matrix, stock
+
+def get_cookable_recipes(persons, max_missing=None, limit=None, household_id=None):
+    """Ranks every recipe the household can use by how cookable it is from current stock for `persons`.
+
+    Fully makeable recipes come first, then those missing one ingredient, and so on (see RecipeMatrix.rank).
+    """
+    matrix, stock = _recipe_stock(household_id)
+    return matrix.rank(stock, persons, max_missing=max_missing, limit=limit)
+
+def get_recipes_using(item_names, persons, limit=None, household_id=None):
+    """Recipes that use any of `item_names` (e.g. stock about to expire), most cookable first.
+
+    Among equally cookable recipes, the ones using more of those items (`uses`, base units for
+    `persons`) come first.
+    """
+    matrix, stock = _recipe_stock(household_id)
+    uses = matrix.recipes_using(item_names).groupby('recipe_id')['per_person'].sum() * persons
+    ranked = matrix.rank(stock, persons, recipe_ids=uses.index)
+    ranked['uses'] = ranked['recipe_id'].map(uses).to_numpy(dtype=float)
+    ranked = ranked.sort_values(['missing_count', 'uses'], ascending=[True, False], kind='stable').reset_index(drop=True)
+    return ranked if limit is None else ranked.head(limit)
+
+def generate_menu_plan(persons=2, no_repeat_days=NO_REPEAT_DAYS, seed=None, start=None, household_id=None):
+    """Proposes a recipe for every empty slot of the week from `start` (default this week's Monday), keeping the shortfall low.
+
+    Days already past are left as they are. Nothing is written; pass the result to `set_menu_slots`
+    to keep it (see planner.plan_week).
+    """
+    start = start or week_start()
+    dates = [day for day in plan_dates(start, 7) if day >= datetime.date.today()]
+    # Slots a few days either side count towards variety, so a dish doesn't repeat across the week boundary
+    margin = datetime.timedelta(days=int(no_repeat_days))
+    planned = get_menu_plan(start - margin, start + datetime.timedelta(days=7) + margin, household_id=household_id)
+    # Cooked slots still count towards variety, but their ingredients already left stock
+    planned.loc[_cooked_slots_of(planned, household_id), 'num_persons'] = 0
+    matrix, stock = _recipe_stock(household_id)
+    return plan_week(matrix, stock.copy(), planned, dates, persons, no_repeat_days, seed)
+
+def compute_basket(menu_df, recipes_df, inventory_df, meal_dates):
+    """Calculates the shopping list for the given dates from the full menu and recipe join.
+
+    Used where the materialized requirements aren't available (e.g. benchmarks); the Prep Basket
+    page runs the database-side aggregate of `get_basket_items` instead.
+    """
+    upcoming_meals_df = menu_df[menu_df['meal_date'].isin(meal_dates)]
+    if upcoming_meals_df.empty:
+        return pd.DataFrame()
+
+    needed_df = pd.merge(upcoming_meals_df, recipes_df, on='recipe_name')
+    needed_df['required_qty'] = _base_quantities(
+        needed_df, needed_df['num_persons'].to_numpy(dtype=float) * needed_df['quantity_per_person'].to_numpy(dtype=float)
+    )
+    return compute_basket_from_requirements(needed_df, inventory_df)
+
+def compute_basket_from_requirements(requirements_df, inventory_df):
+    """Subtracts current stock from per-slot requirements (base units) to build the shopping list.
+
+    `shortfall` is expressed in the unit the item is stocked in, so it can be added straight to inventory.
+    """
+    if requirements_df.empty:
+        return pd.DataFrame()
+
+    # 1. Aggregate total requirements per item
+    required_agg = requirements_df.groupby('item_name').agg(
+        total_required=('required_qty', 'sum'),
+        stock_unit=('base_unit', 'first')
+    ).reset_index()
+
+    # 2. Compare with current inventory (also in base units) to find shortfall
+    available_by_item = _available_base_quantities(inventory_df)
+    required_agg['quantity'] = required_agg['item_name'].map(available_by_item).fillna(0).to_numpy(dtype=float)
+    required_agg['shortfall_base'] = required_agg['total_required'] - required_agg['quantity']
+    _, required_agg['base_unit'] = to_base_units(0.0, required_agg['stock_unit'])
+
+    # 3. Filter for items you need to buy, expressed in the unit the item is stocked in
+    basket_df = required_agg[required_agg['shortfall_base'] > 0].copy()
+    conversions = _stock_unit_conversions(
+        basket_df['item_name'], inventory_df, basket_df.set_index('item_name')['stock_unit']
+    )
+    basket_df['unit'] = conversions['unit'].to_numpy()
+    basket_df['shortfall'] = _from_base_quantities(conversions, basket_df['shortfall_base'].to_numpy())
+
+    # 4. List contributing dishes only for the items that made it into the basket
+    contributing = requirements_df.loc[requirements_df['item_name'].isin(basket_df['item_name']), ['item_name', 'recipe_name']]
+    contributing = contributing.drop_duplicates()
+    dishes = _group_lists(contributing['item_name'], contributing['recipe_name'])
+    basket_df['dishes'] = basket_df['item_name'].map(dishes)
+    return basket_df.drop(columns='stock_unit')
+
+def get_depletion_forecast(horizon_days, start_date=None, household_id=None):
+    """Forecasts when the household's planned meals exhaust each item over the next `horizon_days`.
+
+    Quantities (`stock`, `needed_by_then`, `to_buy`) are converted back to the unit each item is stocked in.
+    """
+    household_id = current_household(household_id)
+    start_date = start_date or datetime.date.today()
+    end_date = start_date + datetime.timedelta(days=int(horizon_days))
+    # The two reads are independent, so they are fetched at the same time
+    inputs = load_datasets({
+        'inventory': (get_inventory, household_id),
+        'requirements': (get_menu_requirements, start_date, end_date, household_id),
+    })
+    if inputs.errors:
+        raise next(iter(inputs.errors.values()))
+    inventory_df, requirements_df = inputs['inventory'], inputs['requirements']
+    result = forecast_depletion(requirements_df, _available_base_quantities(inventory_df), horizon_days, start_date)
+    if result.empty:
+        return result.assign(unit=pd.Series(dtype=object))
+
+    # Shown and purchased in the inventory's unit, or the stock item's unit for items not in stock yet
+    stock_units = requirements_df.drop_duplicates('item_name').set_index('item_name')['base_unit']
+    conversions = _stock_unit_conversions(result['item_name'], inventory_df, stock_units)
+    result['unit'] = conversions['unit'].to_numpy()
+    for column in ('stock', 'horizon_required', 'needed_by_then', 'to_buy'):
+        result[column] = _from_base_quantities(conversions, result[column].to_numpy(dtype=float))
+    return result
+
+# Separates the dish names of an item in the basket query's aggregated list
+DISH_SEPARATOR = '\x1f'
+# Consumption above stock by less than this is rounding, not a shortfall (as in forecast_depletion)
+SHORTFALL_TOLERANCE = 1e-9
+
+def _basket_sql(conn):
+    """The shopping list as one aggregate statement over the horizon's slots not cooked yet (see get_basket_items).
+
+    Requirements are summed per item and slot (each slot plans one dish), accumulated in time
+    order with a window and set against the item's current stock in base units. Grouping by item
+    keeps the items whose horizon total exceeds their stock, with the slot at which they run out
+    and the dishes that call for them.
+    """
+    meal_order = ' '.join(f"WHEN '{meal}' THEN {order}" for order, meal in enumerate(MEALS))
+    available = _base_quantity_sql('held.quantity', 'held.unit', 'held.base_unit', 'held.density_g_per_ml', 'held.piece_weight_g')
+    runs_out = f"consumed > available + {SHORTFALL_TOLERANCE} AND consumed - slot_required <= available + {SHORTFALL_TOLERANCE}"
+    return f"""
+        WITH needed AS (
+            SELECT mr.item_id, mp.meal_date, mp.meal_time, CASE mp.meal_time {meal_order} END AS meal_order,
+                   r.recipe_name, SUM(mr.required_qty) AS slot_required
+            FROM menu_plan mp
+            JOIN menu_requirements mr ON mr.plan_id = mp.plan_id
+            JOIN recipes r ON r.recipe_id = mp.recipe_id
+            WHERE mp.household_id = :household AND mp.meal_date >= :start AND mp.meal_date < :end
+              AND mr.required_qty IS NOT NULL AND NOT {COOKED_SLOT_SQL}
+            GROUP BY mr.item_id, mp.meal_date, mp.meal_time, r.recipe_name
+        ),
+        stock AS (
+            SELECT held.item_id, held.item_name, COALESCE(held.unit, held.base_unit) AS unit, held.base_unit,
+                   held.density_g_per_ml, held.piece_weight_g, COALESCE({available}, 0) AS available
+            FROM (
+                SELECT si.item_id, si.item_name, si.base_unit, si.density_g_per_ml, si.piece_weight_g, i.unit, {CURRENT_QUANTITY_SQL} AS quantity
+                FROM (SELECT DISTINCT item_id FROM needed) n
+                JOIN stock_items si ON si.item_id = n.item_id
+                LEFT JOIN inventory i ON i.item_id = n.item_id AND i.household_id = :household
+            ) held
+        ),
+        running AS (
+            SELECT s.item_id, s.item_name, s.unit, s.base_unit, s.density_g_per_ml, s.piece_weight_g, s.available, n.meal_date, n.meal_time, n.meal_order, n.recipe_name, n.slot_required,
+                   SUM(n.slot_required) OVER (PARTITION BY n.item_id ORDER BY n.meal_date, n.meal_order ROWS UNBOUNDED PRECEDING) AS consumed,
+                   ROW_NUMBER() OVER (PARTITION BY n.item_id, n.recipe_name ORDER BY n.meal_date, n.meal_order) AS dish_use
+            FROM needed n
+            JOIN stock s ON s.item_id = n.item_id
+        )
+        SELECT item_name, unit, base_unit, density_g_per_ml, piece_weight_g, available AS stock, MAX(consumed) AS horizon_required,
+               MAX(CASE WHEN {runs_out} THEN meal_date END) AS runs_out_on,
+               MAX(CASE WHEN {runs_out} THEN meal_time END) AS runs_out_meal,
+               MAX(CASE WHEN {runs_out} THEN meal_order END) AS runs_out_order,
+               MAX(CASE WHEN {runs_out} THEN consumed END) - available AS needed_by_then,
+               MAX(consumed) - available AS shortfall,
+               {conn.group_concat("CASE WHEN dish_use = 1 THEN recipe_name END", DISH_SEPARATOR)} AS dishes
+        FROM running
+        GROUP BY item_id, item_name, unit, base_unit, density_g_per_ml, piece_weight_g, available
+        HAVING MAX(consumed) > available + {SHORTFALL_TOLERANCE}
+        ORDER BY runs_out_on, runs_out_order, item_name;
+    """
+
+def get_basket_items(horizon_days, household_id=None):
+    """Calculates the shopping list for the planning horizon, ordered by when each item runs out.
+
+    The database walks the planned slots and returns only the items to buy, each with the meal at
+    which it runs out; quantities come back in the unit the item is stocked in.
+    """
+    household_id = current_household(household_id)
+    _bootstrap_menu_requirements()
+    start_date = datetime.date.today()
+    end_date = start_date + datetime.timedelta(days=int(horizon_days))
+    basket_df = cached_query(
+        _basket_sql(get_db_connection()),
+        tables=('menu_plan', 'menu_requirements', 'recipes', 'stock_items', 'inventory', 'inventory_ledger'),
+        params=dict(zip(('start', 'end'), _plan_range(start_date, end_date)), household=household_id),
+        ttl=10, household_id=household_id
     )
-    if recipe_df.empty: return "Recipe not found", "❓"
-
-    inventory_df = get_inventory()
-    inventory_map = {row['item_name']: row['quantity'] for _, row in inventory_df.iterrows()}
-
-    missing, low_stock = [], []
-    for _, ing in recipe_df.iterrows():
-        required = ing['quantity_per_person'] * num_persons
-        available = inventory_map.get(ing['item_name'], 0)
-        
-        # NOTE: Assumes consistent units. A more robust check would convert to base units first.
-        if available < required:
-            missing.append(ing['item_name'])
-        elif (available - required) < (0.2 * available):
-            low_stock.append(ing['item_name'])
-            
-    if missing: return f"Missing: {', '.join(missing)}", "❌"
-    if low_stock: return f"Low Stock: {', '.join(low_stock)}", "⚠️"
-    return "Available", "✅"
-
-def get_all_recipe_ingredients():
-    """Fetches a DataFrame with all ingredients for all recipes."""
-    conn = get_db_connection()
-    return conn.query("""
-        SELECT r.recipe_name, si.item_name, ri.quantity_per_person, ri.unit
-        FROM recipe_ingredients ri
-        JOIN recipes r ON ri.recipe_id = r.recipe_id
-        JOIN stock_items si ON ri.item_id = si.item_id;
-    """, ttl=30)
\ No newline at end of file
+    basket_df['runs_out_on'] = pd.to_datetime(basket_df['runs_out_on']).dt.date
+    basket_df['dishes'] = [dishes.split(DISH_SEPARATOR) for dishes in basket_df['dishes']]
+    for column in ('stock', 'horizon_required', 'needed_by_then', 'shortfall'):
+        basket_df[column] = _from_base_quantities(basket_df, basket_df[column].to_numpy(dtype=float))
+    return basket_df.drop(columns=['runs_out_order', 'base_unit', 'density_g_per_ml', 'piece_weight_g'])
@@ -1,5 +1,200 @@
+# db_connector.py
+
+import os
+from abc import ABC, abstractmethod
+
 import streamlit as st
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from instrumentation import instrument_engine
+
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Database", "create_database_sqlite.sql")
+# Longest string GROUP_CONCAT returns on MySQL (e.g. the dish list of a basket item)
+GROUP_CONCAT_MAX_LEN = 1 << 20
+
+# -----------------------------------------------------------------------------
+# --- STORAGE BACKENDS ---
+# -----------------------------------------------------------------------------
+
+class StorageBackend(ABC):
+    """A SQLAlchemy engine plus the few statements whose syntax differs between databases.
+
+    Exposes the same `engine` / `session` surface as `st.connection(..., type="sql")`, so the
+    data layer talks to every backend the same way.
+    """
+
+    dialect = None
+    # Reads the backend serves at the same time (see loader.py); 1 = one after another
+    read_concurrency = 1
+
+    def __init__(self, engine):
+        self.engine = engine
+        # Statement latency and round trips for the diagnostics page (sampled)
+        instrument_engine(engine)
+
+    @property
+    def session(self):
+        """A new ORM session; use as `with conn.session as s: ...`."""
+        return Session(self.engine)
+
+    @abstractmethod
+    def insert_ignore(self, table, columns):
+        """INSERT that silently skips rows violating a unique key. Parameters are named after the columns."""
+
+    @abstractmethod
+    def upsert(self, table, columns, key_columns, update=(), increment=()):
+        """INSERT that, on a unique-key clash, overwrites `update` columns and adds to `increment` columns."""
+
+    @abstractmethod
+    def group_concat(self, expression, separator):
+        """Aggregate joining a group's `expression` values into one string, `separator` between them."""
+
+    @staticmethod
+    def _values(columns):
+        return f"({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+
+class MySQLBackend(StorageBackend):
+    """MySQL/MariaDB over a pooled engine."""
+
+    dialect = 'mysql'
+
+    def __init__(self, url, pool_size=5, max_overflow=10, pool_recycle=1800, pool_timeout=30):
+        # Concurrent page loads stay within the connections the pool keeps open
+        self.read_concurrency = pool_size
+        super().__init__(create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True,
+        ))
+
+        @event.listens_for(self.engine, "connect")
+        def _configure(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            # GROUP_CONCAT truncates at 1024 bytes by default
+            cursor.execute(f"SET SESSION group_concat_max_len = {GROUP_CONCAT_MAX_LEN};")
+            cursor.close()
+
+    @classmethod
+    def from_secrets(cls, connection, storage):
+        """Builds the backend from the `[connections.mysql]` and `[storage]` secrets sections."""
+        url = URL.create(
+            drivername=f"{connection.get('dialect', 'mysql')}+{connection.get('driver', 'pymysql')}",
+            username=connection.get('username'),
+            password=connection.get('password'),
+            host=connection.get('host', 'localhost'),
+            port=int(connection.get('port', 3306)),
+            database=connection.get('database'),
+            query=dict(connection.get('query', {})),
+        )
+        return cls(
+            url,
+            pool_size=int(storage.get('pool_size', 5)),
+            max_overflow=int(storage.get('max_overflow', 10)),
+            pool_recycle=int(storage.get('pool_recycle', 1800)),
+            pool_timeout=int(storage.get('pool_timeout', 30)),
+        )
+
+    def insert_ignore(self, table, columns):
+        return f"INSERT IGNORE INTO {table} {self._values(columns)};"
+
+    def upsert(self, table, columns, key_columns, update=(), increment=()):
+        assignments = [f"{c} = VALUES({c})" for c in update] + [f"{c} = {c} + VALUES({c})" for c in increment]
+        return f"INSERT INTO {table} {self._values(columns)} ON DUPLICATE KEY UPDATE {', '.join(assignments)};"
+
+    def group_concat(self, expression, separator):
+        return f"GROUP_CONCAT({expression} SEPARATOR '{separator}')"
+
+class SQLiteBackend(StorageBackend):
+    """In-process SQLite database for offline runs, local mode and benchmarks.
+
+    `path=":memory:"` keeps everything in RAM behind a single shared connection, so its reads run
+    one after another; a database file is read over pooled connections (WAL lets readers overlap).
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path=":memory:", create_schema=True):
+        self.path = path
+        if path == ":memory:":
+            engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={'check_same_thread': False})
+        else:
+            engine = create_engine(f"sqlite:///{path}", connect_args={'check_same_thread': False, 'timeout': 30})
+            self.read_concurrency = engine.pool.size()
+
+        @event.listens_for(engine, "connect")
+        def _configure(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys = ON;")
+            if path != ":memory:":
+                cursor.execute("PRAGMA journal_mode = WAL;")
+            cursor.close()
+
+        super().__init__(engine)
+        if create_schema:
+            self.create_schema()
+
+    def create_schema(self):
+        """Creates any missing tables from the SQLite schema script."""
+        with open(SQLITE_SCHEMA, encoding="utf-8") as f:
+            script = f.read()
+        raw = self.engine.raw_connection()
+        try:
+            raw.driver_connection.executescript(script)
+            raw.commit()
+        finally:
+            raw.close()
+
+    def insert_ignore(self, table, columns):
+        return f"INSERT OR IGNORE INTO {table} {self._values(columns)};"
+
+    def upsert(self, table, columns, key_columns, update=(), increment=()):
+        assignments = [f"{c} = excluded.{c}" for c in update] + [f"{c} = {table}.{c} + excluded.{c}" for c in increment]
+        return (
+            f"INSERT INTO {table} {self._values(columns)} "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(assignments)};"
+        )
+
+    def group_concat(self, expression, separator):
+        return f"group_concat({expression}, '{separator}')"
+
+# -----------------------------------------------------------------------------
+# --- BACKEND SELECTION ---
+# -----------------------------------------------------------------------------
+
+_backend_override = None
+
+def _secrets_section(name):
+    """Reads a secrets section, treating a missing secrets.toml as empty."""
+    try:
+        return dict(st.secrets.get(name, {}))
+    except Exception:
+        return {}
+
+def create_backend(storage=None):
+    """Creates the backend named by `INMYFRIDGE_BACKEND` or `[storage] backend` (default: mysql)."""
+    storage = storage if storage is not None else _secrets_section('storage')
+    backend = os.environ.get('INMYFRIDGE_BACKEND', storage.get('backend', 'mysql')).lower()
+    if backend == 'sqlite':
+        return SQLiteBackend(os.environ.get('INMYFRIDGE_SQLITE_PATH', storage.get('sqlite_path', ':memory:')))
+    if backend == 'mysql':
+        return MySQLBackend.from_secrets(_secrets_section('connections').get('mysql', {}), storage)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def use_backend(backend):
+    """Routes all data access to `backend` (benchmarks, CLI tools); pass None to go back to the configured one."""
+    global _backend_override
+    _backend_override = backend
 
 @st.cache_resource
+def _configured_backend():
+    return create_backend()
+
 def get_db_connection():
-    return st.connection("mysql", type="sql")
\ No newline at end of file
+    if _backend_override is not None:
+        return _backend_override
+    return _configured_backend()
@@ -0,0 +1,96 @@
+# diagnostics.py
+
+import json
+
+import streamlit as st
+import pandas as pd
+from instrumentation import get_metrics, prometheus_text
+from query_cache import get_query_cache
+from read_model import get_read_model
+from write_queue import get_write_queue
+
+st.set_page_config(page_title="Diagnostics", layout="wide")
+st.title("🩺 Diagnostics")
+
+metrics = get_metrics()
+
+# --- SAMPLING ---
+c1, c2 = st.columns([0.7, 0.3])
+rate = c1.slider(
+    "Sample rate (share of page reruns measured, for every session in this process)",
+    min_value=0.0, max_value=1.0, value=float(metrics.sample_rate), step=0.05, key="metrics_sample_rate"
+)
+if rate != metrics.sample_rate:
+    metrics.sample_rate = rate
+if c2.button("↺ Reset Counters", use_container_width=True):
+    metrics.reset()
+    st.rerun()
+
+snapshot = metrics.snapshot()
+st.caption(f"Counting since {pd.Timestamp(snapshot['since'], unit='s'):%d %b %H:%M:%S} (UTC), at a sample rate of {snapshot['sample_rate']:.0%}.")
+
+# --- PAGES ---
+st.header("Page Reruns")
+pages_df = pd.DataFrame(snapshot['pages'], columns=['page', 'reruns', 'mean_ms', 'max_ms', 'round_trips_per_rerun', 'max_round_trips'])
+if pages_df.empty:
+    st.info("No sampled page reruns yet.")
+else:
+    st.dataframe(pages_df, hide_index=True, use_container_width=True, column_config={
+        'page': "Page",
+        'reruns': "Sampled reruns",
+        'mean_ms': st.column_config.NumberColumn("Mean (ms)", format="%.1f"),
+        'max_ms': st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+        'round_trips_per_rerun': st.column_config.NumberColumn("DB round trips / rerun", format="%.1f"),
+        'max_round_trips': "Max round trips",
+    })
+
+# --- QUERIES ---
+st.header("Queries")
+queries_df = pd.DataFrame(snapshot['queries'], columns=[
+    'label', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'rows', 'errors', 'cache_hits', 'cache_misses'
+])
+if queries_df.empty:
+    st.info("No sampled queries yet.")
+else:
+    lookups = queries_df['cache_hits'] + queries_df['cache_misses']
+    queries_df['hit_rate'] = (queries_df['cache_hits'] / lookups.where(lookups > 0)).astype(float)
+    st.dataframe(queries_df, hide_index=True, use_container_width=True, column_config={
+        'label': st.column_config.TextColumn("Statement", width="large"),
+        'calls': "Round trips",
+        'total_ms': st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+        'mean_ms': st.column_config.NumberColumn("Mean (ms)", format="%.2f"),
+        'max_ms': st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+        'rows': "Rows",
+        'errors': "Errors",
+        'cache_hits': "Cache hits",
+        'cache_misses': "Cache misses",
+        'hit_rate': st.column_config.ProgressColumn("Hit rate", min_value=0.0, max_value=1.0, format="percent"),
+    })
+
+# --- RESULT CACHE ---
+with st.expander("🗄️ Result Cache by Table (every lookup, not sampled)"):
+    cache_stats = get_query_cache().stats()
+    entries = cache_stats.pop('entries')
+    st.caption(f"{entries} cached result(s).")
+    st.dataframe(pd.DataFrame.from_dict(cache_stats, orient='index'), use_container_width=True)
+    model = get_read_model()
+    st.caption(
+        f"Catalogue read model: {int(model.item_exists.sum())} item(s), {int((model.recipe_owner >= 0).sum())} recipe(s), "
+        f"{len(model.ing_item)} ingredient(s) in {model.nbytes() / 2**20:.1f} MB, built {model.age():.0f} s ago."
+    )
+    queue_stats = get_write_queue().stats
+    st.caption(
+        f"Stock write queue: {queue_stats['queued']} change(s) queued, written as {queue_stats['written']} "
+        f"in {queue_stats['flushes']} transaction(s); {queue_stats['conflicts']} conflict(s)."
+    )
+
+# --- EXPORT ---
+d1, d2 = st.columns(2)
+d1.download_button(
+    "⬇️ JSON Snapshot", json.dumps(snapshot, indent=2), file_name="inmyfridge_metrics.json",
+    mime="application/json", use_container_width=True
+)
+d2.download_button(
+    "⬇️ Prometheus Text", prometheus_text(snapshot), file_name="inmyfridge_metrics.prom",
+    mime="text/plain", use_container_width=True
+)
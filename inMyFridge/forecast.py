@@ -0,0 +1,82 @@
+# forecast.py
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEALS = ["Breakfast", "Lunch", "Dinner"]
+
+def week_start(day=None):
+    """The Monday of the week `day` (default today) falls in."""
+    day = day or datetime.date.today()
+    return day - datetime.timedelta(days=day.weekday())
+
+def plan_dates(start, days):
+    """The `days` consecutive dates from `start`."""
+    return [start + datetime.timedelta(days=offset) for offset in range(days)]
+
+def build_timeline(horizon_days, start_date=None):
+    """Lists every meal slot from `start_date` (default today) over the next `horizon_days`, in time order."""
+    start_date = start_date or datetime.date.today()
+    return pd.DataFrame({
+        'date': np.repeat(plan_dates(start_date, horizon_days), len(MEALS)),
+        'meal_time': np.tile(MEALS, horizon_days),
+    })
+
+def forecast_depletion(requirements_df, stock_by_item, horizon_days=2, start_date=None):
+    """Walks the planned meals over the horizon and finds when each item's stock runs out.
+
+    `requirements_df` has one row per (meal_date, meal_time, item_name) with `required_qty` in base
+    units (see database_utils.get_menu_requirements); `stock_by_item` maps item_name to available base
+    quantity. Consumption is accumulated with a cumulative sum over a slots x items matrix, so the
+    whole horizon is evaluated at once. Returns one row per item needed within the horizon with the
+    first slot where stock goes negative, the quantity needed by then and the total to buy.
+    """
+    start_date = start_date or datetime.date.today()
+    timeline = build_timeline(horizon_days, start_date)
+    columns = ['item_name', 'stock', 'horizon_required', 'runs_out', 'runs_out_on', 'runs_out_meal',
+               'needed_by_then', 'to_buy', 'dishes']
+    if requirements_df.empty or timeline.empty:
+        # runs_out stays boolean so callers can filter on it
+        return pd.DataFrame(columns=columns).astype({'runs_out': bool})
+
+    # 1. Position of each requirement on the timeline (day offset x meal); slots outside it are dropped
+    item_codes, items = pd.factorize(requirements_df['item_name'])
+    day_offsets = (pd.to_datetime(requirements_df['meal_date']) - pd.Timestamp(start_date)).dt.days.to_numpy()
+    meal_codes = pd.Categorical(requirements_df['meal_time'], categories=MEALS).codes
+    valid = (day_offsets >= 0) & (day_offsets < horizon_days) & (meal_codes >= 0)
+    slot_codes = day_offsets * len(MEALS) + meal_codes
+
+    # 2. Accumulate consumption in time order over a slots x items matrix
+    demand = np.zeros((len(timeline), len(items)))
+    np.add.at(demand, (slot_codes[valid], item_codes[valid]), requirements_df['required_qty'].to_numpy(dtype=float)[valid])
+    consumed = np.cumsum(demand, axis=0)
+    stock = pd.Series(stock_by_item, dtype=float).reindex(items).fillna(0).to_numpy()
+
+    # 3. First slot where cumulative consumption exceeds stock
+    short = consumed > stock + 1e-9
+    runs_out = short.any(axis=0)
+    first_slot = short.argmax(axis=0)
+    needed_by_then = consumed[first_slot, np.arange(len(items))] - stock
+    horizon_required = consumed[-1]
+
+    result = pd.DataFrame({
+        'item_name': items,
+        'stock': stock,
+        'horizon_required': horizon_required,
+        'runs_out': runs_out,
+        'runs_out_on': np.where(runs_out, timeline['date'].to_numpy()[first_slot], None),
+        'runs_out_meal': np.where(runs_out, timeline['meal_time'].to_numpy()[first_slot], None),
+        'needed_by_then': np.where(runs_out, needed_by_then, 0.0),
+        'to_buy': np.maximum(horizon_required - stock, 0.0),
+    })
+
+    # 4. Dishes that draw on each item within the horizon
+    contributing = requirements_df.loc[valid, ['item_name', 'recipe_name']].drop_duplicates()
+    dishes = contributing.groupby('item_name', sort=False)['recipe_name'].agg(list)
+    result['dishes'] = result['item_name'].map(dishes)
+
+    result = result[horizon_required > 0]
+    return result.sort_values(['runs_out', 'runs_out_on'], ascending=[False, True], na_position='last')[columns]
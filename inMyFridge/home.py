@@ -2,18 +2,87 @@
 
 import streamlit as st
 import datetime
-from database_utils import get_menu_plan, get_low_stock_items, check_dish_status
+import pandas as pd
+from database_utils import (
+    get_menu_plan, get_low_stock_items, check_menu_status, get_depletion_forecast,
+    get_inventory, get_cookable_recipes, get_recipes_using, get_cooked_slots, mark_meal_cooked, get_expiring_lots
+)
+from utils import build_week_grid, load_failed
+from instrumentation import page_fragment
+from loader import load_datasets
+
+FORECAST_DAYS = 7
+SUGGESTIONS = 8
+EXPIRING_LOTS = 15
 
 st.set_page_config(page_title="inMyFridge Home", layout="wide")
 st.title("Welcome to inMyFridge 🏠")
 
 # --- DATA FETCHING ---
-menu_df = get_menu_plan()
-low_stock_df = get_low_stock_items()
-today_name = datetime.datetime.now().strftime('%A')
+# The independent datasets load concurrently; a section whose data didn't load shows a warning.
+# The menu is this week's range of the calendar, the forecast the next week's.
+today = datetime.date.today()
+data = load_datasets({
+    'menu': get_menu_plan,
+    'low_stock': get_low_stock_items,
+    'forecast': (get_depletion_forecast, FORECAST_DAYS),
+    'cooked_slots': get_cooked_slots,
+})
+
+# Check every planned slot at once (one inventory and one ingredient fetch for the whole week);
+# the inventory was just cached by the forecast
+status_df = check_menu_status(data['menu']) if 'menu' in data else None
+
+# "What Can I Make Now?" Widget: every recipe ranked against current stock.
+# A fragment, so changing the persons or the ingredient reruns only this widget.
+@page_fragment("Home")
+def what_can_i_make():
+    with st.container(border=True):
+        st.header("What Can I Make Now? 🍳")
+        persons = st.number_input("Cooking for", min_value=1, step=1, value=2, key="suggest_persons")
+        stocked_items = get_inventory()['item_name'].sort_values().tolist()
+        use_up = st.selectbox("Use up an ingredient", ["— Any —"] + stocked_items, key="suggest_use_up")
+
+        if use_up == "— Any —":
+            suggestions = get_cookable_recipes(persons, max_missing=1, limit=SUGGESTIONS)
+        else:
+            suggestions = get_recipes_using([use_up], persons, limit=SUGGESTIONS)
+
+        if suggestions.empty and use_up != "— Any —":
+            st.info(f"No recipes use {use_up}.")
+        elif suggestions.empty:
+            st.info("Nothing is within one ingredient of cookable yet. Time to restock!")
+        else:
+            st.dataframe(pd.DataFrame({
+                'Dish': suggestions['recipe_name'],
+                # `missing` is only filled in for nearly makeable recipes
+                'Status': [
+                    "✅ Ready" if count == 0 else "❌ Missing: " + ", ".join(missing) if missing else f"❌ {count} missing"
+                    for missing, count in zip(suggestions['missing'], suggestions['missing_count'])
+                ],
+                'Serves up to': suggestions['max_persons'],
+            }), hide_index=True, use_container_width=True)
 
-# Filter for today's menu
-todays_menu_df = menu_df[menu_df['meal_day'] == today_name]
+# "Expiring Soon" Widget: the stock lots closest to their date, read from the expiry index
+@page_fragment("Home")
+def expiring_soon():
+    with st.container(border=True):
+        st.header("Expiring Soon ⏳")
+        days = st.slider("Within the next (days)", min_value=1, max_value=30, value=7, key="expiring_days")
+        lots = get_expiring_lots(days, limit=EXPIRING_LOTS)
+        if lots.empty:
+            st.info(f"Nothing in stock expires in the next {days} day(s).")
+            return
+        st.dataframe(pd.DataFrame({
+            'Item': lots['item_name'],
+            'Left': [f"{quantity:.2f} {unit}" for quantity, unit in zip(lots['quantity'], lots['unit'])],
+            'Expires': [
+                f"⚠️ Expired {-left} day(s) ago" if left < 0 else "❗ Today" if left == 0 else f"{day:%a %d %b} (in {left} day(s))"
+                for day, left in zip(lots['expires_on'], lots['days_left'])
+            ],
+        }), hide_index=True, use_container_width=True)
+        if len(lots) == EXPIRING_LOTS:
+            st.caption(f"Showing the {EXPIRING_LOTS} soonest.")
 
 # --- DASHBOARD LAYOUT ---
 col1, col2 = st.columns(2)
@@ -21,32 +90,67 @@ col1, col2 = st.columns(2)
 # --- Left Column: Today's Menu ---
 with col1:
     with st.container(border=True):
-        st.header(f"Today's Plan: {today_name}")
+        st.header(f"Today's Plan: {today:%A %d %b}")
+        if load_failed(data, 'menu', 'cooked_slots'):
+            meals = []
+        else:
+            todays_menu_df = status_df[status_df['meal_date'] == today]
+            cooked_today = set(data['cooked_slots']['meal_time'])
+            meals = ["Breakfast", "Lunch", "Dinner"]
 
-        for meal in ["Breakfast", "Lunch", "Dinner"]:
+        for meal in meals:
             meal_info = todays_menu_df[todays_menu_df['meal_time'] == meal]
             
             if not meal_info.empty:
                 dish = meal_info['recipe_name'].iloc[0]
-                persons = meal_info['num_persons'].iloc[0]
-                
-                # Check status against the database
-                status_text, status_icon = check_dish_status(dish, persons)
+                status_text = meal_info['status'].iloc[0]
+                status_icon = meal_info['icon'].iloc[0]
                 st.metric(label=f"{status_icon} {meal}", value=dish, delta=status_text, delta_color="off")
+                if meal in cooked_today:
+                    st.caption("🍽️ Cooked, ingredients deducted from stock.")
+                elif st.button(f"🍽️ Mark {meal} cooked", key=f"cooked_{meal}"):
+                    # All of the slot's deductions are posted to the stock ledger in one batch
+                    try:
+                        report = mark_meal_cooked(today, meal)
+                        short = report[report['short'] > 1e-9]
+                        st.toast(f"Deducted {int((report['deducted'] > 0).sum())} ingredient(s) for {dish}.")
+                        if not short.empty:
+                            st.toast("Not enough in stock: " + ", ".join(short['item_name']))
+                        st.rerun()
+                    except ValueError as e:
+                        st.warning(str(e))
             else:
                 st.metric(label=f"⚪ {meal}", value="Not Planned", delta_color="off")
 
+    what_can_i_make()
+
 # --- Right Column: Alerts & Actions ---
 with col2:
+    expiring_soon()
+
     # "What's Running Low?" Widget
     with st.container(border=True):
         st.header("What's Running Low? 📉")
         
-        if not low_stock_df.empty:
-            for index, row in low_stock_df.iterrows():
-                st.markdown(f"- **{row['item_name']}**: {row['quantity']} {row['unit']}")
-        else:
-            st.info("Your inventory looks well-stocked!")
+        # Low-stock items plus anything the next week's meals will use up, with the slot it runs out at
+        if not load_failed(data, 'low_stock', 'forecast'):
+            low_stock_df, forecast_df = data['low_stock'], data['forecast']
+            running_out = forecast_df[forecast_df['runs_out']]
+            low_view = pd.DataFrame({
+                'Item': low_stock_df['item_name'],
+                'Stock': [f"{quantity:.2f} {unit}" for quantity, unit in zip(low_stock_df['quantity'], low_stock_df['unit'])],
+            })
+            runout_view = pd.DataFrame({
+                'Item': running_out['item_name'],
+                'Stock': [f"{stock:.2f} {unit}" for stock, unit in zip(running_out['stock'], running_out['unit'])],
+                'Runs out on': [f"{day:%a %d %b} · {meal}" for day, meal in zip(running_out['runs_out_on'], running_out['runs_out_meal'])],
+            })
+            alerts_df = pd.concat([runout_view, low_view[~low_view['Item'].isin(runout_view['Item'])]], ignore_index=True)
+
+            if not alerts_df.empty:
+                st.dataframe(alerts_df.fillna({'Runs out on': "—"}), hide_index=True, use_container_width=True)
+            else:
+                st.info("Your inventory looks well-stocked!")
 
     # "Quick Actions" Widget
     with st.container(border=True):
@@ -57,4 +161,14 @@ with col2:
         if st.button("📅 View & Edit Menu", use_container_width=True):
             st.switch_page("menu.py")
         if st.button("🧺 Go to Prep Basket", use_container_width=True):
-            st.switch_page("baskets.py")
\ No newline at end of file
+            st.switch_page("baskets.py")
+
+# --- Week View: feasibility grid from the same status check ---
+with st.expander("📅 This Week at a Glance"):
+    if status_df is None:
+        st.info("The menu couldn't be loaded.")
+    elif status_df.empty:
+        st.info("Your menu is empty. Plan some meals to see the week here!")
+    else:
+        week_df = status_df.assign(cell=status_df['icon'] + " " + status_df['recipe_name'])
+        st.dataframe(build_week_grid(week_df, values='cell'), use_container_width=True)
\ No newline at end of file
@@ -0,0 +1,167 @@
+# importer.py
+#
+# Bulk import of grocery purchases, item catalogues and recipe books from CSV files.
+# Files are streamed in fixed-size chunks, each written in one transaction, so memory stays
+# bounded however large the file is; caches are invalidated once, after the last chunk.
+# Command line (from the inMyFridge folder):
+#   python importer.py stock receipts.csv [more.csv ...] [--household 2] [--chunk-rows 5000]
+#   python importer.py catalogue supplier_items.csv
+#   python importer.py recipes recipe_book.csv [--shared]
+
+import argparse
+import json
+import os
+
+import pandas as pd
+from database_utils import import_purchases, import_catalogue, save_recipes, current_household
+from query_cache import deferred_invalidation
+from units import STOCK_UNITS, DENSITY_COLUMN, PIECE_WEIGHT_COLUMN
+
+CHUNK_ROWS = 5000
+
+# Columns each kind of file needs (and may carry), after header normalization
+REQUIRED_COLUMNS = {
+    'stock': ['item_name', 'quantity', 'unit'],
+    'catalogue': ['item_name', 'base_unit'],
+    'recipes': ['recipe_name', 'item_name', 'quantity_per_person', 'unit'],
+}
+OPTIONAL_COLUMNS = {'stock': ['expires_on'], 'catalogue': [DENSITY_COLUMN, PIECE_WEIGHT_COLUMN]}
+NUMERIC_COLUMNS = ['quantity', 'quantity_per_person', DENSITY_COLUMN, PIECE_WEIGHT_COLUMN]
+UNIT_COLUMNS = ['unit', 'base_unit']
+DATE_COLUMNS = ['expires_on']
+HEADER_ALIASES = {
+    'name': 'item_name', 'item': 'item_name', 'ingredient': 'item_name',
+    'qty': 'quantity', 'amount': 'quantity',
+    'recipe': 'recipe_name', 'dish': 'recipe_name',
+    'per_person': 'quantity_per_person', 'qty_per_person': 'quantity_per_person',
+    'expiry': 'expires_on', 'expires': 'expires_on', 'best_before': 'expires_on', 'use_by': 'expires_on',
+}
+CANONICAL_UNITS = {unit.lower(): unit for unit in STOCK_UNITS}
+
+# -----------------------------------------------------------------------------
+# --- READING ---
+# -----------------------------------------------------------------------------
+
+def _normalize_header(name):
+    key = '_'.join(str(name).strip().lower().split())
+    return HEADER_ALIASES.get(key, key)
+
+def _clean_chunk(chunk, kind):
+    """Keeps the known columns of a raw chunk and drops rows that can't be imported.
+
+    Names are trimmed, numbers and dates parsed and units mapped to the stored spelling ('l' -> 'L').
+    Rows with a blank name, a non-numeric required number or an unknown unit are dropped.
+    Returns `(rows, skipped)`.
+    """
+    required = REQUIRED_COLUMNS[kind]
+    columns = required + [column for column in OPTIONAL_COLUMNS.get(kind, []) if column in chunk]
+    rows = chunk[columns].copy()
+    valid = pd.Series(True, index=rows.index)
+    for column in columns:
+        if column in NUMERIC_COLUMNS:
+            rows[column] = pd.to_numeric(rows[column].str.strip(), errors='coerce')
+        elif column in DATE_COLUMNS:
+            # ISO dates (2025-01-31); anything else imports without a date
+            rows[column] = pd.to_datetime(rows[column].str.strip(), format='%Y-%m-%d', errors='coerce').dt.date
+        elif column in UNIT_COLUMNS:
+            rows[column] = rows[column].str.strip().str.lower().map(CANONICAL_UNITS)
+        else:
+            rows[column] = rows[column].str.strip()
+            rows[column] = rows[column].where(rows[column] != '')
+        if column in required:
+            valid &= rows[column].notna()
+    return rows[valid], int((~valid).sum())
+
+def read_chunks(source, kind, chunk_rows=CHUNK_ROWS):
+    """Streams a CSV file (path or file-like object) as cleaned chunks of at most `chunk_rows` rows.
+
+    Yields `(rows, skipped)` per chunk. Headers are matched case-insensitively, with a few common
+    aliases ("Item", "Qty", "Dish"); a file missing a required column raises ValueError.
+    """
+    if kind not in REQUIRED_COLUMNS:
+        raise ValueError(f"Unknown import kind: {kind} (expected one of {', '.join(REQUIRED_COLUMNS)})")
+    with pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False, skipinitialspace=True) as reader:
+        for chunk in reader:
+            chunk.columns = [_normalize_header(column) for column in chunk.columns]
+            missing = [column for column in REQUIRED_COLUMNS[kind] if column not in chunk]
+            if missing:
+                raise ValueError(f"The file has no {', '.join(missing)} column(s); {kind} files need {', '.join(REQUIRED_COLUMNS[kind])}.")
+            yield _clean_chunk(chunk, kind)
+
+# -----------------------------------------------------------------------------
+# --- IMPORTING ---
+# -----------------------------------------------------------------------------
+
+def _import_recipes(rows, household_id, shared, summary):
+    """Saves the complete recipes of a chunk in one save_recipes batch (ingredients resolved with one lookup).
+
+    Recipes are matched by name, so re-importing a recipe book updates the recipes it created.
+    """
+    item_ids, created = import_catalogue(rows[['item_name', 'unit']].rename(columns={'unit': 'base_unit'}))
+    rows = rows.assign(item_id=rows['item_name'].str.casefold().map(item_ids))
+    batch = [
+        ("new", name, ingredients[['item_id', 'item_name', 'quantity_per_person', 'unit']])
+        for name, ingredients in rows.groupby('recipe_name', sort=False)
+    ]
+    saved = save_recipes(batch, household_id=household_id, shared=shared, by_name=True)
+    summary['items_created'] += created
+    summary['recipes'] += len(batch)
+    summary['recipes_created'] += saved['created']
+
+def import_csv(source, kind, household_id=None, shared=False, chunk_rows=CHUNK_ROWS, progress=None):
+    """Imports a CSV file of `kind` ('stock', 'catalogue' or 'recipes') chunk by chunk.
+
+    - stock: purchases (item_name, quantity, unit, optional expires_on) are added to the household's
+      stock, one lot per item and expiry date.
+    - catalogue: items (item_name, base_unit, optional density_g_per_ml / piece_weight_g) are added
+      to the shared catalogue.
+    - recipes: one row per ingredient (recipe_name, item_name, quantity_per_person, unit); a recipe
+      is replaced by the ingredients listed for it, so its rows must be consecutive in the file.
+      Recipes belong to the household, or to every household with `shared`.
+    `progress` is called with the running summary after each chunk. Returns the summary dict.
+    """
+    household_id = current_household(household_id)
+    summary = dict(kind=kind, chunks=0, rows=0, skipped=0, items_created=0, stocked=0, recipes=0, recipes_created=0)
+    note = f"Imported from {os.path.basename(str(getattr(source, 'name', source)))}"
+
+    with deferred_invalidation():
+        carried = None  # rows of the chunk's last recipe, which may continue in the next chunk
+        for rows, skipped in read_chunks(source, kind, chunk_rows):
+            summary['chunks'] += 1
+            summary['rows'] += len(rows)
+            summary['skipped'] += skipped
+            if kind == 'stock':
+                result = import_purchases(rows, household_id=household_id, note=note)
+                summary['items_created'] += result['items_created']
+                summary['stocked'] += result['stocked']
+            elif kind == 'catalogue':
+                summary['items_created'] += import_catalogue(rows)[1]
+            else:
+                if carried is not None:
+                    rows = pd.concat([carried, rows], ignore_index=True)
+                last = rows['recipe_name'].iloc[-1] if len(rows) else None
+                carried = rows[rows['recipe_name'] == last]
+                complete = rows[rows['recipe_name'] != last]
+                if not complete.empty:
+                    _import_recipes(complete, household_id, shared, summary)
+            if progress:
+                progress(dict(summary))
+        if carried is not None and not carried.empty:
+            _import_recipes(carried, household_id, shared, summary)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import purchases, catalogue items or recipes from CSV files.")
+    parser.add_argument("kind", choices=list(REQUIRED_COLUMNS))
+    parser.add_argument("files", nargs="+", help="CSV files, imported in order.")
+    parser.add_argument("--household", type=int, help="Household to import into (default: the default kitchen).")
+    parser.add_argument("--shared", action="store_true", help="Recipes are shared by every household.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    for path in args.files:
+        summary = import_csv(path, args.kind, household_id=args.household, shared=args.shared, chunk_rows=args.chunk_rows)
+        print(json.dumps(dict(summary, file=path)))
+
+if __name__ == "__main__":
+    main()
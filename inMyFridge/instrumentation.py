@@ -0,0 +1,285 @@
+# instrumentation.py
+
+import functools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from sqlalchemy import event
+
+# Share of page reruns (and of statements run outside a page, e.g. CLI tools) that get measured
+DEFAULT_SAMPLE_RATE = 0.1
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Queries are grouped by their SQL text, cut to this many characters
+LABEL_LENGTH = 160
+
+# -----------------------------------------------------------------------------
+# --- METRICS REGISTRY ---
+# -----------------------------------------------------------------------------
+
+def _new_histogram():
+    return {'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+def _observe(histogram, ms):
+    histogram['count'] += 1
+    histogram['sum_ms'] += ms
+    histogram['max_ms'] = max(histogram['max_ms'], ms)
+    position = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+    histogram['buckets'][position] += 1
+
+def query_label(sql):
+    """Groups statements by shape: whitespace collapsed, placeholders of every driver style shown as ?,
+    expanded IN lists folded and long text cut, so a cached query and the statement it runs match.
+    """
+    sql = re.sub(r'\s+', ' ', str(sql)).strip().rstrip(';').rstrip()
+    sql = re.sub(r'%\(\w+\)s|%s|(?<![:\w]):\w+', '?', sql)
+    sql = re.sub(r'\bIN \(\?(?:, ?\?)*\)|\bIN \?', 'IN (…)', sql, flags=re.IGNORECASE)
+    return sql[:LABEL_LENGTH]
+
+class Metrics:
+    """Process-wide latency, row and cache counters for queries, and rerun timings for pages.
+
+    Only sampled work is recorded: a page rerun is sampled as a whole (every statement it runs is
+    timed), statements outside a page each on their own. Counts therefore cover the sampled share
+    of the traffic; `sample_rate` is reported alongside so they can be scaled.
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._queries = {}  # label -> {'latency': histogram, 'rows': n, 'errors': n, 'cache_hits': n, 'cache_misses': n}
+        self._pages = {}  # page -> {'latency': histogram, 'round_trips': n, 'max_round_trips': n}
+
+    def _query(self, label):
+        entry = self._queries.get(label)
+        if entry is None:
+            entry = self._queries[label] = {'latency': _new_histogram(), 'rows': 0, 'errors': 0, 'cache_hits': 0, 'cache_misses': 0}
+        return entry
+
+    def record_statement(self, label, ms, rows=None, error=False):
+        with self._lock:
+            entry = self._query(label)
+            _observe(entry['latency'], ms)
+            if rows is not None and rows > 0:
+                entry['rows'] += rows
+            if error:
+                entry['errors'] += 1
+
+    def record_rows(self, label, rows):
+        with self._lock:
+            self._query(label)['rows'] += rows
+
+    def record_cache(self, label, hit):
+        with self._lock:
+            self._query(label)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def record_page(self, page, ms, round_trips):
+        with self._lock:
+            entry = self._pages.get(page)
+            if entry is None:
+                entry = self._pages[page] = {'latency': _new_histogram(), 'round_trips': 0, 'max_round_trips': 0}
+            _observe(entry['latency'], ms)
+            entry['round_trips'] += round_trips
+            entry['max_round_trips'] = max(entry['max_round_trips'], round_trips)
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._pages.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Everything recorded so far as plain dicts (JSON-ready), slowest queries first."""
+        with self._lock:
+            queries = [
+                dict(
+                    label=label, calls=entry['latency']['count'], total_ms=round(entry['latency']['sum_ms'], 3),
+                    mean_ms=round(entry['latency']['sum_ms'] / entry['latency']['count'], 3) if entry['latency']['count'] else None,
+                    max_ms=round(entry['latency']['max_ms'], 3), rows=entry['rows'], errors=entry['errors'],
+                    cache_hits=entry['cache_hits'], cache_misses=entry['cache_misses'],
+                    buckets=list(entry['latency']['buckets']),
+                )
+                for label, entry in self._queries.items()
+            ]
+            pages = [
+                dict(
+                    page=page, reruns=entry['latency']['count'], total_ms=round(entry['latency']['sum_ms'], 3),
+                    mean_ms=round(entry['latency']['sum_ms'] / entry['latency']['count'], 3),
+                    max_ms=round(entry['latency']['max_ms'], 3),
+                    round_trips_per_rerun=round(entry['round_trips'] / entry['latency']['count'], 2),
+                    max_round_trips=entry['max_round_trips'], buckets=list(entry['latency']['buckets']),
+                )
+                for page, entry in self._pages.items()
+            ]
+        return {
+            'sample_rate': self.sample_rate,
+            'since': self.started_at,
+            'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+            'queries': sorted(queries, key=lambda q: q['total_ms'], reverse=True),
+            'pages': sorted(pages, key=lambda p: p['total_ms'], reverse=True),
+        }
+
+@st.cache_resource
+def get_metrics():
+    """The registry shared by every session in this process."""
+    return Metrics(float(os.environ.get('INMYFRIDGE_METRICS_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)))
+
+_registry = None
+
+def _metrics():
+    """get_metrics() for the per-statement hooks, without a cache_resource lookup on every call."""
+    global _registry
+    if _registry is None:
+        _registry = get_metrics()
+    return _registry
+
+# -----------------------------------------------------------------------------
+# --- RECORDING ---
+# -----------------------------------------------------------------------------
+
+# The page rerun this thread is running, if any: {'sampled': bool, 'round_trips': int}
+_current = threading.local()
+# Round trips of one rerun can be counted from several threads (see loader.py)
+_round_trips_lock = threading.Lock()
+
+def is_sampled():
+    """Whether work on this thread right now should be recorded."""
+    run = getattr(_current, 'run', None)
+    if run is not None:
+        return run['sampled']
+    return random.random() < _metrics().sample_rate
+
+@contextmanager
+def page_run(page):
+    """Times one rerun of `page` and counts the database round trips it makes (if sampled)."""
+    if getattr(_current, 'run', None) is not None:
+        # Already inside a measured rerun (a fragment drawn as part of its page): counted there
+        yield _current.run
+        return
+    metrics = _metrics()
+    run = {'sampled': random.random() < metrics.sample_rate, 'round_trips': 0}
+    _current.run = run
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        _current.run = None
+        if run['sampled']:
+            metrics.record_page(page, (time.perf_counter() - start) * 1000, run['round_trips'])
+
+def current_run():
+    """The page rerun this thread is measuring, if any (to hand to worker threads)."""
+    return getattr(_current, 'run', None)
+
+@contextmanager
+def attach_run(run):
+    """Counts this thread's statements into `run`, a rerun measured on another thread."""
+    previous = getattr(_current, 'run', None)
+    _current.run = run
+    try:
+        yield
+    finally:
+        _current.run = previous
+
+def page_fragment(page):
+    """st.fragment whose own reruns are measured like page reruns, as "<page> · <function name>".
+
+    A fragment rerun runs just the decorated function, outside the page_run around its page, so
+    without this a widget inside a fragment would go unmeasured.
+    """
+    def decorate(fn):
+        name = f"{page} · {fn.__name__}"
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with page_run(name):
+                return fn(*args, **kwargs)
+        return st.fragment(run)
+    return decorate
+
+def record_cache_lookup(label, hit):
+    """Counts a result-cache hit or miss for a query (sampled)."""
+    if is_sampled():
+        _metrics().record_cache(query_label(label), hit)
+
+def record_result_rows(label, rows):
+    """Counts rows a read returned; statements only know their own rowcount for writes."""
+    if is_sampled():
+        _metrics().record_rows(query_label(label), rows)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    run = getattr(_current, 'run', None)
+    sampled = run['sampled'] if run is not None else random.random() < _metrics().sample_rate
+    conn.info.setdefault('instrumentation', []).append(time.perf_counter() if sampled else None)
+    if sampled and run is not None:
+        with _round_trips_lock:
+            run['round_trips'] += 1
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('instrumentation', [None]).pop()
+    if started is not None:
+        rowcount = cursor.rowcount if statement.lstrip()[:6].upper() != 'SELECT' else None
+        _metrics().record_statement(query_label(statement), (time.perf_counter() - started) * 1000, rowcount)
+
+def _handle_error(context):
+    stack = context.connection.info.get('instrumentation') if context.connection is not None else None
+    started = stack.pop() if stack else None
+    if started is not None:
+        _metrics().record_statement(query_label(context.statement), (time.perf_counter() - started) * 1000, error=True)
+
+def instrument_engine(engine):
+    """Times every statement `engine` runs (one cursor execute = one round trip)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+
+# -----------------------------------------------------------------------------
+# --- EXPORT ---
+# -----------------------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def prometheus_text(snapshot=None):
+    """The snapshot in the Prometheus text exposition format (histograms in seconds)."""
+    snapshot = snapshot or _metrics().snapshot()
+    bounds = [bound / 1000 for bound in snapshot['bucket_bounds_ms']]
+    lines = [
+        '# HELP inmyfridge_metrics_sample_rate Share of page reruns and statements measured.',
+        '# TYPE inmyfridge_metrics_sample_rate gauge',
+        f"inmyfridge_metrics_sample_rate {snapshot['sample_rate']}",
+    ]
+
+    def histogram(name, help_text, rows, key):
+        lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} histogram'])
+        for row in rows:
+            label = f'{key}="{_escape(row[key])}"'
+            cumulative = 0
+            for bound, count in zip(bounds + ['+Inf'], row['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label}}} {row["total_ms"] / 1000}')
+            lines.append(f'{name}_count{{{label}}} {cumulative}')
+
+    def counter(name, help_text, rows, key, field):
+        lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} counter'])
+        lines.extend(f'{name}{{{key}="{_escape(row[key])}"}} {row[field]}' for row in rows)
+
+    queries, pages = snapshot['queries'], snapshot['pages']
+    histogram('inmyfridge_query_duration_seconds', 'Database statement latency.', [q for q in queries if q['calls']], 'label')
+    counter('inmyfridge_query_rows_total', 'Rows returned (reads) or affected (writes).', queries, 'label', 'rows')
+    counter('inmyfridge_query_errors_total', 'Statements that raised.', queries, 'label', 'errors')
+    counter('inmyfridge_query_cache_hits_total', 'Result cache hits.', queries, 'label', 'cache_hits')
+    counter('inmyfridge_query_cache_misses_total', 'Result cache misses.', queries, 'label', 'cache_misses')
+    histogram('inmyfridge_page_rerun_duration_seconds', 'Page rerun duration.', pages, 'page')
+    lines.extend(['# HELP inmyfridge_page_round_trips_per_rerun Mean database round trips per rerun.',
+                  '# TYPE inmyfridge_page_round_trips_per_rerun gauge'])
+    lines.extend(f'inmyfridge_page_round_trips_per_rerun{{page="{_escape(p["page"])}"}} {p["round_trips_per_rerun"]}' for p in pages)
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,98 @@
+# loader.py
+#
+# Page data loading: a page names the datasets it needs up front and the independent ones are
+# fetched at the same time on a small process-wide thread pool, so a cold page load waits about as
+# long as its slowest query rather than the sum of them. Each worker takes its own connection from
+# the backend's SQLAlchemy pool. A dataset that fails or times out is reported on its own; the rest
+# of the page still renders.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+from db_connector import get_db_connection
+from instrumentation import current_run, attach_run
+
+# Loader threads shared by every session of the process (further capped by the backend)
+LOADER_WORKERS = 4
+# Seconds a page waits for its datasets before reporting the missing ones as timed out
+LOAD_TIMEOUT = 30
+
+class PageData(dict):
+    """The datasets that loaded, by name, plus `errors` (name -> exception) for those that didn't."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
+
+@st.cache_resource
+def _executor(workers):
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='inmyfridge-loader')
+
+# Set on loader threads, so a dataset that loads its own parts does so in place
+_worker = threading.local()
+
+def _call(spec):
+    fn, *args = spec if isinstance(spec, tuple) else (spec,)
+    return fn(*args)
+
+def _set_script_run_ctx(ctx):
+    """Puts `ctx` (None = none) on the current thread; returns the context it had before."""
+    thread = threading.current_thread()
+    previous = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    elif hasattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME):
+        # add_script_run_ctx can't detach: given None it attaches the caller's context
+        delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+    return previous
+
+def _run_in_worker(spec, ctx, run):
+    """Runs one dataset on a loader thread, as part of the page's session (session state, household) and measured rerun.
+
+    The thread is handed back as it was, so a reused worker doesn't carry the session into its next task.
+    """
+    previous = _set_script_run_ctx(ctx) if ctx is not None else None
+    _worker.active = True
+    try:
+        with attach_run(run):
+            return _call(spec)
+    finally:
+        _worker.active = False
+        if ctx is not None:
+            _set_script_run_ctx(previous)
+
+def load_datasets(datasets, timeout=LOAD_TIMEOUT):
+    """Fetches `datasets` ({name: fn or (fn, *args)}) concurrently and returns them as a PageData.
+
+    The datasets run one after another (and `timeout` does not apply) when the backend serves one
+    read at a time (in-memory SQLite) or when called from a loader thread, so a loader thread
+    never waits on the pool it runs on. A dataset still running at `timeout` is left to finish in
+    the background and reported as a TimeoutError.
+    """
+    data = PageData()
+    workers = min(LOADER_WORKERS, get_db_connection().read_concurrency)
+    if workers <= 1 or len(datasets) <= 1 or getattr(_worker, 'active', False):
+        for name, spec in datasets.items():
+            try:
+                data[name] = _call(spec)
+            except Exception as e:
+                data.errors[name] = e
+        return data
+
+    executor = _executor(workers)
+    ctx, run = get_script_run_ctx(suppress_warning=True), current_run()
+    futures = {name: executor.submit(_run_in_worker, spec, ctx, run) for name, spec in datasets.items()}
+    _, pending = wait(futures.values(), timeout=timeout)
+    for name, future in futures.items():
+        if future in pending:
+            future.cancel()
+            data.errors[name] = TimeoutError(f"not loaded within {timeout} s")
+            continue
+        try:
+            data[name] = future.result()
+        except Exception as e:
+            data.errors[name] = e
+    return data
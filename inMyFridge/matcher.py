@@ -0,0 +1,148 @@
+# matcher.py
+
+import numpy as np
+import pandas as pd
+
+# Recipes missing at most this many ingredients get the missing item names listed
+LISTED_MISSING = 3
+
+class RecipeMatrix:
+    """Sparse recipe x item matrix of per-person requirements, in each item's base unit.
+
+    Stored in CSR layout: the entries of recipe row r are `indices[indptr[r]:indptr[r + 1]]` (item
+    columns) with the matching `data` (base quantity per person). The entry positions ordered by item
+    (`item_entries[item_indptr[c]:item_indptr[c + 1]]` for item column c) form the inverted index
+    from an item to the recipes using it.
+    Scoring compares the entries against a dense inventory vector, so every recipe is checked in a
+    handful of NumPy passes.
+    """
+
+    def __init__(self, recipe_ids, recipe_names, item_names, rows, cols, per_person):
+        self.recipe_ids = np.asarray(recipe_ids)
+        self.recipe_names = np.asarray(recipe_names, dtype=object)
+        self.items = pd.Index(item_names)
+
+        # Sort entries by (recipe, item) and fold repeated pairs into one entry
+        order = np.lexsort((cols, rows))
+        rows, cols, per_person = rows[order], cols[order], per_person[order]
+        first = np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])] if len(rows) else np.array([], dtype=bool)
+        starts = np.flatnonzero(first)
+        self.rows, self.indices = rows[starts], cols[starts]
+        self.data = np.add.reduceat(per_person, starts) if len(starts) else per_person
+        self.indptr = np.r_[0, np.cumsum(np.bincount(self.rows, minlength=len(self.recipe_ids)))]
+
+        # Precomputed for rank(): servings per unit of stock, and +inf for entries that never block
+        # (requirements that could not be converted, or zero)
+        valid = self.data > 0
+        self._per_serving = np.where(valid, 1.0 / np.where(valid, self.data, 1.0), 0.0)
+        self._never_short = np.where(valid, 0.0, np.inf)
+        self._name_order = np.argsort(np.argsort(self.recipe_names.astype(str), kind='stable'))
+
+        self.item_entries = np.argsort(self.indices, kind='stable')
+        self.item_indptr = np.r_[0, np.cumsum(np.bincount(self.indices, minlength=len(self.items)))]
+
+    @classmethod
+    def from_ingredients(cls, recipe_ids, recipe_names, item_names, per_person):
+        """Builds the matrix from aligned ingredient rows (one per recipe x item)."""
+        row_codes, recipe_index = pd.factorize(pd.Series(recipe_ids))
+        names = pd.Series(recipe_names).groupby(row_codes).first().to_numpy() if len(row_codes) else []
+        col_codes, items = pd.factorize(pd.Series(item_names))
+        return cls(
+            recipe_index.to_numpy(), names, items,
+            row_codes.astype(np.int64), col_codes.astype(np.int64), np.asarray(per_person, dtype=float)
+        )
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def stock_vector(self, stock_by_item):
+        """Aligns base quantities by item name with the matrix columns (items not stocked -> 0)."""
+        return pd.Series(stock_by_item, dtype=float).reindex(self.items).fillna(0).to_numpy()
+
+    def servings(self, stock, entries=slice(None)):
+        """Servings the stock covers for each (or each selected) entry; everything scored follows from this."""
+        return stock[self.indices[entries]] * self._per_serving[entries] + self._never_short[entries]
+
+    def missing_shares(self, stock, persons, entries=slice(None)):
+        """Share of each (or each selected) entry's requirement for `persons` that stock can't cover (0..1)."""
+        return np.clip(1.0 - self.servings(stock, entries) / persons, 0.0, 1.0)
+
+    def entries_using(self, cols):
+        """Positions of the entries of every recipe using any of the item columns `cols`."""
+        spans = [self.item_entries[self.item_indptr[c]:self.item_indptr[c + 1]] for c in cols]
+        return np.concatenate(spans) if spans else np.array([], dtype=np.int64)
+
+    def consume(self, stock, row, persons):
+        """Takes recipe `row` cooked for `persons` out of `stock` in place (never below zero); returns the item columns touched."""
+        span = slice(self.indptr[row], self.indptr[row + 1])
+        cols = self.indices[span]
+        stock[cols] = np.maximum(stock[cols] - np.nan_to_num(self.data[span]) * persons, 0.0)
+        return cols
+
+    def rank(self, stock, persons, max_missing=None, limit=None, recipe_ids=None):
+        """Ranks every recipe by how cookable it is for `persons` from `stock` (see stock_vector).
+
+        Returns one row per recipe (or per recipe in `recipe_ids`) with `missing_count` (ingredients
+        short), `coverage` (average share of each ingredient in stock), `max_persons` (headcount the
+        stock covers) and, for recipes missing at most LISTED_MISSING ingredients, the `missing` item
+        names. Fully makeable recipes come first; `limit` keeps only the best rows. Requirements that
+        could not be converted to the item's unit never count as missing.
+        """
+        ratio = self.servings(stock)
+        is_missing = ratio < persons - 1e-9
+
+        n_recipes = len(self.recipe_ids)
+        n_ingredients = np.diff(self.indptr)
+        missing_count = np.bincount(self.rows, weights=is_missing, minlength=n_recipes).astype(int)
+        covered = np.fmin(ratio / persons, 1.0) if persons > 0 else np.ones(len(ratio))
+        coverage = np.bincount(self.rows, weights=covered, minlength=n_recipes) / np.maximum(n_ingredients, 1)
+        coverage[n_ingredients == 0] = 1.0
+
+        # Fewest servings any ingredient allows, per recipe (reduceat needs non-empty rows)
+        max_persons = np.full(n_recipes, np.inf)
+        filled = n_ingredients > 0
+        if filled.any():
+            max_persons[filled] = np.minimum.reduceat(ratio, self.indptr[:-1][filled])
+        max_persons = np.floor(np.where(np.isinf(max_persons), np.nan, max_persons) + 1e-9)
+
+        keep = np.ones(n_recipes, dtype=bool)
+        if recipe_ids is not None:
+            keep &= np.isin(self.recipe_ids, np.asarray(list(recipe_ids)))
+        if max_missing is not None:
+            keep &= missing_count <= max_missing
+        rows = np.flatnonzero(keep)
+        rows = rows[np.lexsort((self._name_order[rows], -coverage[rows], missing_count[rows]))]
+        if limit is not None:
+            rows = rows[:limit]
+
+        return pd.DataFrame({
+            'recipe_id': self.recipe_ids[rows],
+            'recipe_name': self.recipe_names[rows],
+            'ingredients': n_ingredients[rows],
+            'missing_count': missing_count[rows],
+            'coverage': coverage[rows],
+            'max_persons': max_persons[rows],
+            # Missing item names, only for the returned rows that are nearly makeable
+            'missing': [
+                self._row_items(row, is_missing) if 0 < missing_count[row] <= LISTED_MISSING else []
+                for row in rows
+            ],
+        })
+
+    def _row_items(self, row, entry_mask):
+        """Names of the items in recipe `row` whose entries are set in `entry_mask`."""
+        span = slice(self.indptr[row], self.indptr[row + 1])
+        return self.items[self.indices[span][entry_mask[span]]].tolist()
+
+    def recipes_using(self, item_names):
+        """Recipe rows using any of `item_names`, with the per-person base quantity of that item."""
+        codes = self.items.get_indexer(list(item_names))
+        codes = codes[codes >= 0]
+        if len(codes) == 0:
+            return pd.DataFrame(columns=['recipe_id', 'item_name', 'per_person'])
+        positions = self.entries_using(codes)
+        return pd.DataFrame({
+            'recipe_id': self.recipe_ids[self.rows[positions]],
+            'item_name': self.items[self.indices[positions]],
+            'per_person': self.data[positions],
+        })
@@ -1,149 +1,299 @@
 # menu.py
 
+import calendar
+import datetime
+
 import streamlit as st
 import pandas as pd
 from database_utils import (
     get_recipes, 
     get_menu_plan, 
+    get_cooked_slots,
     set_menu_slot, 
-    get_all_stock_items,
+    set_menu_slots,
+    clear_menu_slots,
+    generate_menu_plan,
     get_recipe_details,
     save_recipe,
-    delete_recipe
+    delete_recipe,
+    search_recipes,
+    search_stock_items,
+    find_similar_recipes,
+    get_read_model
 )
+from utils import build_week_grid, rerun_fragment
+from forecast import MEALS, week_start
+from instrumentation import page_fragment
 
 st.set_page_config(page_title="Menu Planner", layout="wide")
-st.title("🍽️ Weekly Menu Planner")
+st.title("🍽️ Menu Planner")
 st.markdown("Plan your meals, define recipes, and see your week at a glance.")
 
-# --- DATA LOADING ---
-recipes_df = get_recipes()
-stock_items_df = get_all_stock_items()
+# Pickers list this many matches for what has been typed so far
+PICKER_SIZE = 20
+# Days of past meals the history view lists per page
+HISTORY_DAYS = 28
+
+# The management panel, the recipe editor, the auto-planner and the timetable are fragments, each
+# fetching its own data: typing in a search box or adding an ingredient reruns just that part.
+# Saving a slot or a recipe reruns the page, since the timetable has to show it.
+
+# Pickers hold ids and show names through the shared read model, so no per-rerun lookup dicts are built
+CLEAR_SLOT, NEW_RECIPE = -1, "new"
+
+def recipe_matches(query):
+    """recipe_ids for the picker: search matches, or the first recipes when nothing is typed."""
+    matches = search_recipes(query, k=PICKER_SIZE) if query.strip() else get_recipes().head(PICKER_SIZE)
+    return matches['recipe_id'].tolist()
+
+def recipe_label(recipe_id):
+    return get_read_model().recipe_name_of(recipe_id) or f"Recipe #{recipe_id}"
+
+def item_label(item_id):
+    return get_read_model().item_name_of(item_id) or f"Item #{item_id}"
 
 # --- UI STATE MANAGEMENT ---
 if 'show_management_panel' not in st.session_state:
     st.session_state.show_management_panel = False
 if 'recipe_ingredients' not in st.session_state:
     st.session_state.recipe_ingredients = pd.DataFrame(columns=["item_id", "item_name", "quantity_per_person", "unit"])
+# The calendar shows the week or month around this date (and history the days before it)
+st.session_state.setdefault('menu_anchor', datetime.date.today())
 
-if st.button("✏️ Manage Menu & Recipes", use_container_width=True):
-    st.session_state.show_management_panel = not st.session_state.show_management_panel
+def month_range(day):
+    """First day of `day`'s month and the number of days in it."""
+    return day.replace(day=1), calendar.monthrange(day.year, day.month)[1]
 
-# --- MANAGEMENT PANEL ---
-if st.session_state.show_management_panel:
-    with st.container(border=True):
-        tab1, tab2 = st.tabs(["🗓️ Set Menu Slot", "🍲 Manage Recipes"])
-
-        # --- TAB 1: SET MENU SLOT ---
-        with tab1:
-            with st.form("set_menu_form"):
-                st.subheader("Assign a dish to a time slot")
-                days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-                times = ["Breakfast", "Lunch", "Dinner"]
-                
-                # Create a mapping from recipe name to recipe_id
-                recipe_options = {name: id for id, name in zip(recipes_df['recipe_id'], recipes_df['recipe_name'])}
-                
-                c1, c2, c3 = st.columns(3)
-                day = c1.selectbox("Day", days)
-                time = c2.selectbox("Time", times)
-                selected_recipe_name = c3.selectbox("Select Dish", ["— Clear Slot —"] + list(recipe_options.keys()))
-                
-                persons = st.number_input("Number of Persons", min_value=1, step=1, value=2)
-
-                if st.form_submit_button("💾 Save Slot"):
-                    if selected_recipe_name == "— Clear Slot —":
-                        # Logic to clear a slot would go here (DELETE from menu_plan)
-                        st.info("Slot cleared (functionality to be added).")
-                    else:
-                        selected_recipe_id = recipe_options[selected_recipe_name]
-                        set_menu_slot(day, time, selected_recipe_id, persons)
-                        st.success(f"Saved '{selected_recipe_name}' for {day} {time}.")
-                    st.session_state.show_management_panel = False
-                    st.rerun()
-
-        # --- TAB 2: MANAGE RECIPES ---
-        with tab2:
-            st.subheader("Add, Edit, or Delete a Recipe")
-            
-            recipe_list = ["✨ Add New Recipe"] + recipes_df['recipe_name'].tolist()
-            selected_recipe_name = st.selectbox("Select a recipe to edit", recipe_list)
-
-            recipe_id = "new"
-            recipe_name_default = ""
-
-            if selected_recipe_name != "✨ Add New Recipe":
-                recipe_id = recipes_df.loc[recipes_df['recipe_name'] == selected_recipe_name, 'recipe_id'].iloc[0]
-                recipe_name_default = selected_recipe_name
-                if st.button("Load Recipe to Edit"):
-                    st.session_state.recipe_ingredients = get_recipe_details(recipe_id)
-
-            with st.form(f"recipe_form_{recipe_id}"):
-                recipe_name = st.text_input("Recipe Name", value=recipe_name_default)
-                st.markdown("**Ingredients (per person)**")
-
-                # Display existing ingredients in an editable format
-                st.dataframe(st.session_state.recipe_ingredients, hide_index=True)
-                
-                st.markdown("---")
-                st.markdown("**Add a new ingredient**")
-                
-                # Inputs to add a new ingredient
-                item_map = {name: id for id, name in zip(stock_items_df['item_id'], stock_items_df['item_name'])}
-                
-                c1,c2,c3,c4 = st.columns([2,1,1,1])
-                selected_item_name = c1.selectbox("Ingredient", options=item_map.keys(), key="new_ing_name")
-                new_qty = c2.number_input("Qty", min_value=0.0, step=0.01, key="new_ing_qty")
-                new_unit = c3.selectbox("Unit", ["kg", "g", "L", "ml", "pcs"], key="new_ing_unit")
-                
-                if c4.form_submit_button("➕ Add"):
-                    new_row = pd.DataFrame([{
-                        "item_id": item_map[selected_item_name],
-                        "item_name": selected_item_name,
-                        "quantity_per_person": new_qty,
-                        "unit": new_unit
-                    }])
-                    st.session_state.recipe_ingredients = pd.concat([st.session_state.recipe_ingredients, new_row], ignore_index=True)
-                    st.rerun()
-
-                st.markdown("---")
-                c1, c2, c3 = st.columns(3)
-                if c1.form_submit_button("💾 Save Recipe", use_container_width=True):
-                    save_recipe(recipe_id, recipe_name, st.session_state.recipe_ingredients)
-                    st.session_state.recipe_ingredients = pd.DataFrame() # Clear form state
-                    st.success(f"Recipe '{recipe_name}' saved!")
-                    st.rerun()
-                
-                if recipe_id != "new":
-                    if c2.form_submit_button("🗑️ Delete Recipe", use_container_width=True):
-                        delete_recipe(recipe_id)
-                        st.session_state.recipe_ingredients = pd.DataFrame()
-                        st.warning(f"Recipe '{recipe_name}' deleted.")
-                        st.rerun()
-
-                if c3.form_submit_button("✖️ Clear Form", use_container_width=True):
-                    st.session_state.recipe_ingredients = pd.DataFrame()
-                    st.rerun()
-
-# --- WEEKLY TIMETABLE DISPLAY ---
-st.markdown("---")
-st.header("📅 Weekly Menu Timetable")
-
-menu_plan_df = get_menu_plan()
-# Pivot the data to create the timetable structure
-if not menu_plan_df.empty:
-    timetable = menu_plan_df.pivot_table(
-        index='meal_day', 
-        columns='meal_time', 
-        values='recipe_name', 
-        aggfunc='first'
-    ).fillna("—")
+def shift_anchor(view, step):
+    """Moves the calendar one week, month or history page back (-1) or forward (+1)."""
+    anchor = st.session_state.menu_anchor
+    if view == "Month":
+        first, _ = month_range(anchor)
+        month = first.month - 1 + step
+        st.session_state.menu_anchor = first.replace(year=first.year + month // 12, month=month % 12 + 1)
+    else:
+        st.session_state.menu_anchor = anchor + datetime.timedelta(days=step * (7 if view == "Week" else HISTORY_DAYS))
+
+# --- TAB 1: SET MENU SLOT ---
+def slot_editor():
+    st.subheader("Assign a dish to a time slot")
+    # Typing reruns the panel, so the search box lives outside the form
+    slot_query = st.text_input("🔍 Find a dish", key="slot_recipe_search")
+    recipe_options = recipe_matches(slot_query)
+    with st.form("set_menu_form"):
+        c1, c2, c3 = st.columns(3)
+        day = c1.date_input("Date", value=max(st.session_state.menu_anchor, datetime.date.today()), format="DD/MM/YYYY")
+        time = c2.selectbox("Time", MEALS)
+        # Once something is typed, the best match is preselected
+        selected_recipe_id = c3.selectbox(
+            "Select Dish", [CLEAR_SLOT] + recipe_options,
+            format_func=lambda recipe_id: "— Clear Slot —" if recipe_id == CLEAR_SLOT else recipe_label(recipe_id),
+            index=1 if slot_query.strip() and recipe_options else 0
+        )
+        
+        persons = st.number_input("Number of Persons", min_value=1, step=1, value=2)
+
+        if st.form_submit_button("💾 Save Slot"):
+            if selected_recipe_id == CLEAR_SLOT:
+                clear_menu_slots([(day, time)])
+            else:
+                set_menu_slot(day, time, selected_recipe_id, persons)
+            # The calendar moves to the date just edited
+            st.session_state.menu_anchor = day
+            st.session_state.show_management_panel = False
+            st.rerun()
+
+# --- TAB 2: MANAGE RECIPES ---
+@page_fragment("Menu")
+def recipe_editor():
+    st.subheader("Add, Edit, or Delete a Recipe")
     
-    # Ensure correct order of days and meals
-    days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    meals_order = ["Breakfast", "Lunch", "Dinner"]
-    timetable = timetable.reindex(index=days_order, columns=meals_order, fill_value="—")
-
-    st.dataframe(timetable, use_container_width=True)
-else:
-    st.info("Your menu is empty. Add some meals using the management panel above!")
\ No newline at end of file
+    recipe_options = recipe_matches(st.text_input("🔍 Find a recipe", key="edit_recipe_search"))
+    recipe_id = st.selectbox(
+        "Select a recipe to edit", [NEW_RECIPE] + recipe_options,
+        format_func=lambda recipe_id: "✨ Add New Recipe" if recipe_id == NEW_RECIPE else recipe_label(recipe_id)
+    )
+    recipe_name_default = ""
+
+    if recipe_id != NEW_RECIPE:
+        recipe_name_default = recipe_label(recipe_id)
+        if st.button("Load Recipe to Edit"):
+            st.session_state.recipe_ingredients = get_recipe_details(recipe_id)
+
+    ingredient_query = st.text_input("🔍 Find an ingredient to add", key="ingredient_search")
+    item_matches = search_stock_items(ingredient_query, k=PICKER_SIZE)
+
+    with st.form(f"recipe_form_{recipe_id}"):
+        recipe_name = st.text_input("Recipe Name", value=recipe_name_default)
+        st.markdown("**Ingredients (per person)**")
+
+        # Display existing ingredients in an editable format
+        st.dataframe(st.session_state.recipe_ingredients, hide_index=True)
+        
+        st.markdown("---")
+        st.markdown("**Add a new ingredient**")
+        
+        # Inputs to add a new ingredient, picked from the matches for the search above
+        item_options = item_matches['item_id'].tolist()
+        
+        c1,c2,c3,c4 = st.columns([2,1,1,1])
+        selected_item_id = c1.selectbox(
+            "Ingredient", options=item_options, key="new_ing_name", format_func=item_label,
+            placeholder="Type in the search box above", index=0 if item_options else None
+        )
+        new_qty = c2.number_input("Qty", min_value=0.0, step=0.01, key="new_ing_qty")
+        new_unit = c3.selectbox("Unit", ["kg", "g", "L", "ml", "pcs"], key="new_ing_unit")
+        
+        if c4.form_submit_button("➕ Add"):
+            # A stop here would also end the page around the fragment, so warnings just return
+            if selected_item_id is None:
+                st.warning("Search for an ingredient first.")
+                return
+            new_row = pd.DataFrame([{
+                "item_id": selected_item_id,
+                "item_name": item_label(selected_item_id),
+                "quantity_per_person": new_qty,
+                "unit": new_unit
+            }])
+            st.session_state.recipe_ingredients = pd.concat([st.session_state.recipe_ingredients, new_row], ignore_index=True)
+            rerun_fragment()
+
+        st.markdown("---")
+        c1, c2, c3 = st.columns(3)
+        if c1.form_submit_button("💾 Save Recipe", use_container_width=True):
+            # A new name close to an existing recipe ("Dal Tadka" vs "dal tadka") needs a second click
+            similar = find_similar_recipes(recipe_name) if recipe_id == NEW_RECIPE else pd.DataFrame()
+            if not similar.empty and recipe_name.casefold() in set(similar['recipe_name'].str.casefold()):
+                # Only a different name makes a separate recipe; saving this one would clash with the existing one
+                st.error(f"A recipe named '{recipe_name}' already exists. Pick it above to edit it, or choose another name.")
+                return
+            if not similar.empty and st.session_state.get('confirm_recipe_name') != recipe_name:
+                st.session_state.confirm_recipe_name = recipe_name
+                st.warning(
+                    f"'{recipe_name}' looks like existing recipe(s): {', '.join(similar['recipe_name'])}. "
+                    "Click Save again to create it as a separate recipe, or pick the existing one above."
+                )
+                return
+            st.session_state.pop('confirm_recipe_name', None)
+            try:
+                save_recipe(recipe_id, recipe_name, st.session_state.recipe_ingredients)
+            except ValueError as e:
+                # The name was taken meanwhile (or by a recipe the search index hasn't seen yet)
+                st.error(str(e))
+                return
+            st.session_state.recipe_ingredients = pd.DataFrame() # Clear form state
+            st.success(f"Recipe '{recipe_name}' saved!")
+            st.rerun()
+        
+        if recipe_id != NEW_RECIPE:
+            if c2.form_submit_button("🗑️ Delete Recipe", use_container_width=True):
+                delete_recipe(recipe_id)
+                st.session_state.recipe_ingredients = pd.DataFrame()
+                st.warning(f"Recipe '{recipe_name}' deleted.")
+                st.rerun()
+
+        if c3.form_submit_button("✖️ Clear Form", use_container_width=True):
+            st.session_state.recipe_ingredients = pd.DataFrame()
+            rerun_fragment()
+
+# --- TAB 3: AUTO-PLAN EMPTY SLOTS ---
+@page_fragment("Menu")
+def auto_planner():
+    plan_start = week_start(st.session_state.menu_anchor)
+    st.subheader(f"Fill the empty slots of the week of {plan_start:%d %b} from what's in stock")
+    c1, c2 = st.columns(2)
+    plan_persons = c1.number_input("Persons per meal", min_value=1, step=1, value=2, key="plan_persons")
+    no_repeat_days = c2.number_input("Don't repeat a dish within (days)", min_value=1, max_value=7, step=1, value=2, key="plan_no_repeat")
+
+    # Each click draws a new seed, so ties between equally good recipes come out differently
+    if st.button("🪄 Generate Plan", use_container_width=True):
+        st.session_state.plan_seed = st.session_state.get('plan_seed', 0) + 1
+        st.session_state.proposed_plan = generate_menu_plan(
+            plan_persons, no_repeat_days=no_repeat_days, seed=st.session_state.plan_seed, start=plan_start
+        )
+
+    proposed = st.session_state.get('proposed_plan')
+    if proposed is not None and proposed.empty:
+        st.info("Every slot from today to the end of that week is already planned (or there are no recipes with ingredients yet).")
+    elif proposed is not None:
+        st.dataframe(build_week_grid(proposed, start=week_start(proposed['meal_date'].min())), use_container_width=True)
+        st.caption(f"Missing ingredients across the new meals: {proposed['shortfall'].sum():.1f} (in whole-ingredient equivalents)")
+        if st.button("💾 Save Plan", use_container_width=True):
+            set_menu_slots(proposed[['meal_date', 'meal_time', 'recipe_id', 'num_persons']].itertuples(index=False))
+            del st.session_state.proposed_plan
+            st.session_state.show_management_panel = False
+            st.rerun()
+
+# --- MANAGEMENT PANEL ---
+@page_fragment("Menu")
+def management_panel():
+    if st.button("✏️ Manage Menu & Recipes", use_container_width=True):
+        st.session_state.show_management_panel = not st.session_state.show_management_panel
+
+    if st.session_state.show_management_panel:
+        with st.container(border=True):
+            tab1, tab2, tab3 = st.tabs(["🗓️ Set Menu Slot", "🍲 Manage Recipes", "🪄 Auto-Plan"])
+            with tab1:
+                slot_editor()
+            with tab2:
+                recipe_editor()
+            with tab3:
+                auto_planner()
+
+# --- CALENDAR DISPLAY ---
+# Each view reads only its own date range of the plan, however much history has built up.
+def history_view(end):
+    """Past meals in the HISTORY_DAYS before `end`, newest first, with whether they were cooked."""
+    start = end - datetime.timedelta(days=HISTORY_DAYS)
+    st.caption(f"{start:%d %b %Y} to {end - datetime.timedelta(days=1):%d %b %Y}")
+    past = get_menu_plan(start, end)
+    if past.empty:
+        st.info("No meals were planned in these weeks.")
+        return
+    cooked = get_cooked_slots(start, end)
+    cooked_keys = set(zip(cooked['meal_date'], cooked['meal_time']))
+    past = past.assign(meal_order=past['meal_time'].map(MEALS.index)).sort_values(['meal_date', 'meal_order'], ascending=False)
+    st.dataframe(pd.DataFrame({
+        'Date': [f"{day:%a %d %b %Y}" for day in past['meal_date']],
+        'Meal': past['meal_time'],
+        'Dish': past['recipe_name'],
+        'Persons': past['num_persons'],
+        'Cooked': [(day, meal) in cooked_keys for day, meal in zip(past['meal_date'], past['meal_time'])],
+    }), hide_index=True, use_container_width=True)
+    st.caption(f"{len(past)} meal(s) planned, {len(cooked_keys)} marked cooked.")
+
+@page_fragment("Menu")
+def timetable():
+    st.markdown("---")
+    st.header("📅 Menu Calendar")
+
+    view = st.radio("View", ["Week", "Month", "History"], horizontal=True, key="menu_view", label_visibility="collapsed")
+    n1, n2, n3 = st.columns([0.2, 0.6, 0.2])
+    if n1.button("◀ Earlier", use_container_width=True):
+        shift_anchor(view, -1)
+    if n3.button("Later ▶", use_container_width=True):
+        shift_anchor(view, +1)
+    if n2.button("Today", use_container_width=True):
+        st.session_state.menu_anchor = datetime.date.today()
+    anchor = st.session_state.menu_anchor
+
+    if view == "History":
+        # Pages back from the day before today (or before the week shown, when that is earlier)
+        history_view(min(anchor, datetime.date.today()))
+        return
+    if view == "Week":
+        start, days = week_start(anchor), 7
+        title = f"Week of {start:%d %b %Y}"
+    else:
+        start, days = month_range(anchor)
+        title = f"{start:%B %Y}"
+    st.subheader(title)
+
+    menu_plan_df = get_menu_plan(start, start + datetime.timedelta(days=days))
+    if not menu_plan_df.empty:
+        st.dataframe(build_week_grid(menu_plan_df, start=start, days=days), use_container_width=True)
+    else:
+        st.info("Nothing is planned for these days yet. Add some meals using the management panel above!")
+
+management_panel()
+timetable()
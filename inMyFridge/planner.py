@@ -0,0 +1,68 @@
+# planner.py
+
+import numpy as np
+import pandas as pd
+from forecast import DAYS, MEALS
+
+# A recipe is not planned again within this many days of another slot serving it (1 = not twice a day)
+NO_REPEAT_DAYS = 2
+
+def plan_week(matrix, stock, plan_df, dates, persons=2, no_repeat_days=NO_REPEAT_DAYS, seed=None):
+    """Fills the empty slots of `dates`, greedily keeping the shortfall against stock low.
+
+    `matrix` is a RecipeMatrix, `stock` its aligned stock vector in base units (consumed in place) and
+    `plan_df` the slots already planned (meal_date, meal_time, recipe_id, num_persons), which may reach
+    a few days either side of `dates` so variety holds across week boundaries. Planned slots on
+    `dates` reserve their ingredients first; the empty ones are then filled in date order, each with the recipe
+    whose ingredients are least short given what is left. Shortfall is counted as the missing share of
+    each ingredient, so grams, millilitres and pieces never mix. After each pick only the recipes sharing
+    an item with it are re-scored. A recipe is not placed within `no_repeat_days` of a slot already
+    serving it while another recipe can be (otherwise the one served longest ago wins); ties are
+    broken at random (`seed`).
+    Returns the new slots with meal_date, meal_day, meal_time, recipe_id, recipe_name, num_persons and shortfall.
+    """
+    columns = ['meal_date', 'meal_day', 'meal_time', 'recipe_id', 'recipe_name', 'num_persons', 'shortfall']
+    candidates = np.diff(matrix.indptr) > 0  # recipes without ingredients are never proposed
+    if not candidates.any():
+        return pd.DataFrame(columns=columns)
+    rng = np.random.default_rng(seed)
+    row_of = pd.Series(np.arange(len(matrix)), index=matrix.recipe_ids)
+
+    # 1. Planned slots reserve their stock and count towards variety
+    served_on = {}  # recipe row -> days (ordinals) it is served
+    planned = set()
+    for day, meal, recipe_id, num_persons in plan_df[['meal_date', 'meal_time', 'recipe_id', 'num_persons']].itertuples(index=False):
+        planned.add((day, meal))
+        row = row_of.get(recipe_id)
+        if row is None:
+            continue
+        if day in dates:
+            matrix.consume(stock, row, num_persons)
+        served_on.setdefault(row, []).append(day.toordinal())
+
+    # 2. Score every recipe once, then keep the scores current as stock is consumed
+    shares = matrix.missing_shares(stock, persons)
+    scores = np.bincount(matrix.rows, weights=shares, minlength=len(matrix))
+    jitter = rng.random(len(matrix)) * 1e-6
+
+    new_slots = []
+    for day in sorted(dates):
+        for meal in MEALS:
+            if (day, meal) in planned:
+                continue
+            # Days since (or until) each recipe is served; with too few recipes, the longest gap wins
+            gap = np.full(len(matrix), np.inf)
+            for served_row, days in served_on.items():
+                gap[served_row] = min(abs(day.toordinal() - d) for d in days)
+            allowed = candidates & (gap >= min(no_repeat_days, gap[candidates].max()))
+            row = int(np.argmin(np.where(allowed, scores + jitter, np.inf)))
+            new_slots.append((day, DAYS[day.weekday()], meal, matrix.recipe_ids[row], matrix.recipe_names[row], persons, scores[row]))
+            served_on.setdefault(row, []).append(day.toordinal())
+
+            cols = matrix.consume(stock, row, persons)
+            entries = matrix.entries_using(cols)
+            updated = matrix.missing_shares(stock, persons, entries)
+            scores += np.bincount(matrix.rows[entries], weights=updated - shares[entries], minlength=len(matrix))
+            shares[entries] = updated
+
+    return pd.DataFrame(new_slots, columns=columns)
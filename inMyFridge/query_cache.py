@@ -0,0 +1,189 @@
+# query_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text, bindparam
+from db_connector import get_db_connection
+from instrumentation import record_cache_lookup, record_result_rows
+
+# Tables a cached query can depend on. Each one carries its own version counter per household.
+TABLES = ('households', 'stock_items', 'inventory', 'recipes', 'recipe_ingredients', 'menu_plan', 'menu_requirements', 'inventory_ledger', 'inventory_lots')
+MAX_ENTRIES = 512
+
+def _scopes(tables, household_id=None):
+    """Version keys a query depends on: each table's shared scope plus, if given, the household's own."""
+    scopes = [(table, None) for table in tables]
+    if household_id is not None:
+        scopes += [(table, household_id) for table in tables]
+    return tuple(scopes)
+
+class QueryCache:
+    """Process-wide cache of query results, tagged with the tables (and household) each query reads.
+
+    Versions are kept per (table, household), with household None standing for data shared by all
+    households. A result stays valid while every version it read is unchanged (and its ttl has not
+    expired), so a write only evicts the queries that depend on what it touched, in the household
+    that made it.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._versions = {}  # (table, household_id) -> version, missing = 0
+        self._table_versions = {}  # table -> writes to it in any household, missing = 0
+        self._entries = OrderedDict()  # key -> (scopes, versions, expires_at, DataFrame)
+        self._stats = {table: {'hits': 0, 'misses': 0, 'invalidations': 0} for table in TABLES}
+
+    def versions(self, scopes):
+        """Current version tuple for the given (table, household) scopes."""
+        with self._lock:
+            return tuple(self._versions.get(scope, 0) for scope in scopes)
+
+    def table_versions(self, tables):
+        """Version tuple counting writes to each table in every household (for process-wide structures)."""
+        with self._lock:
+            return tuple(self._table_versions.get(table, 0) for table in tables)
+
+    def lookup(self, key, scopes):
+        """Returns the cached DataFrame for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            current = tuple(self._versions.get(scope, 0) for scope in scopes)
+            hit = entry is not None and entry[1] == current and (entry[2] is None or entry[2] > time.monotonic())
+            for table in {table for table, _ in scopes}:
+                self._stats.setdefault(table, {'hits': 0, 'misses': 0, 'invalidations': 0})
+                self._stats[table]['hits' if hit else 'misses'] += 1
+            if not hit:
+                return None
+            self._entries.move_to_end(key)
+            return entry[3]
+
+    def store(self, key, scopes, versions, df, ttl=None):
+        """Stores a result computed while `scopes` were at `versions`."""
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (frozenset(scopes), versions, expires_at, df)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tables, household_id=None):
+        """Bumps the version of each table for one household, or for everyone when household_id is None."""
+        bumped = {(table, household_id) for table in tables}
+        with self._lock:
+            for scope in bumped:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+                self._table_versions[scope[0]] = self._table_versions.get(scope[0], 0) + 1
+                self._stats.setdefault(scope[0], {'hits': 0, 'misses': 0, 'invalidations': 0})
+                self._stats[scope[0]]['invalidations'] += 1
+            # Drop entries that can never be hit again to free memory right away
+            stale = [key for key, entry in self._entries.items() if entry[0] & bumped]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drops every cached result (e.g. after changes made outside the app)."""
+        self.invalidate(*self._stats)
+
+    def stats(self):
+        """Per-table hit/miss/invalidation counters plus the current shared versions."""
+        with self._lock:
+            stats = {
+                table: dict(counters, version=self._versions.get((table, None), 0))
+                for table, counters in self._stats.items()
+            }
+            stats['entries'] = len(self._entries)
+            return stats
+
+@st.cache_resource
+def get_query_cache():
+    """The cache shared by every session in this process."""
+    return QueryCache()
+
+def _cache_key(sql, params):
+    """Hashable key for a query and its parameters (list parameters become tuples)."""
+    items = sorted((params or {}).items())
+    return sql, tuple((name, tuple(value) if isinstance(value, (list, set)) else value) for name, value in items)
+
+def _run_query(sql, params):
+    """Runs a read query straight against the engine and returns a DataFrame.
+
+    List/tuple parameters are bound as expanding IN lists.
+    """
+    params = dict(params or {})
+    statement = text(sql).bindparams(*[
+        bindparam(name, expanding=True) for name, value in params.items() if isinstance(value, (list, tuple))
+    ])
+    conn = get_db_connection()
+    with conn.engine.connect() as c:
+        df = pd.read_sql(statement, c, params=params)
+    record_result_rows(sql, len(df))
+    return df
+
+def cached_query(sql, tables, params=None, ttl=None, household_id=None):
+    """Runs `sql` through the table-versioned cache.
+
+    `tables` lists every table the query reads and `household_id` the household it is scoped to
+    (None for queries over shared data only); `ttl` (seconds) still bounds staleness for changes
+    made outside the app.
+    """
+    cache = get_query_cache()
+    key = _cache_key(sql, params)
+    scopes = _scopes(tables, household_id)
+    df = cache.lookup(key, scopes)
+    record_cache_lookup(sql, df is not None)
+    if df is None:
+        # Capture versions before querying so a concurrent write can't be masked by this result
+        versions = cache.versions(scopes)
+        df = _run_query(sql, params)
+        cache.store(key, scopes, versions, df, ttl)
+    return df.copy()
+
+def cached_value(key, tables, build, ttl=None, household_id=None):
+    """Caches `build()` (e.g. a structure derived from query results) under the same table versions.
+
+    `key` must not be a SQL string; the value is returned as stored, so callers must not mutate it.
+    """
+    cache = get_query_cache()
+    scopes = _scopes(tables, household_id)
+    value = cache.lookup(key, scopes)
+    record_cache_lookup(key[0] if isinstance(key, tuple) else key, value is not None)
+    if value is None:
+        versions = cache.versions(scopes)
+        value = build()
+        cache.store(key, scopes, versions, value, ttl)
+    return value
+
+# Invalidations held back by deferred_invalidation(), per thread
+_deferred = threading.local()
+
+def invalidate_tables(*tables, household_id=None):
+    """Marks cached results that read any of `tables` as stale, in one household or (None) in all."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is not None:
+        pending.update((table, household_id) for table in tables)
+        return
+    get_query_cache().invalidate(*tables, household_id=household_id)
+
+@contextmanager
+def deferred_invalidation():
+    """Holds back this thread's invalidate_tables() calls and applies them once on exit.
+
+    For bulk writes made of many small transactions (imports): each one would otherwise sweep the
+    cache. Cached reads may be stale until the block exits.
+    """
+    if getattr(_deferred, 'pending', None) is not None:
+        yield  # already inside a deferred block; the outermost one applies everything
+        return
+    _deferred.pending = set()
+    try:
+        yield
+    finally:
+        pending, _deferred.pending = _deferred.pending, None
+        for household_id in {household for _, household in pending}:
+            get_query_cache().invalidate(*sorted({table for table, household in pending if household == household_id}), household_id=household_id)
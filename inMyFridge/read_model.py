@@ -0,0 +1,227 @@
+# read_model.py
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from db_connector import get_db_connection
+from query_cache import get_query_cache
+from instrumentation import record_cache_lookup
+from units import to_base_units
+from matcher import RecipeMatrix
+
+# Writes to any of these (in any household) replace the model
+READ_MODEL_TABLES = ('stock_items', 'recipes', 'recipe_ingredients')
+# Seconds before the model is rebuilt anyway, so catalogue changes made outside the app show up
+READ_MODEL_TTL = 300
+# recipe owner of shared recipes (household ids start at 1) and of ids no recipe has
+SHARED, NO_RECIPE = 0, -1
+
+READ_MODEL_SOURCES = {
+    'items': 'SELECT item_id, item_name, base_unit, density_g_per_ml, piece_weight_g FROM stock_items;',
+    'recipes': 'SELECT recipe_id, recipe_name, household_id FROM recipes;',
+    'ingredients': 'SELECT recipe_id, item_id, quantity_per_person, unit FROM recipe_ingredients;',
+}
+
+# -----------------------------------------------------------------------------
+# --- MODEL ---
+# -----------------------------------------------------------------------------
+
+def _id_column(ids, values, size, fill, dtype):
+    """A column indexed by id: position `id` holds that row's value, ids without a row hold `fill`."""
+    column = np.full(size, fill, dtype=dtype)
+    column[ids] = values
+    return column
+
+class CatalogueModel:
+    """Read-only, array-backed snapshot of stock_items, recipes and recipe_ingredients.
+
+    Item and recipe attributes are NumPy columns indexed by id (`item_name[item_id]`,
+    `recipe_owner[recipe_id]`), recipe ingredients are CSR lists (the entries of recipe r are
+    `indptr[r]:indptr[r + 1]` of the `ing_*` columns, per-person quantities already converted to
+    the item's base unit) and names map to ids through dicts. One model is shared by every session
+    of the process and never changed in place; per-household views derived from it are built on
+    first use and kept with it.
+    """
+
+    def __init__(self, items, recipes, ingredients, version=None):
+        self.version = version
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._views = {}
+
+        item_ids = items['item_id'].to_numpy(dtype=np.int64)
+        n_items = int(item_ids.max()) + 1 if len(item_ids) else 0
+        self.item_exists = _id_column(item_ids, True, n_items, False, bool)
+        self.item_name = _id_column(item_ids, items['item_name'].to_numpy(dtype=object), n_items, None, object)
+        self.item_base_unit = _id_column(item_ids, items['base_unit'].to_numpy(dtype=object), n_items, None, object)
+        self.item_density = _id_column(item_ids, items['density_g_per_ml'].to_numpy(dtype=float), n_items, np.nan, float)
+        self.item_piece_weight = _id_column(item_ids, items['piece_weight_g'].to_numpy(dtype=float), n_items, np.nan, float)
+        self.item_ids_by_name = {str(name).casefold(): int(item_id) for item_id, name in zip(item_ids, items['item_name'])}
+
+        recipe_ids = recipes['recipe_id'].to_numpy(dtype=np.int64)
+        n_recipes = int(recipe_ids.max()) + 1 if len(recipe_ids) else 0
+        self.recipe_name = _id_column(recipe_ids, recipes['recipe_name'].to_numpy(dtype=object), n_recipes, None, object)
+        owners = recipes['household_id'].to_numpy(dtype=float)
+        self.recipe_owner = _id_column(recipe_ids, np.where(np.isnan(owners), SHARED, owners).astype(np.int64), n_recipes, NO_RECIPE, np.int64)
+        self.recipe_ids_by_name = {}  # (owner, casefolded name) -> recipe_id
+        for recipe_id, name, owner in zip(recipe_ids, recipes['recipe_name'], self.recipe_owner[recipe_ids]):
+            self.recipe_ids_by_name[(int(owner), str(name).casefold())] = int(recipe_id)
+
+        # Entries of recipes or items deleted between the three reads are dropped
+        ing_recipe = ingredients['recipe_id'].to_numpy(dtype=np.int64)
+        ing_item = ingredients['item_id'].to_numpy(dtype=np.int64)
+        keep = (ing_recipe < n_recipes) & (ing_item < n_items)
+        keep[keep] = (self.recipe_owner[ing_recipe[keep]] != NO_RECIPE) & self.item_exists[ing_item[keep]]
+        order = np.argsort(ing_recipe[keep], kind='stable')
+        ing_recipe, self.ing_item = ing_recipe[keep][order], ing_item[keep][order]
+        self.ing_quantity = ingredients['quantity_per_person'].to_numpy(dtype=float)[keep][order]
+        self.ing_unit = ingredients['unit'].to_numpy(dtype=object)[keep][order]
+        self.ing_base_quantity, _ = to_base_units(
+            self.ing_quantity, self.ing_unit, self.item_base_unit[self.ing_item],
+            density=self.item_density[self.ing_item], piece_weight=self.item_piece_weight[self.ing_item]
+        )
+        self.indptr = np.r_[0, np.cumsum(np.bincount(ing_recipe, minlength=n_recipes))].astype(np.int64)
+
+    def age(self):
+        """Seconds since the model was built."""
+        return time.monotonic() - self.built_at
+
+    def nbytes(self):
+        """Approximate memory held by the arrays (object columns count their pointers only)."""
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    def _view(self, key, build):
+        """A value derived from the model, built once; callers must not mutate it."""
+        value = self._views.get(key)
+        if value is None:
+            value = build()
+            with self._lock:
+                value = self._views.setdefault(key, value)
+        return value
+
+    # --- lookups ---
+
+    def item_name_of(self, item_id):
+        """Name of an item id, or None if the model has no such item (e.g. added by another process)."""
+        return self.item_name[item_id] if 0 <= item_id < len(self.item_name) else None
+
+    def recipe_name_of(self, recipe_id):
+        """Name of a recipe id, or None if the model has no such recipe."""
+        return self.recipe_name[recipe_id] if 0 <= recipe_id < len(self.recipe_name) else None
+
+    def item_id(self, name):
+        """Id of the catalogue item called `name` (any case), or None."""
+        return self.item_ids_by_name.get(str(name).casefold())
+
+    def recipe_id(self, name, household_id):
+        """Id of the recipe called `name` that the household sees (its own before a shared one), or None."""
+        key = str(name).casefold()
+        return self.recipe_ids_by_name.get((household_id, key), self.recipe_ids_by_name.get((SHARED, key)))
+
+    def entries(self, recipe_ids):
+        """Ingredient entry positions of `recipe_ids`, and for each the index into `recipe_ids` it belongs to."""
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        known = (recipe_ids >= 0) & (recipe_ids < len(self.recipe_owner))
+        safe = np.where(known, recipe_ids, 0)
+        starts = np.take(self.indptr, safe, mode='clip')
+        lengths = np.where(known, np.take(self.indptr, safe + 1, mode='clip') - starts, 0)
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) + np.repeat(starts - offsets, lengths)
+        return positions, np.repeat(np.arange(len(recipe_ids)), lengths)
+
+    # --- per-household views ---
+
+    def visible_recipe_ids(self, household_id):
+        """Ids of the recipes a household can use (its own and the shared ones), in name order."""
+        def build():
+            ids = np.flatnonzero((self.recipe_owner == household_id) | (self.recipe_owner == SHARED))
+            names = pd.Series(self.recipe_name[ids], dtype=object).str.casefold()
+            return ids[np.argsort(names.to_numpy(dtype=str), kind='stable')]
+        return self._view(('visible', household_id), build)
+
+    def recipes_frame(self, household_id):
+        """recipe_id / recipe_name of the household's recipes, in name order."""
+        def build():
+            ids = self.visible_recipe_ids(household_id)
+            return pd.DataFrame({'recipe_id': ids, 'recipe_name': self.recipe_name[ids]})
+        return self._view(('recipes', household_id), build)
+
+    def items_frame(self):
+        """item_id / item_name of the whole catalogue, in name order."""
+        def build():
+            ids = np.flatnonzero(self.item_exists)
+            frame = pd.DataFrame({'item_id': ids, 'item_name': self.item_name[ids]})
+            return frame.sort_values('item_name', kind='stable', ignore_index=True)
+        return self._view(('items',), build)
+
+    def ingredient_frame(self, recipe_ids):
+        """One row per ingredient of `recipe_ids`, with the item's conversion columns and `per_person_base`."""
+        positions, belongs_to = self.entries(recipe_ids)
+        recipes = np.asarray(recipe_ids, dtype=np.int64)[belongs_to]
+        items = self.ing_item[positions]
+        return pd.DataFrame({
+            'recipe_id': recipes,
+            'recipe_name': self.recipe_name[recipes],
+            'item_id': items,
+            'item_name': self.item_name[items],
+            'quantity_per_person': self.ing_quantity[positions],
+            'unit': self.ing_unit[positions],
+            'base_unit': self.item_base_unit[items],
+            'density_g_per_ml': self.item_density[items],
+            'piece_weight_g': self.item_piece_weight[items],
+            'per_person_base': self.ing_base_quantity[positions],
+        })
+
+    def household_ingredients(self, household_id):
+        """ingredient_frame of every recipe the household can use."""
+        return self._view(('ingredients', household_id), lambda: self.ingredient_frame(self.visible_recipe_ids(household_id)))
+
+    def recipe_matrix(self, household_id):
+        """The RecipeMatrix of the household's recipes, straight from the CSR columns."""
+        def build():
+            ingredients = self.household_ingredients(household_id)
+            return RecipeMatrix.from_ingredients(
+                ingredients['recipe_id'], ingredients['recipe_name'], ingredients['item_name'], ingredients['per_person_base']
+            )
+        return self._view(('matrix', household_id), build)
+
+# -----------------------------------------------------------------------------
+# --- SHARED INSTANCE ---
+# -----------------------------------------------------------------------------
+
+def load_read_model(conn, version=None):
+    """Reads the three catalogue tables of `conn` and builds a model from them."""
+    with conn.engine.connect() as c:
+        frames = {name: pd.read_sql(text(sql), c) for name, sql in READ_MODEL_SOURCES.items()}
+    return CatalogueModel(frames['items'], frames['recipes'], frames['ingredients'], version)
+
+@st.cache_resource
+def _read_models():
+    """Process-wide {backend: CatalogueModel}, and the lock rebuilds take turns on."""
+    return {}, threading.Lock()
+
+def get_read_model():
+    """The current catalogue model of the active backend, rebuilt once after the catalogue changes.
+
+    A rebuilt model replaces the old one in a single assignment; sessions still holding the old
+    one finish their rerun with it.
+    """
+    conn = get_db_connection()
+    cache = get_query_cache()
+    models, lock = _read_models()
+    model = models.get(conn)
+    fresh = model is not None and model.version == cache.table_versions(READ_MODEL_TABLES) and model.age() < READ_MODEL_TTL
+    record_cache_lookup('read_model', fresh)
+    if fresh:
+        return model
+    with lock:
+        model = models.get(conn)
+        # Versions are read before the tables, so a write landing mid-build triggers another rebuild
+        version = cache.table_versions(READ_MODEL_TABLES)
+        if model is None or model.version != version or model.age() >= READ_MODEL_TTL:
+            model = models[conn] = load_read_model(conn, version)
+    return model
@@ -0,0 +1,207 @@
+# search_index.py
+
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Fuzzy lookups read at most this many posting entries and score this many candidates per result exactly
+CANDIDATE_BUDGET = 1000
+SCORED_PER_RESULT = 4
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+# -----------------------------------------------------------------------------
+# --- NORMALIZATION ---
+# -----------------------------------------------------------------------------
+
+def normalize(name):
+    """Lower-cases a name and collapses punctuation and spacing ("Red  Onion," -> "red onion")."""
+    return ' '.join(re.findall(r'\w+', str(name).lower()))
+
+def _singular(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith('oes'):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def dedupe_key(name):
+    """Key under which spelling variants of one item collide ("Onions" / "onion" / "ONION ")."""
+    return ' '.join(_singular(word) for word in normalize(name).split())
+
+def trigrams(text):
+    """Character trigrams of a normalized name, padded so word starts weigh more."""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+# -----------------------------------------------------------------------------
+# --- INDEX ---
+# -----------------------------------------------------------------------------
+
+class SearchIndex:
+    """In-memory name index answering typeahead (prefix) and fuzzy (trigram) lookups.
+
+    Names are kept in one sorted list and their later word suffixes ("red onion" -> "onion") in
+    another, so a prefix lookup is a bisect plus a short walk over each. Names without enough
+    prefix hits are ranked by trigram Jaccard similarity through an inverted index. Entries can
+    be added and removed one at a time, so writes keep the index current without a rebuild.
+    Each entry may carry a `tag` (e.g. the owning household) to filter results by.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.Lock()
+        self._names = {}  # doc_id -> name as stored
+        self._texts = {}  # doc_id -> normalized name
+        self._tags = {}  # doc_id -> tag
+        self._grams = {}  # doc_id -> trigrams of the normalized name
+        self._postings = defaultdict(dict)  # trigram -> {trigram count of the name: doc_ids}
+        self._df = defaultdict(int)  # trigram -> number of names containing it
+        self._by_key = defaultdict(set)  # dedupe key -> doc_ids
+        self._starts = []  # sorted (normalized name, doc_id)
+        self._suffixes = []  # sorted (later word suffix, doc_id)
+        self.built_at = time.monotonic()
+
+        for doc_id, name, *tag in entries:
+            self._add(doc_id, name, tag[0] if tag else None, keep_sorted=False)
+        self._starts.sort()
+        self._suffixes.sort()
+
+    def __len__(self):
+        return len(self._names)
+
+    def age(self):
+        """Seconds since the index was built."""
+        return time.monotonic() - self.built_at
+
+    # --- maintenance ---
+
+    def _sorted_entries(self, doc_id, text):
+        words = text.split()
+        yield self._starts, (text, doc_id)
+        for i in range(1, len(words)):
+            yield self._suffixes, (' '.join(words[i:]), doc_id)
+
+    def _add(self, doc_id, name, tag, keep_sorted=True):
+        if doc_id in self._names:
+            self._remove(doc_id)
+        text = normalize(name)
+        self._names[doc_id] = name
+        self._texts[doc_id] = text
+        self._tags[doc_id] = tag
+        self._grams[doc_id] = grams = trigrams(text)
+        for gram in grams:
+            self._postings[gram].setdefault(len(grams), set()).add(doc_id)
+            self._df[gram] += 1
+        self._by_key[dedupe_key(name)].add(doc_id)
+        for entries, entry in self._sorted_entries(doc_id, text):
+            if keep_sorted:
+                bisect.insort(entries, entry)
+            else:
+                entries.append(entry)
+
+    def _remove(self, doc_id):
+        name = self._names.pop(doc_id, None)
+        if name is None:
+            return
+        text = self._texts.pop(doc_id)
+        self._tags.pop(doc_id, None)
+        grams = self._grams.pop(doc_id)
+        for gram in grams:
+            self._postings[gram][len(grams)].discard(doc_id)
+            self._df[gram] -= 1
+        self._by_key[dedupe_key(name)].discard(doc_id)
+        for entries, entry in self._sorted_entries(doc_id, text):
+            position = bisect.bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+
+    def add(self, doc_id, name, tag=None):
+        """Indexes (or re-indexes, e.g. after a rename) one entry."""
+        with self._lock:
+            self._add(doc_id, name, tag)
+
+    def remove(self, doc_id):
+        """Drops one entry; unknown ids are ignored."""
+        with self._lock:
+            self._remove(doc_id)
+
+    # --- lookups ---
+
+    def _similar(self, text, tags, k, exclude=()):
+        """Yields (score, doc_id) for entries sharing trigrams with `text`, scored by Jaccard similarity.
+
+        Postings are read rarest trigram first, shortest names first within each, until
+        CANDIDATE_BUDGET entries have been seen; only the k * SCORED_PER_RESULT entries sharing the
+        most of those trigrams get an exact score. Rare trigrams are the ones that tell names apart
+        and short names score highest, so this keeps lookups bounded on large catalogues at the cost
+        of occasionally missing a weak match.
+        """
+        query_grams = trigrams(text)
+        counts = Counter()
+        read = 0
+        for gram in sorted((g for g in query_grams if self._df.get(g)), key=self._df.get):
+            buckets = self._postings[gram]
+            for size in sorted(buckets):
+                if read >= CANDIDATE_BUDGET:
+                    break
+                counts.update(buckets[size])
+                read += len(buckets[size])
+        for doc_id in exclude:
+            counts.pop(doc_id, None)
+        if tags is not None:
+            counts = Counter({doc_id: n for doc_id, n in counts.items() if self._tags.get(doc_id) in tags})
+        # most_common keeps first-seen order among ties, i.e. shorter names first
+        for doc_id, _ in counts.most_common(k * SCORED_PER_RESULT):
+            grams = self._grams[doc_id]
+            shared = len(query_grams & grams)
+            yield shared / (len(query_grams) + len(grams) - shared), doc_id
+
+    def search(self, query, k=10, tags=None):
+        """Top-k matches for a typed query as (doc_id, name, score), best first.
+
+        Names starting with the query (or with a word starting with it) come first; the rest of the
+        list is filled with fuzzy trigram matches, so typos still find something. `tags` restricts
+        results to entries carrying one of the given tags.
+        """
+        text = normalize(query)
+        if not text:
+            return []
+        with self._lock:
+            hits = {}
+            # Whole-name prefix beats a later word; shorter names read as closer matches
+            for entries, base in ((self._starts, 2.0), (self._suffixes, 1.5)):
+                position = bisect.bisect_left(entries, (text,))
+                end = min(len(entries), position + k * 8)
+                while position < end and entries[position][0].startswith(text):
+                    suffix, doc_id = entries[position]
+                    if doc_id not in hits and (tags is None or self._tags.get(doc_id) in tags):
+                        hits[doc_id] = base - len(suffix) / 1000
+                    position += 1
+            if len(hits) < k:
+                fuzzy = heapq.nlargest(k - len(hits), self._similar(text, tags, k, exclude=hits))
+                hits.update({doc_id: score for score, doc_id in fuzzy})
+            ranked = heapq.nlargest(k, hits.items(), key=lambda item: item[1])
+            return [(doc_id, self._names[doc_id], round(score, 4)) for doc_id, score in ranked]
+
+    def near_duplicates(self, name, threshold=NEAR_DUPLICATE_THRESHOLD, k=5, tags=None):
+        """Existing entries that look like the same thing as `name` as (doc_id, name, score), best first.
+
+        Spelling variants that share a dedupe key score 1.0; others need a trigram similarity of at
+        least `threshold`.
+        """
+        text = normalize(name)
+        if not text:
+            return []
+        with self._lock:
+            same_key = {doc_id for doc_id in self._by_key.get(dedupe_key(name), ())
+                        if tags is None or self._tags.get(doc_id) in tags}
+            hits = {doc_id: 1.0 for doc_id in same_key}
+            for score, doc_id in self._similar(text, tags, k, exclude=same_key):
+                if score >= threshold:
+                    hits[doc_id] = score
+            ranked = heapq.nlargest(k, hits.items(), key=lambda item: item[1])
+            return [(doc_id, self._names[doc_id], round(score, 4)) for doc_id, score in ranked]
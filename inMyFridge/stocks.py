@@ -2,112 +2,336 @@
 
 import streamlit as st
 import pandas as pd
+from concurrent.futures import wait
 from database_utils import (
-    get_inventory, 
+    get_inventory_page, 
     add_stock_item, 
-    update_inventory_quantity, 
-    delete_inventory_item
+    apply_inventory_changes,
+    find_similar_stock_items,
+    set_reorder_points,
+    get_inventory_ledger,
+    record_waste,
+    DEFAULT_REORDER_POINTS
 )
+from units import UNIT_TO_BASE
+from utils import rerun_fragment
+from importer import import_csv, REQUIRED_COLUMNS, OPTIONAL_COLUMNS
+from instrumentation import page_fragment
+from write_queue import queue_adjustment
 
 st.set_page_config(page_title="Stock Management", layout="wide")
 st.title("🛒 Stock Management")
 st.markdown("Add, view, and manage your kitchen inventory directly from the database.")
 
+# Each section below is a fragment: a widget inside one reruns (and re-queries) only that section.
+# Sections reach for a full-page st.rerun() only when another section has to show their change.
+
 # --- UI STATE MANAGEMENT ---
 if 'show_add_stock_panel' not in st.session_state:
     st.session_state.show_add_stock_panel = False
 
-if st.button("➕ Add New Stock Item", use_container_width=True):
-    st.session_state.show_add_stock_panel = not st.session_state.show_add_stock_panel
-
 # --- ADD NEW STOCK PANEL ---
-if st.session_state.show_add_stock_panel:
+@page_fragment("Stocks")
+def add_item_panel():
+    if st.button("➕ Add New Stock Item", use_container_width=True):
+        st.session_state.show_add_stock_panel = not st.session_state.show_add_stock_panel
+
+    if not st.session_state.show_add_stock_panel:
+        return
     with st.container(border=True):
-        with st.form("new_stock_form", clear_on_submit=True):
+        # Inputs are kept on submit so a near-duplicate warning can be confirmed with a second click
+        with st.form("new_stock_form"):
             st.subheader("Add a New Item to Your Inventory")
             
-            c1, c2, c3 = st.columns(3)
+            c1, c2, c3, c4 = st.columns(4)
             name = c1.text_input("Item Name", placeholder="e.g., Rice")
             quantity = c2.number_input("Initial Quantity", min_value=0.0, step=0.1, format="%.2f")
             unit = c3.selectbox("Unit", ["kg", "g", "L", "ml", "pcs"])
+            expires_on = c4.date_input("Best Before (optional)", value=None)
             
             submitted = st.form_submit_button("✔️ Add Stock Item")
-            if submitted:
-                if name:
+            if submitted and not name:
+                st.warning("Please enter an item name.")
+            elif submitted:
+                # The same name in another case is the same item; close spellings ("Onions") are flagged
+                similar = find_similar_stock_items(name)
+                similar = similar[similar['item_name'].str.casefold() != name.casefold()]
+                if not similar.empty and st.session_state.get('confirm_item_name') != name:
+                    st.session_state.confirm_item_name = name
+                    st.warning(
+                        f"'{name}' looks like existing item(s): {', '.join(similar['item_name'])}. "
+                        "Click Add again to create it anyway."
+                    )
+                else:
+                    st.session_state.pop('confirm_item_name', None)
                     try:
-                        add_stock_item(name, quantity, unit)
-                        st.success(f"Added '{name}' to your inventory!")
+                        add_stock_item(name, quantity, unit, expires_on)
+                        st.toast(f"Added '{name}' to your inventory!")
                         st.session_state.show_add_stock_panel = False
+                        # The stock list below has to show the new item
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error adding item: {e}")
-                else:
-                    st.warning("Please enter an item name.")
         
         if st.button("✖️ Close"):
             st.session_state.show_add_stock_panel = False
+            rerun_fragment()
+
+add_item_panel()
+
+# --- BULK IMPORT ---
+IMPORT_KINDS = {"Purchases (receipts)": 'stock', "Item catalogue": 'catalogue', "Recipe book": 'recipes'}
+
+def import_message(kind, summary):
+    return (
+        f"Imported {summary['rows']} row(s): {summary['items_created']} new catalogue item(s)"
+        + (f", {summary['stocked']} stock update(s)" if kind == 'stock' else "")
+        + (f", {summary['recipes']} recipe(s) ({summary['recipes_created']} new)" if kind == 'recipes' else "")
+        + (f". Skipped {summary['skipped']} row(s) with a blank name, bad number or unknown unit." if summary['skipped'] else ".")
+    )
+
+@page_fragment("Stocks")
+def bulk_import():
+    with st.expander("📥 Bulk Import from CSV", expanded='import_result' in st.session_state):
+        # The result of the last import, kept over the full rerun that refreshed the stock list
+        if 'import_result' in st.session_state:
+            st.success(import_message(*st.session_state.pop('import_result')))
+        kind_label = st.radio("What does the file contain?", list(IMPORT_KINDS), horizontal=True, key="import_kind")
+        kind = IMPORT_KINDS[kind_label]
+        optional = f" (optional: {', '.join(OPTIONAL_COLUMNS[kind])})" if kind in OPTIONAL_COLUMNS else ""
+        st.caption(f"Expected columns: {', '.join(REQUIRED_COLUMNS[kind])}{optional}. Large files are read and saved in chunks.")
+        upload = st.file_uploader("CSV file", type="csv", key="import_file")
+        if upload is not None and st.button("📥 Import", use_container_width=True, type="primary"):
+            bar = st.progress(0.0, text="Importing...")
+            size = max(upload.size, 1)
+            try:
+                summary = import_csv(upload, kind, progress=lambda done: bar.progress(
+                    min(upload.tell() / size, 1.0), text=f"Imported {done['rows']} row(s)..."
+                ))
+            except ValueError as e:
+                bar.empty()
+                st.error(str(e))
+                return
+            st.session_state.import_result = (kind, summary)
             st.rerun()
 
+bulk_import()
+
 st.markdown("---")
 
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_OPTIONS = {"Name": 'item_name', "Quantity": 'quantity', "Unit": 'unit', "Last updated": 'last_updated'}
+# Seconds a save waits for its queued quantity changes to be written
+SAVE_TIMEOUT = 10
+
+def pending_changes():
+    """Unsaved grid edits across pages: quantity updates by inventory_id and rows marked for deletion.
+
+    `base` keeps, for each updated row, the quantity and row_version it was edited from (and its
+    name), so a save writes the difference and finds out if the row changed in the meantime.
+    """
+    if 'inventory_changes' not in st.session_state:
+        st.session_state.inventory_changes = {'updates': {}, 'deletes': set(), 'base': {}}
+    return st.session_state.inventory_changes
+
+def grid_rows(editor_key, page_df):
+    """The rows shown in the grid: this page with pending changes applied, frozen while the grid stays up.
+
+    Streamlit drops a grid's edit state once it isn't drawn, so when a page is drawn again its rows are
+    rebuilt from the pending change set; while it stays on screen the edit positions keep pointing at the
+    same rows.
+    """
+    if st.session_state.get('grid_key') != editor_key:
+        changes = pending_changes()
+        rows = page_df[~page_df['inventory_id'].isin(changes['deletes'])].reset_index(drop=True)
+        rows['read_quantity'] = rows['quantity'].astype(float)
+        edited = rows['inventory_id'].map(changes['updates'])
+        rows['quantity'] = edited.fillna(rows['quantity']).astype(float)
+        rows['is_low'] = rows['is_low'].astype(bool)
+        st.session_state.grid_key = editor_key
+        st.session_state.grid_rows = rows
+    return st.session_state.grid_rows
+
+def collect_grid_changes(editor_key, rows):
+    """Folds the grid's edited/deleted rows (by position in `rows`) into the pending change set."""
+    state = st.session_state.get(editor_key)
+    if not state:
+        return
+    changes = pending_changes()
+    ids = rows['inventory_id'].to_numpy()
+    for position, edits in state.get('edited_rows', {}).items():
+        if 'quantity' in edits and edits['quantity'] is not None:
+            row = rows.iloc[int(position)]
+            changes['updates'][int(ids[int(position)])] = float(edits['quantity'])
+            changes['base'].setdefault(int(ids[int(position)]), (float(row['read_quantity']), int(row['row_version']), row['item_name']))
+    for position in state.get('deleted_rows', []):
+        changes['deletes'].add(int(ids[int(position)]))
+
+def reset_grid():
+    """Clears unsaved edits and starts a fresh grid (new editor key, so its widget state resets)."""
+    st.session_state.inventory_changes = {'updates': {}, 'deletes': set(), 'base': {}}
+    st.session_state.grid_version = st.session_state.get('grid_version', 0) + 1
+    st.session_state.pop('grid_key', None)
+
+# --- REORDER POINTS ---
+def reorder_points(page_df):
+    with st.expander("🔔 Reorder Points"):
+        st.caption("An item shows up under \"What's Running Low?\" once its stock drops below its reorder point.")
+        rows_by_name = page_df.set_index('item_name')
+        reorder_item = st.selectbox("Item (from the current page)", rows_by_name.index, key="reorder_item")
+        item_row = rows_by_name.loc[reorder_item]
+        unit_key = str(item_row['unit']).lower()
+        default_point = DEFAULT_REORDER_POINTS.get(unit_key, 0.0)
+        current_point = default_point if pd.isna(item_row['reorder_point']) else float(item_row['reorder_point'])
+
+        c1, c2, c3 = st.columns([2, 1, 1])
+        new_point = c1.number_input(
+            f"Reorder below ({UNIT_TO_BASE.get(unit_key, item_row['unit'])})",
+            min_value=0.0, value=current_point, step=1.0, key=f"reorder_{item_row['inventory_id']}"
+        )
+        if c2.button("💾 Save", use_container_width=True, key="save_reorder"):
+            set_reorder_points({item_row['inventory_id']: new_point})
+            st.toast(f"Reorder point for {reorder_item} saved.")
+            rerun_fragment()
+        if c3.button("↺ Default", use_container_width=True, key="reset_reorder"):
+            set_reorder_points({item_row['inventory_id']: None})
+            st.toast(f"{reorder_item} uses the default reorder point ({default_point:g}) again.")
+            rerun_fragment()
+
+# --- STOCK HISTORY ---
+def stock_activity(page_df):
+    with st.expander("🧾 Recent Stock Activity"):
+        if not page_df.empty:
+            # Spoiled or thrown-away stock is recorded as waste, so it stays apart from meals cooked
+            rows_by_name = page_df.set_index('item_name')
+            c1, c2, c3 = st.columns([2, 1, 1])
+            waste_item = c1.selectbox("Wasted item (from the current page)", rows_by_name.index, key="waste_item")
+            waste_row = rows_by_name.loc[waste_item]
+            waste_qty = c2.number_input(f"Quantity ({waste_row['unit']})", min_value=0.0, step=0.1, format="%.2f", key="waste_qty")
+            if c3.button("🗑️ Record Waste", use_container_width=True, disabled=waste_qty <= 0):
+                record_waste(waste_row['inventory_id'], waste_qty)
+                reset_grid()
+                st.toast(f"Recorded {waste_qty:g} {waste_row['unit']} of {waste_item} as waste.")
+                rerun_fragment()
+
+        ledger_df = get_inventory_ledger()
+        if ledger_df.empty:
+            st.info("No stock changes recorded yet.")
+        else:
+            st.dataframe(ledger_df, hide_index=True, use_container_width=True, column_config={
+                'created_at': st.column_config.DatetimeColumn("When"),
+                'item_name': "Item",
+                'event': "Event",
+                'quantity': st.column_config.NumberColumn("Change", format="%+.2f"),
+                'unit': "Unit",
+                'note': "Note",
+            })
+
 # --- CURRENT STOCK DISPLAY ---
-st.header("Current Stock List")
-
-inventory_df = get_inventory()
-
-if inventory_df.empty:
-    st.info("Your inventory is empty. Add a new item to get started!")
-else:
-    # We will build an editable table. Store edits in a temporary dictionary in session state.
-    if 'inventory_edits' not in st.session_state:
-        st.session_state.inventory_edits = {}
-
-    # Header for our custom table
-    col_header = st.columns([0.1, 0.5, 0.2, 0.2])
-    col_header[1].markdown("**Item Name**")
-    col_header[2].markdown("**Quantity**")
-    col_header[3].markdown("**Unit**")
-
-    # Iterate through the DataFrame to display each item
-    for index, row in inventory_df.iterrows():
-        inventory_id = row['inventory_id']
-        item_name = row['item_name']
-        quantity = row['quantity']
-        unit = row['unit']
-        
-        col_item = st.columns([0.1, 0.5, 0.2, 0.2])
-
-        # Delete Button
-        with col_item[0]:
-            st.button("🗑️", key=f"del_{inventory_id}", on_click=delete_inventory_item, args=(inventory_id,))
-
-        # Item Name (read-only)
-        with col_item[1]:
-            st.markdown(f"**{item_name}**")
-
-        # Quantity (editable)
-        with col_item[2]:
-            new_quantity = st.number_input(
-                "Quantity", 
-                value=float(quantity), 
-                key=f"qty_{inventory_id}", 
-                label_visibility="collapsed",
-                step=1.0 if unit == 'pcs' else 0.1,
-                format="%.2f"
-            )
-            # If the value has changed from the original, store it in our edits dictionary
-            if new_quantity != float(quantity):
-                st.session_state.inventory_edits[inventory_id] = new_quantity
-        
-        # Unit (read-only for simplicity)
-        with col_item[3]:
-            st.markdown(unit)
+# The grid, its save bar and the sections working on the page it shows rerun together: editing a
+# quantity or turning a page fetches one page of rows and redraws only this part.
+@page_fragment("Stocks")
+def stock_list():
+    st.header("Current Stock List")
+
+    c1, c2, c3, c4 = st.columns([0.4, 0.25, 0.15, 0.2])
+    search = c1.text_input("Search", placeholder="Filter by name", key="stock_search")
+    sort_label = c2.selectbox("Sort by", list(SORT_OPTIONS), key="stock_sort")
+    descending = c3.toggle("Descending", key="stock_desc")
+    page_size = c4.selectbox("Rows per page", PAGE_SIZES, index=1, key="stock_page_size")
+
+    # Back to the first page whenever the filter, sort or page size changes
+    view = (search, sort_label, descending, page_size)
+    if st.session_state.get('stock_view') != view:
+        st.session_state.stock_view = view
+        st.session_state.stock_page = 0
+
+    page_df, total_rows = get_inventory_page(
+        st.session_state.stock_page, page_size, search, SORT_OPTIONS[sort_label], descending
+    )
+    page_count = max(1, -(-total_rows // page_size))
+
+    if total_rows == 0:
+        st.info("No items match your search." if search else "Your inventory is empty. Add a new item to get started!")
+    else:
+        # One grid for the visible page; only the rows on screen are fetched and rendered.
+        # The key follows the page's contents, so rows changed elsewhere (or just added) show up.
+        page_hash = int(pd.util.hash_pandas_object(page_df[['inventory_id', 'quantity']], index=False).sum())
+        editor_key = f"inventory_grid_{st.session_state.get('grid_version', 0)}_{st.session_state.stock_page}_{view}_{page_hash}"
+        rows = grid_rows(editor_key, page_df)
+        st.data_editor(
+            rows,
+            key=editor_key,
+            num_rows="delete",
+            hide_index=True,
+            use_container_width=True,
+            disabled=['item_name', 'unit', 'reorder_point', 'is_low', 'last_updated'],
+            column_order=['item_name', 'quantity', 'unit', 'is_low', 'last_updated'],
+            column_config={
+                'item_name': st.column_config.TextColumn("Item Name"),
+                'quantity': st.column_config.NumberColumn("Quantity", min_value=0.0, step=0.01, format="%.2f"),
+                'unit': st.column_config.TextColumn("Unit"),
+                'is_low': st.column_config.CheckboxColumn("Low"),
+                'last_updated': st.column_config.DatetimeColumn("Last Updated"),
+            },
+        )
+        collect_grid_changes(editor_key, rows)
+
+        p1, p2, p3 = st.columns([0.2, 0.6, 0.2])
+        if p1.button("◀ Previous", use_container_width=True, disabled=st.session_state.stock_page == 0):
+            st.session_state.stock_page -= 1
+            rerun_fragment()
+        p2.markdown(f"<div style='text-align: center'>Page {st.session_state.stock_page + 1} of {page_count} · {total_rows} item(s)</div>", unsafe_allow_html=True)
+        if p3.button("Next ▶", use_container_width=True, disabled=st.session_state.stock_page >= page_count - 1):
+            st.session_state.stock_page += 1
+            rerun_fragment()
 
     # --- SAVE CHANGES ---
-    if st.session_state.inventory_edits:
-        if st.button("💾 Save All Quantity Changes", use_container_width=True, type="primary"):
-            for inv_id, new_qty in st.session_state.inventory_edits.items():
-                update_inventory_quantity(inv_id, new_qty)
-            st.session_state.inventory_edits = {} # Clear edits after saving
-            st.success("All changes saved!")
-            st.rerun()
\ No newline at end of file
+    changes = pending_changes()
+    if changes['updates'] or changes['deletes']:
+        st.caption(f"Unsaved: {len(changes['updates'])} quantity change(s), {len(changes['deletes'])} deletion(s).")
+        s1, s2 = st.columns([0.7, 0.3])
+        if s1.button("💾 Save All Changes", use_container_width=True, type="primary"):
+            # Quantities are saved as the change from what was read, merged and written with the other
+            # sessions' stock changes; one made to a row someone changed since is not saved
+            futures = {
+                inv_id: queue_adjustment(inv_id, qty - changes['base'][inv_id][0], changes['base'][inv_id][1], note="Stock grid")
+                for inv_id, qty in changes['updates'].items() if inv_id not in changes['deletes']
+            }
+            deleted = 0
+            if changes['deletes']:
+                outcome = apply_inventory_changes(deletes=sorted(changes['deletes']))
+                deleted = int((outcome['status'] == 'deleted').sum())
+            wait(futures.values(), timeout=SAVE_TIMEOUT)
+            reset_grid()
+            saved = not_found = 0
+            for inv_id, future in futures.items():
+                if not future.done():
+                    st.toast(f"Item {inv_id} is still being saved.")
+                    continue
+                if future.exception() is not None:
+                    st.toast(f"Couldn't save {changes['base'][inv_id][2]}: {future.exception()}", icon="⚠️")
+                    continue
+                result = future.result()
+                if result['status'] == 'applied':
+                    saved += 1
+                elif result['status'] == 'conflict':
+                    st.toast(
+                        f"{changes['base'][inv_id][2]} was changed by someone else "
+                        f"(now {result['quantity']:.2f} {result['unit']}); your change was not saved.", icon="⚠️"
+                    )
+                else:
+                    not_found += 1
+            if not_found:
+                st.toast(f"{not_found} item(s) were removed by someone else and could not be changed.")
+            st.toast(f"Saved {saved + deleted} change(s)!")
+            rerun_fragment()
+        if s2.button("✖️ Discard", use_container_width=True):
+            reset_grid()
+            rerun_fragment()
+
+    if not page_df.empty:
+        reorder_points(page_df)
+    stock_activity(page_df)
+
+stock_list()
@@ -1,12 +1,24 @@
 import streamlit as st
+from database_utils import get_households, DEFAULT_HOUSEHOLD
+from instrumentation import page_run
 
 home = st.Page("home.py", title="Home", icon="🏠")
 basket = st.Page("baskets.py", title="Baskets", icon="🧺")
 stock = st.Page("stocks.py", title="Stocks", icon="🥕")
 menu = st.Page("menu.py", title="Menu", icon="🍲")
+# Not in the sidebar; open /diagnostics directly
+diagnostics = st.Page("diagnostics.py", title="Diagnostics", icon="🩺", url_path="diagnostics", visibility="hidden")
+
+# Every page reads and writes the household selected here (session_state.household_id)
+households = get_households()
+if len(households) > 1:
+    names = dict(zip(households['household_id'], households['household_name']))
+    st.session_state.setdefault('household_id', DEFAULT_HOUSEHOLD)
+    st.sidebar.selectbox("Household", list(names), format_func=names.get, key='household_id')
 
 # Set up navigation
-pg = st.navigation([home, stock, menu, basket])
+pg = st.navigation([home, stock, menu, basket, diagnostics])
 
-# Run the selected page
-pg.run()
+# Run the selected page (timed, with its database round trips counted, on sampled reruns)
+with page_run(pg.title):
+    pg.run()
@@ -0,0 +1,144 @@
+# units.py
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------
+# --- CONVERSION TABLES ---
+# -----------------------------------------------------------------------------
+
+# Every supported unit converts to one base unit per dimension: mass -> g, volume -> ml, count -> pcs.
+# quantity_in_unit * factor = quantity_in_base_unit
+CONVERSION_FACTORS = pd.DataFrame(
+    [
+        ('kg', 'g', 1000.0),
+        ('g', 'g', 1.0),
+        ('l', 'ml', 1000.0),
+        ('ml', 'ml', 1.0),
+        ('pcs', 'pcs', 1.0),
+    ],
+    columns=['unit', 'base_unit', 'factor']
+).set_index(['unit', 'base_unit'])
+
+UNIT_TO_BASE = dict(CONVERSION_FACTORS.index)
+# Units as spelled in the database (the inventory / stock_items unit ENUM)
+STOCK_UNITS = ('kg', 'g', 'L', 'ml', 'pcs')
+UNIT_FACTOR = {unit: factor for (unit, _), factor in CONVERSION_FACTORS['factor'].items()}
+
+# Base units as integer codes so the hot path compares ints, not strings (-1 = unknown)
+BASE_UNITS = np.array(['g', 'ml', 'pcs'], dtype=object)
+GRAMS, MILLILITRES, PIECES = range(len(BASE_UNITS))
+UNIT_DIMENSION = {unit: BASE_UNITS.tolist().index(base) for unit, base in UNIT_TO_BASE.items()}
+
+# Columns on stock_items used to cross dimensions (e.g. a recipe asking for 'pcs' of an item stocked in 'kg')
+DENSITY_COLUMN = 'density_g_per_ml'
+PIECE_WEIGHT_COLUMN = 'piece_weight_g'
+
+# -----------------------------------------------------------------------------
+# --- VECTORIZED CONVERSION ---
+# -----------------------------------------------------------------------------
+
+def _length_of(values, unit):
+    """Row count of a conversion, letting a scalar quantity broadcast against an array of units."""
+    if values.ndim:
+        return values.shape[0]
+    return 1 if isinstance(unit, str) or unit is None else len(unit)
+
+def _lookup_units(unit, length):
+    """Maps a unit scalar or array to (dimension codes, factors), touching each distinct unit once."""
+    if isinstance(unit, str) or unit is None:
+        unit = [unit] * length
+    codes, uniques = pd.factorize(unit if isinstance(unit, pd.Series) else pd.Series(unit, dtype=object))
+    keys = [str(u).lower() for u in uniques]
+    # Code -1 (missing unit) picks the trailing "unknown" entry
+    dimensions = np.array([UNIT_DIMENSION.get(k, -1) for k in keys] + [-1])
+    factors = np.array([UNIT_FACTOR.get(k, np.nan) for k in keys] + [np.nan])
+    return dimensions[codes], factors[codes]
+
+def _base_unit_names(dimensions):
+    """Turns dimension codes back into base unit names (code -1 lands on the trailing None)."""
+    return np.append(BASE_UNITS, None)[dimensions]
+
+def _as_float_array(values, length):
+    """Broadcasts an optional scalar/array of per-item factors to floats (missing -> NaN)."""
+    if values is None:
+        return np.full(length, np.nan)
+    return np.broadcast_to(pd.to_numeric(pd.Series(np.ravel(values)), errors='coerce').to_numpy(dtype=float), length)
+
+def to_base_units(quantity, unit, target_unit=None, density=None, piece_weight=None):
+    """Converts arrays of quantities to base units in one vectorized pass.
+
+    Without `target_unit` each quantity is converted to the base unit of its own dimension.
+    With `target_unit` (e.g. an item's stock_items.base_unit) quantities are converted to that
+    unit's base, crossing dimensions through per-item `density` (g/ml) or `piece_weight` (g/pcs).
+    Returns a `(values, base_units)` pair of NumPy arrays; unconvertible rows come back as NaN.
+    """
+    quantity = np.asarray(quantity, dtype=float)
+    length = _length_of(quantity, unit)
+    quantity = np.broadcast_to(quantity, length)
+
+    source_dim, factor = _lookup_units(unit, length)
+    values = quantity * factor
+    if target_unit is None:
+        return values, _base_unit_names(source_dim)
+
+    target_dim, _ = _lookup_units(target_unit, length)
+    # Rows without a known target keep their own base unit; only the rest need crossing
+    cross = (target_dim >= 0) & (source_dim != target_dim)
+    result_dim = np.where(target_dim >= 0, target_dim, source_dim)
+    if not cross.any():
+        return values, _base_unit_names(result_dim)
+
+    values = values.copy()
+    src, dst = source_dim[cross], target_dim[cross]
+    density = _as_float_array(density, length)[cross]
+    piece_weight = _as_float_array(piece_weight, length)[cross]
+
+    # Route the crossing rows through grams, then out to the target dimension
+    grams = np.select(
+        [src == GRAMS, src == MILLILITRES, src == PIECES],
+        [values[cross], values[cross] * density, values[cross] * piece_weight],
+        default=np.nan
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values[cross] = np.select(
+            [dst == GRAMS, dst == MILLILITRES],
+            [grams, grams / density],
+            default=grams / piece_weight
+        )
+    return values, _base_unit_names(result_dim)
+
+def from_base_units(values, unit, base_unit=None, density=None, piece_weight=None):
+    """Converts base-unit quantities back into `unit`, vectorized; the inverse of to_base_units.
+
+    Without `base_unit` the values are in the base of `unit`'s own dimension. With it (e.g. an item's
+    stock_items.base_unit) they are in that unit's base and cross dimensions through per-item
+    `density` / `piece_weight`, like to_base_units; unconvertible rows come back as NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    length = _length_of(values, unit)
+    if base_unit is None:
+        _, factor = _lookup_units(unit, length)
+    else:
+        # What one `unit` amounts to in the base the values are in
+        factor, _ = to_base_units(np.ones(length), unit, base_unit, density=density, piece_weight=piece_weight)
+    return np.broadcast_to(values, length) / factor
+
+def normalize_frame(df, quantity_col, unit_col, target_unit_col=None, out_col='base_quantity'):
+    """Returns a copy of `df` with `<out_col>` and `base_unit_norm` columns in base units.
+
+    Per-item density and piece weight are read from the stock_items columns when present.
+    """
+    density = df[DENSITY_COLUMN] if DENSITY_COLUMN in df.columns else None
+    piece_weight = df[PIECE_WEIGHT_COLUMN] if PIECE_WEIGHT_COLUMN in df.columns else None
+    values, base_units = to_base_units(
+        df[quantity_col].to_numpy(dtype=float),
+        df[unit_col],
+        target_unit=df[target_unit_col] if target_unit_col else None,
+        density=density,
+        piece_weight=piece_weight
+    )
+    out = df.copy()
+    out[out_col] = values
+    out['base_unit_norm'] = base_units
+    return out
@@ -1,6 +1,8 @@
 # utils.py
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from forecast import MEALS, week_start, plan_dates
 
 def format_quantity(quantity, unit):
     """Formats a quantity into a human-readable string (e.g., 1500g -> 1.5 kg)."""
@@ -14,6 +16,44 @@ def format_quantity(quantity, unit):
         return f"{int(quantity)} pcs"
     return f"{quantity:.2f} {unit}"
 
+def build_week_grid(plan_df, values='recipe_name', empty="—", start=None, days=7):
+    """Pivots one-row-per-slot data into a dates x meals timetable of `days` days from `start` (default this week's Monday)."""
+    dates = plan_dates(start or week_start(), days)
+    grid = plan_df.pivot_table(index='meal_date', columns='meal_time', values=values, aggfunc='first')
+    grid = grid.reindex(index=dates, columns=MEALS).fillna(empty)
+    grid.index = [f"{day:%a %d %b}" for day in dates]
+    return grid
+
+def rerun_fragment():
+    """Reruns just the fragment being run, or the whole page when the fragment is running as part of it."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def load_failed(data, *names):
+    """Warns about each of `names` missing from a load_datasets() result; True if any is missing."""
+    failed = [name for name in names if name in data.errors]
+    for name in failed:
+        st.warning(f"Couldn't load {name.replace('_', ' ')}: {data.errors[name]}")
+    return bool(failed)
+
+def track_queued_write(future, label):
+    """Keeps a queued stock change (a write_queue Future) to report on by report_queued_writes."""
+    st.session_state.setdefault('queued_writes', []).append((future, label))
+
+def report_queued_writes():
+    """Toasts the tracked stock changes that have been written since the last rerun and didn't apply."""
+    pending = []
+    for future, label in st.session_state.get('queued_writes', []):
+        if not future.done():
+            pending.append((future, label))
+        elif future.exception() is not None:
+            st.toast(f"Couldn't save {label}: {future.exception()}", icon="⚠️")
+        elif future.result()['status'] != 'applied':
+            st.toast(f"{label} wasn't saved: {future.result()['status'].replace('_', ' ')}", icon="⚠️")
+    st.session_state.queued_writes = pending
+
 def initialize_data():
     """Initializes the session state with empty data structures for a clean start."""
     if "recipes" not in st.session_state:
@@ -0,0 +1,126 @@
+# write_queue.py
+#
+# Process-wide queue for the stock changes users make in the UI. An action is queued as a quantity
+# delta (a purchase, or "this row changed by x since I read it at version v"); a flusher thread
+# waits a short window after the first change, merges what was queued meanwhile (the same item and
+# kind of change become one) and writes the whole batch with apply_stock_changes: one transaction
+# and one cache invalidation per household, instead of one of each per click. Every action gets a
+# Future of its outcome, which the session that queued it waits on or checks on a later rerun;
+# an edit made against a row that changed in between comes back as a conflict.
+
+import threading
+import time
+from concurrent.futures import Future
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from database_utils import apply_stock_changes, current_household
+
+# Seconds the flusher waits after the first queued change for more to merge with it
+WRITE_WINDOW = 0.05
+# Changes written per transaction at most
+MAX_BATCH = 1000
+
+class WriteQueue:
+    """Merges queued stock changes and writes them in batches on a background thread.
+
+    Purchases of the same item (unit, note and expiry) merge whoever queued them, since they add
+    up the same in any order. Adjustments of a row merge only within one session and row version:
+    edits from two sessions made against the same version are kept apart so the second can be
+    reported as a conflict instead of silently stacking on the first.
+    """
+
+    def __init__(self, window=WRITE_WINDOW, max_batch=MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []  # [merge key, change, futures], in arrival order
+        self._by_key = {}  # merge key -> pending entry
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {'queued': 0, 'written': 0, 'flushes': 0, 'conflicts': 0}
+
+    @staticmethod
+    def _merge_key(change, session):
+        if 'inventory_id' in change:
+            owner = session if change.get('row_version') is not None else None
+            return ('adjustment', change['household_id'], int(change['inventory_id']), change.get('row_version'), change.get('note'), owner)
+        return ('purchase', change['household_id'], change['item_name'].casefold(), change['unit'], change.get('note'), change.get('expires_on'))
+
+    def submit(self, change, session=None):
+        """Queues `change` (a purchase or adjustment dict, see apply_stock_changes); returns a Future of its outcome."""
+        future = Future()
+        key = self._merge_key(change, session)
+        with self._lock:
+            entry = self._by_key.get(key)
+            if entry is None:
+                entry = self._by_key[key] = [key, dict(change, quantity=float(change['quantity'])), []]
+                self._pending.append(entry)
+            else:
+                entry[1]['quantity'] += float(change['quantity'])
+            entry[2].append(future)
+            self.stats['queued'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='inmyfridge-write-queue', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return future
+
+    def _take_batch(self):
+        with self._lock:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            self._by_key = {entry[0]: entry for entry in self._pending}
+            if not self._pending:
+                self._wakeup.clear()
+            return batch
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Give the changes of a burst of clicks the chance to join the batch
+            time.sleep(self.window)
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        try:
+            outcomes = apply_stock_changes([change for _, change, _ in batch])
+        except Exception as e:
+            for _, _, futures in batch:
+                for future in futures:
+                    future.set_exception(e)
+            return
+        with self._lock:
+            self.stats['flushes'] += 1
+            self.stats['written'] += len(batch)
+            self.stats['conflicts'] += sum(outcome['status'] == 'conflict' for outcome in outcomes)
+        for (_, _, futures), outcome in zip(batch, outcomes):
+            for future in futures:
+                future.set_result(outcome)
+
+@st.cache_resource
+def get_write_queue():
+    """The queue shared by every session in this process."""
+    return WriteQueue()
+
+def _session():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+def queue_purchase(item_name, quantity, unit, note=None, expires_on=None, household_id=None):
+    """Queues adding `quantity` of an item to stock (created if missing); returns a Future of the outcome."""
+    return get_write_queue().submit(dict(
+        household_id=current_household(household_id), item_name=item_name, quantity=quantity, unit=unit, note=note, expires_on=expires_on
+    ), _session())
+
+def queue_adjustment(inventory_id, change, row_version, note=None, household_id=None):
+    """Queues changing an inventory row by `change` (in its unit), made against `row_version` of the row.
+
+    The change is a conflict, and not applied, if the row's stock changed since that version;
+    `row_version` None applies it regardless. Returns a Future of the outcome.
+    """
+    return get_write_queue().submit(dict(
+        household_id=current_household(household_id), inventory_id=int(inventory_id), quantity=change,
+        row_version=None if row_version is None else int(row_version), note=note
+    ), _session())